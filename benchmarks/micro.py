@@ -0,0 +1,431 @@
+"""
+In-process micro-benchmarks for the hot handlers, with committed baselines.
+
+Each scenario calls one handler directly, without a network or server
+process, so that the handler's own cost is what gets measured:
+
+    marketplace.update_inventory_item   PATCH handler with an InventoryUpdate
+    marketplace.list_inventory          GET /inventory handler, 10 000 items encoded as JSON
+    procurement.submit_order            SubmitOrder envelope through the Spyne WSGI app
+    logistics.stream_telemetry          StreamTelemetry, 20 commands / 5 robots per call
+    dashboard.stores_query              `stores` GraphQL query, backend fetchers stubbed
+    dashboard.summary_query             `dashboardSummary` GraphQL query, fetchers stubbed
+    dashboard.cold_start                fresh interpreter importing the gateway
+
+dashboard.cold_start is the exception: it times a new Python process
+importing dashboard/mock-server/server.py, the price of every start and of
+every uvicorn worker spawn.
+
+A run takes `--samples` samples of `ops` calls each and keeps per-sample
+throughput and p99 latency. Baselines live in benchmarks/baselines/, one
+JSON file per scenario, with a history entry for every recording.
+
+    python benchmarks/micro.py run                  # print current numbers
+    python benchmarks/micro.py record               # store as the new baseline
+    python benchmarks/micro.py compare              # exit 1 on a regression
+
+`compare` flags a regression when a one-sided Mann-Whitney U test over the
+samples is significant (--alpha, default 0.01) and the median moved by more
+than --threshold (default 10%): lower throughput or higher p99. Baselines
+are machine-specific; re-record them when the hardware changes.
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+from wsgiref.util import setup_testing_defaults
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from run_benchmarks import git_commit, percentile
+
+
+# ---------------------------------------------------------------------------
+# Loading the servers in-process
+# ---------------------------------------------------------------------------
+
+def load_server(module: str):
+    """Imports <module>/mock-server/server.py without starting it."""
+    directory = os.path.join(ROOT, module, "mock-server")
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(
+        f"{module}_server", os.path.join(directory, "server.py"))
+    server = sys.modules[spec.name] = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(server)
+    return server
+
+
+class _StreamContext:
+    """The parts of grpc.ServicerContext a streaming handler touches."""
+
+    def invocation_metadata(self):
+        return ()
+
+    def add_callback(self, callback):
+        return True
+
+    def set_trailing_metadata(self, metadata):
+        pass
+
+    def abort(self, code, details):
+        raise RuntimeError(f"{code}: {details}")
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: each setup returns a zero-argument op
+# ---------------------------------------------------------------------------
+
+def setup_update_inventory_item():
+    server = load_server("marketplace")
+    counter = iter(range(10**9))
+
+    def op():
+        i = next(counter)
+        server.update_inventory_item(
+            f"SKU00{i % 5 + 1}", server.InventoryUpdate(quantity=100 + i % 400),
+            if_match=None)
+    return op
+
+
+def setup_list_inventory():
+    server = load_server("marketplace")
+    from starlette.requests import Request
+    server.inventory = server.InventoryStore(
+        dict(sku=f"SKU-M{i:05d}", name=f"Micro Item {i}",
+             category=("jackets", "sneakers", "tops")[i % 3],
+             quantity=i % 500, price_cents=1000 + i % 9000,
+             store_id="STORE-PARIS-01")
+        for i in range(10_000)
+    )
+    request = Request({"type": "http", "headers": [(b"accept", b"application/json")]})
+
+    def op():
+        server.list_inventory(request)
+    return op
+
+
+def setup_submit_order():
+    server = load_server("procurement")
+    from procurement.client import codec
+    from procurement.client.client import _headers
+    counter = iter(range(10**9))
+    headers = _headers("SubmitOrder")
+
+    def op():
+        body = codec.encode_request("SubmitOrder", order={
+            "order_id": f"PO-MICRO-{next(counter):08d}",
+            "buyer_org_id": "STORE-MICRO",
+            "supplier_org_id": "SUP-MICRO",
+            "currency": "EUR",
+            "items": [{"sku": "SKU-JACKET-BLK-L", "product_name": "Urban Wool Jacket",
+                       "quantity": 50, "unit_price_cents": 4500}],
+        })
+        environ = {}
+        setup_testing_defaults(environ)
+        environ.update({
+            "REQUEST_METHOD": "POST",
+            "CONTENT_TYPE": headers["Content-Type"],
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_SOAPACTION": headers["SOAPAction"],
+            "wsgi.input": io.BytesIO(body),
+        })
+        status = []
+        b"".join(server.wsgi_app(environ, lambda s, h, exc=None: status.append(s)))
+        if not status[0].startswith("200"):
+            raise RuntimeError(f"SubmitOrder returned {status[0]}")
+    return op
+
+
+def setup_stream_telemetry():
+    server = load_server("logistics")
+    server.STEP_INTERVAL_S = 0.0        # measure dispatch, not the simulated pace
+    servicer = server.WarehouseAutomationServicer()
+    pb = server.warehouse_pb2
+    commands = [
+        pb.WarehouseCommand(robot_id=f"ROBOT-M{i % 5}", command=pb.COMMAND_PICK,
+                            target=pb.Coordinates(x=float(i), y=2.0, z=1.0))
+        for i in range(20)
+    ]
+    expected = len(commands) * server.STEPS_PER_COMMAND
+
+    def op():
+        with contextlib.redirect_stdout(io.StringIO()):
+            received = sum(1 for _ in servicer.StreamTelemetry(iter(commands),
+                                                               _StreamContext()))
+        if received != expected:
+            raise RuntimeError(f"expected {expected} telemetry, got {received}")
+    return op
+
+
+def _stub_dashboard_fetchers(server) -> None:
+    inventory = [server.InventoryItem(sku=f"SKU{i:03d}", name=f"Item {i}",
+                                      category="jackets", quantity=i, price_cents=4500)
+                 for i in range(20)]
+    orders = [server.Order(id=f"PO-{i}", supplier_id="SUP-1",
+                           status=server.OrderStatus.PENDING, total_price_cents=1000,
+                           item_count=2, order_date="2026-01-01")
+              for i in range(10)]
+    robots = [server.RobotTelemetry(robot_id="ROBOT-01", x=1.0, y=2.0, z=0.0,
+                                    battery_level=0.9, status=server.RobotStatus.IDLE)]
+    server.fetch_rest_inventory = lambda store_id=None: inventory
+    server.fetch_soap_orders = lambda store_id: orders
+    server.fetch_grpc_robots = lambda store_id: robots
+
+
+def setup_stores_query():
+    server = load_server("dashboard")
+    _stub_dashboard_fetchers(server)
+    query = """{ stores { id name city
+        inventory { sku name quantity priceCents }
+        orders { id status totalPriceCents }
+        robots { robotId status batteryLevel } } }"""
+
+    def op():
+        result = server.schema.execute_sync(query)
+        if result.errors:
+            raise RuntimeError(result.errors[0].message)
+    return op
+
+
+def setup_cold_start():
+    directory = os.path.join(ROOT, "dashboard", "mock-server")
+    command = [sys.executable, "-c", "import server"]
+
+    def op():
+        subprocess.run(command, cwd=directory, check=True)
+    return op
+
+
+def setup_summary_query():
+    server = load_server("dashboard")
+    _stub_dashboard_fetchers(server)
+    server.reconcile_kpis()     # what the lifespan's background thread does first
+    query = """{ dashboardSummary { totalStores totalSkus totalOrdersPending
+        totalRobotsActive lowStockAlerts { sku quantity } } }"""
+
+    def op():
+        result = server.schema.execute_sync(query)
+        if result.errors:
+            raise RuntimeError(result.errors[0].message)
+    return op
+
+
+@dataclass
+class Scenario:
+    name: str
+    setup: Callable[[], Callable[[], None]]
+    ops: int            # calls per sample
+    warmup: int | None = None       # overrides --warmup
+
+
+SCENARIOS = {s.name: s for s in (
+    Scenario("marketplace.update_inventory_item", setup_update_inventory_item, 5000),
+    Scenario("marketplace.list_inventory", setup_list_inventory, 50),
+    Scenario("procurement.submit_order", setup_submit_order, 300),
+    Scenario("logistics.stream_telemetry", setup_stream_telemetry, 50),
+    Scenario("dashboard.stores_query", setup_stores_query, 200),
+    Scenario("dashboard.summary_query", setup_summary_query, 500),
+    Scenario("dashboard.cold_start", setup_cold_start, 3, warmup=1),
+)}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def measure(scenario: Scenario, samples: int, warmup: int) -> dict:
+    op = scenario.setup()
+    if scenario.warmup is not None:
+        warmup = scenario.warmup
+    for _ in range(warmup):
+        op()
+
+    throughput, p99 = [], []
+    for _ in range(samples):
+        gc.collect()
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(scenario.ops):
+            t0 = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        throughput.append(round(scenario.ops / elapsed, 2))
+        p99.append(round(percentile(latencies, 99) * 1000, 4))
+    return {"throughput_ops_s": throughput, "p99_ms": p99}
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def mann_whitney_greater(a: list, b: list) -> float:
+    """
+    One-sided p-value that values in `a` tend to be larger than in `b`
+    (Mann-Whitney U, normal approximation with tie correction).
+    """
+    n1, n2 = len(a), len(b)
+    ranked = sorted((v, i < n1) for i, v in enumerate(a + b))
+    ranks = [0.0] * len(ranked)
+    ties = 0.0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+
+    rank_sum_a = sum(r for r, (_, in_a) in zip(ranks, ranked) if in_a)
+    u = rank_sum_a - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)      # continuity correction
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare_scenario(current: dict, baseline: dict, alpha: float,
+                     threshold: float) -> list[str]:
+    """Returns a description of every regression found."""
+    regressions = []
+    base_tp, cur_tp = baseline["throughput_ops_s"], current["throughput_ops_s"]
+    change = statistics.median(cur_tp) / statistics.median(base_tp) - 1
+    p = mann_whitney_greater(base_tp, cur_tp)
+    if p < alpha and change < -threshold:
+        regressions.append(f"throughput {change:+.1%} (p={p:.4f})")
+
+    base_p99, cur_p99 = baseline["p99_ms"], current["p99_ms"]
+    change = statistics.median(cur_p99) / statistics.median(base_p99) - 1
+    p = mann_whitney_greater(cur_p99, base_p99)
+    if p < alpha and change > threshold:
+        regressions.append(f"p99 {change:+.1%} (p={p:.4f})")
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# Baseline store
+# ---------------------------------------------------------------------------
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def load_baseline(name: str) -> dict | None:
+    try:
+        with open(baseline_path(name)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def record_baseline(scenario: Scenario, result: dict) -> None:
+    stored = load_baseline(scenario.name) or {"scenario": scenario.name, "history": []}
+    recorded = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": machine(),
+        "ops_per_sample": scenario.ops,
+    }
+    stored["baseline"] = {**recorded, **result}
+    stored["history"].append({
+        "recorded_at": recorded["recorded_at"],
+        "git_commit": recorded["git_commit"],
+        "throughput_ops_s": statistics.median(result["throughput_ops_s"]),
+        "p99_ms": statistics.median(result["p99_ms"]),
+    })
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(scenario.name), "w") as f:
+        json.dump(stored, f, indent=2)
+        f.write("\n")
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def summary(result: dict) -> str:
+    return (f"{statistics.median(result['throughput_ops_s']):>10.1f} ops/s   "
+            f"p99 {statistics.median(result['p99_ms']):8.3f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RetailSync handler micro-benchmarks")
+    parser.add_argument("command", choices=["run", "record", "compare"])
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--alpha", type=float, default=0.01,
+                        help="significance level for compare")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="minimum relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    failed = []
+    for name in args.scenario:
+        scenario = SCENARIOS[name]
+        result = measure(scenario, args.samples, args.warmup)
+        line = f"  {name:<36} {summary(result)}"
+
+        if args.command == "record":
+            record_baseline(scenario, result)
+            print(f"{line}   recorded")
+        elif args.command == "compare":
+            stored = load_baseline(name)
+            if stored is None:
+                print(f"{line}   no baseline (run `record` first)")
+                continue
+            baseline = stored["baseline"]
+            if baseline["machine"] != machine():
+                print(f"  warning: {name} baseline was recorded on "
+                      f"{baseline['machine']['platform']}")
+            regressions = compare_scenario(result, baseline, args.alpha, args.threshold)
+            verdict = "REGRESSION: " + ", ".join(regressions) if regressions else "ok"
+            print(f"{line}   vs {summary(baseline)}   {verdict}")
+            if regressions:
+                failed.append(name)
+        else:
+            print(line)
+
+    if failed:
+        print(f"\n  {len(failed)} scenario(s) regressed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
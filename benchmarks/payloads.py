@@ -0,0 +1,90 @@
+"""
+Wire size of the same order object in SOAP XML, REST JSON and Protobuf.
+
+Encodes one order line (order id, SKU, quantity, unit price, currency) the
+way each service puts it on the wire:
+
+    soap   SubmitOrder request envelope built by procurement.client.codec
+    rest   compact JSON body, as FastAPI serialises it
+    grpc   Protobuf message with the same five fields, plus the 5-byte
+           gRPC length prefix
+
+No server is needed; the numbers are deterministic and feed the payload
+comparison chart (diagrams/generate_diagrams.py).
+"""
+
+import json
+import os
+import sys
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from procurement.client import codec
+
+
+GRPC_FRAME_HEADER = 5      # compressed flag + 4-byte message length
+
+SAMPLE_ORDER = {
+    "order_id": "PO-2026-0042",
+    "sku": "SKU-JACKET-BLK-L",
+    "quantity": 500,
+    "unit_price_cents": 4500,
+    "currency": "EUR",
+}
+
+
+def _order_message_class():
+    """Builds an Order message type with the sample's five fields."""
+    proto = descriptor_pb2.FileDescriptorProto(
+        name="benchmarks/order.proto", package="retailsync.bench", syntax="proto3")
+    message = proto.message_type.add(name="Order")
+    fields = [("order_id", "TYPE_STRING"), ("sku", "TYPE_STRING"),
+              ("quantity", "TYPE_INT32"), ("unit_price_cents", "TYPE_INT32"),
+              ("currency", "TYPE_STRING")]
+    for number, (name, field_type) in enumerate(fields, start=1):
+        message.field.add(
+            name=name, number=number,
+            type=getattr(descriptor_pb2.FieldDescriptorProto, field_type),
+            label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+        )
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(proto)
+    return message_factory.GetMessageClass(
+        pool.FindMessageTypeByName("retailsync.bench.Order"))
+
+
+def encode_soap(order: dict) -> bytes:
+    return codec.encode_request("SubmitOrder", order={
+        "order_id": order["order_id"],
+        "currency": order["currency"],
+        "items": [{
+            "sku": order["sku"],
+            "quantity": order["quantity"],
+            "unit_price_cents": order["unit_price_cents"],
+        }],
+    })
+
+
+def encode_rest(order: dict) -> bytes:
+    return json.dumps(order, separators=(",", ":")).encode("utf-8")
+
+
+def encode_grpc(order: dict) -> bytes:
+    return _order_message_class()(**order).SerializeToString()
+
+
+def measure_order_payloads(order: dict = SAMPLE_ORDER) -> dict:
+    """Returns {protocol: bytes on the wire} for one order."""
+    return {
+        "soap": len(encode_soap(order)),
+        "rest": len(encode_rest(order)),
+        "grpc": len(encode_grpc(order)) + GRPC_FRAME_HEADER,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure_order_payloads(), indent=2))
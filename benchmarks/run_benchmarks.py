@@ -0,0 +1,536 @@
+"""
+Cross-protocol benchmark harness for the four RetailSync services.
+
+Starts every mock server as a subprocess, runs the same workloads against
+each protocol and writes the results as JSON:
+
+    workload      soap (8001)          rest (8002)        graphql (8003)     grpc (50051)
+    single_read   GetRecentOrders x1   GET /inventory/id  store(id)          GetRobotStatus
+    bulk_write    SubmitOrder          PATCH /inventory   (no mutations)     StreamTelemetry command
+    list          GetRecentOrders x50  GET /inventory     stores             ListRobotsInRegion
+    streaming     -                    -                  -                  load_test.py streams
+
+Each entry records throughput, latency percentiles, average request and
+response bytes, and CPU seconds / peak RSS of every server process while
+the workload ran (the GraphQL gateway's numbers include its fan-out to the
+three backends). Writes run before lists so the gRPC region query returns
+the robots the writes placed. The top-level "payload" block holds the
+order object sizes from payloads.py used by the payload comparison chart.
+
+Run from the project root (all ports must be free):
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --requests 2000 --concurrency 16
+
+Results go to benchmarks/results/<timestamp>.json and results/latest.json.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import grpc
+import httpx
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGISTICS_DIR = os.path.join(ROOT, "logistics", "mock-server")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, LOGISTICS_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from payloads import GRPC_FRAME_HEADER, measure_order_payloads
+
+
+WORKLOADS = ("single_read", "bulk_write", "list", "streaming")
+PROTOCOLS = ("soap", "rest", "graphql", "grpc")
+
+
+# ---------------------------------------------------------------------------
+# Server processes
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ServerSpec:
+    name: str
+    protocol: str
+    script: str
+    port: int
+
+
+SERVERS = [
+    ServerSpec("procurement", "soap", "procurement/mock-server/server.py", 8001),
+    ServerSpec("marketplace", "rest", "marketplace/mock-server/server.py", 8002),
+    ServerSpec("logistics", "grpc", "logistics/mock-server/server.py", 50051),
+    ServerSpec("dashboard", "graphql", "dashboard/mock-server/server.py", 8003),
+]
+
+
+def port_open(port: int) -> bool:
+    with socket.socket() as sock:
+        sock.settimeout(0.2)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def ensure_grpc_stubs() -> None:
+    """Generates the warehouse stubs the first time, as in the README."""
+    if os.path.exists(os.path.join(ROOT, "logistics", "stubs", "warehouse_pb2_grpc.py")):
+        return
+    subprocess.run([sys.executable, "-m", "logistics.stubs.generate"], cwd=ROOT, check=True)
+
+
+class ServerProcess:
+    """One mock server running as a child process."""
+
+    def __init__(self, spec: ServerSpec, log_dir: str):
+        self.spec = spec
+        self.log_path = os.path.join(log_dir, f"{spec.name}.log")
+        self.popen = None
+        self.process = None
+
+    def start(self, timeout: float = 30.0) -> None:
+        if port_open(self.spec.port):
+            raise SystemExit(f"Port {self.spec.port} is already in use; stop the "
+                             f"running {self.spec.name} server first.")
+        log = open(self.log_path, "w")
+        self.popen = subprocess.Popen(
+            [sys.executable, self.spec.script], cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=log,
+        )
+        self.process = psutil.Process(self.popen.pid)
+        deadline = time.monotonic() + timeout
+        while not port_open(self.spec.port):
+            if self.popen.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise SystemExit(f"{self.spec.name} did not start; see {self.log_path}")
+            time.sleep(0.1)
+
+    def stop(self) -> None:
+        if self.popen and self.popen.poll() is None:
+            self.popen.terminate()
+            try:
+                self.popen.wait(5)
+            except subprocess.TimeoutExpired:
+                self.popen.kill()
+
+
+class ResourceSampler:
+    """CPU time and peak RSS of the server processes over a block."""
+
+    def __init__(self, servers: list[ServerProcess], interval: float = 0.05):
+        self.servers = servers
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def _cpu(self) -> dict[str, float]:
+        cpu = {}
+        for server in self.servers:
+            times = server.process.cpu_times()
+            cpu[server.spec.name] = times.user + times.system
+        return cpu
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            for server in self.servers:
+                rss = server.process.memory_info().rss
+                self._peak[server.spec.name] = max(self._peak[server.spec.name], rss)
+
+    def __enter__(self):
+        self._peak = {s.spec.name: s.process.memory_info().rss for s in self.servers}
+        self._cpu_start = self._cpu()
+        self._wall_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        wall = time.perf_counter() - self._wall_start
+        cpu_end = self._cpu()
+        self.result = {
+            name: {
+                "cpu_s": round(cpu_end[name] - self._cpu_start[name], 3),
+                "cpu_pct": round(100 * (cpu_end[name] - self._cpu_start[name]) / wall, 1),
+                "rss_peak_mb": round(self._peak[name] / 2**20, 1),
+            }
+            for name in cpu_end
+        }
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: list, pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_workload(op, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+    Calls op() `requests` times from `concurrency` threads. op returns
+    (request_bytes, response_bytes) and raises on failure.
+    """
+    for _ in range(warmup):
+        op()
+
+    latencies, sizes, errors = [], [], {}
+    lock = threading.Lock()
+
+    def call(_):
+        started = time.perf_counter()
+        try:
+            size = op()
+        except Exception as e:      # recorded, not fatal
+            with lock:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            sizes.append(size)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.fmean(latencies) if latencies else None,
+            "max": latencies[-1] if latencies else None,
+        },
+        "payload_bytes": {
+            "request": round(statistics.fmean(s[0] for s in sizes), 1) if sizes else None,
+            "response": round(statistics.fmean(s[1] for s in sizes), 1) if sizes else None,
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Protocol workloads: each factory returns op() -> (request_bytes, response_bytes)
+# ---------------------------------------------------------------------------
+
+class SoapWorkloads:
+    URL = "http://localhost:8001/"
+
+    def __init__(self):
+        from procurement.client import codec
+        from procurement.client.client import _headers
+        self.codec, self.headers = codec, _headers
+        self.http = httpx.Client(limits=httpx.Limits(max_connections=64))
+        self.ids = itertools.count()
+
+    def _call(self, operation: str, **params):
+        body = self.codec.encode_request(operation, **params)
+        resp = self.http.post(self.URL, content=body, headers=self.headers(operation))
+        self.codec.decode_response(operation, resp.content)
+        return len(body), len(resp.content)
+
+    def single_read(self):
+        return lambda: self._call("GetRecentOrders", request={
+            "storeId": "STORE-PARIS-01", "pageSize": 1})
+
+    def list(self):
+        return lambda: self._call("GetRecentOrders", request={
+            "storeId": "STORE-PARIS-01", "pageSize": 50})
+
+    def bulk_write(self):
+        def op():
+            return self._call("SubmitOrder", order={
+                "order_id": f"PO-BENCH-{next(self.ids):07d}",
+                "buyer_org_id": "STORE-BENCH",
+                "supplier_org_id": "SUP-BENCH",
+                "currency": "EUR",
+                "items": [{"sku": "SKU-JACKET-BLK-L", "product_name": "Urban Wool Jacket",
+                           "quantity": 50, "unit_price_cents": 4500}],
+            })
+        return op
+
+    def close(self):
+        self.http.close()
+
+
+class RestWorkloads:
+    URL = "http://localhost:8002"
+
+    def __init__(self):
+        self.http = httpx.Client(base_url=self.URL,
+                                 limits=httpx.Limits(max_connections=64))
+        self.ids = itertools.count()
+
+    def _sizes(self, resp: httpx.Response):
+        resp.raise_for_status()
+        return len(resp.request.content), len(resp.content)
+
+    def single_read(self):
+        return lambda: self._sizes(self.http.get("/inventory/SKU001"))
+
+    def list(self):
+        return lambda: self._sizes(self.http.get("/inventory"))
+
+    def bulk_write(self):
+        def op():
+            i = next(self.ids)
+            return self._sizes(self.http.patch(f"/inventory/SKU00{i % 5 + 1}",
+                                               json={"quantity": 100 + i % 400}))
+        return op
+
+    def close(self):
+        self.http.close()
+
+
+class GraphqlWorkloads:
+    URL = "http://localhost:8003/graphql"
+    STORE_QUERY = """query { store(id: "STORE-PARIS-01") {
+        id name inventory { sku quantity } } }"""
+    STORES_QUERY = """query { stores { id name city
+        inventory { sku name quantity priceCents }
+        orders { id status totalPriceCents }
+        robots { robotId status batteryLevel } } }"""
+
+    def __init__(self):
+        self.http = httpx.Client(limits=httpx.Limits(max_connections=64), timeout=30)
+
+    def _query(self, query: str):
+        resp = self.http.post(self.URL, json={"query": query})
+        resp.raise_for_status()
+        if resp.json().get("errors"):
+            raise RuntimeError(resp.json()["errors"][0]["message"])
+        return len(resp.request.content), len(resp.content)
+
+    def single_read(self):
+        return lambda: self._query(self.STORE_QUERY)
+
+    def list(self):
+        return lambda: self._query(self.STORES_QUERY)
+
+    bulk_write = None       # the schema has no mutations
+
+    def close(self):
+        self.http.close()
+
+
+class GrpcWorkloads:
+    TARGET = "localhost:50051"
+
+    def __init__(self):
+        from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+        self.pb = warehouse_pb2
+        self.channel = grpc.insecure_channel(self.TARGET)
+        self.stub = warehouse_pb2_grpc.WarehouseAutomationStub(self.channel)
+        self.ids = itertools.count()
+        self.local = threading.local()
+        self.sessions = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _framed(message) -> int:
+        return message.ByteSize() + GRPC_FRAME_HEADER
+
+    def single_read(self):
+        def op():
+            request = self.pb.RobotRequest(robot_id="ROBOT-01")
+            return self._framed(request), self._framed(self.stub.GetRobotStatus(request))
+        return op
+
+    def list(self):
+        def op():
+            request = self.pb.RegionRequest(bbox=self.pb.BoundingBox(
+                min=self.pb.Coordinates(x=0, y=0), max=self.pb.Coordinates(x=1000, y=1000)))
+            return self._framed(request), self._framed(self.stub.ListRobotsInRegion(request))
+        return op
+
+    def _session(self):
+        """A long-lived StreamTelemetry call per worker thread."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            commands = queue.Queue()
+            responses = self.stub.StreamTelemetry(iter(commands.get, None))
+            session = self.local.session = (commands, responses)
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def bulk_write(self):
+        """One MOVE command per call; done when its first telemetry arrives."""
+        def op():
+            commands, responses = self._session()
+            i = next(self.ids)
+            command = self.pb.WarehouseCommand(
+                robot_id=f"BENCH-{i:06d}", command=self.pb.COMMAND_MOVE,
+                target=self.pb.Coordinates(x=float(i % 200), y=float(i % 100)),
+                timestamp_ms=int(time.time() * 1000),
+            )
+            commands.put(command)
+            for telemetry in responses:
+                if telemetry.robot_id == command.robot_id:
+                    return self._framed(command), self._framed(telemetry)
+            raise RuntimeError("stream closed")
+        return op
+
+    def _close_sessions(self):
+        with self.lock:
+            sessions, self.sessions = self.sessions, []
+        for commands, responses in sessions:
+            commands.put(None)
+            responses.cancel()
+        self.local = threading.local()
+
+    def streaming(self, args):
+        """
+        Runs load_test.py per-message and batched. 2 channels x 4 streams
+        stays inside the server's 10 worker threads; each open stream
+        holds one.
+        """
+        import load_test
+        self._close_sessions()      # free the workers held by bulk_write
+        results = {}
+        for label, batched in (("grpc", False), ("grpc-batched", True)):
+            results[label] = asyncio.run(load_test.run_load(argparse.Namespace(
+                target=self.TARGET, channels=2, streams=4, rate=args.stream_rate,
+                duration=args.stream_duration, robots=64, batched=batched,
+                policy="conflate", drain_timeout=10.0, command_timeout=5.0,
+            )))
+        return results
+
+    def close(self):
+        self._close_sessions()
+        self.channel.close()
+
+
+WORKLOAD_CLASSES = {
+    "soap": SoapWorkloads,
+    "rest": RestWorkloads,
+    "graphql": GraphqlWorkloads,
+    "grpc": GrpcWorkloads,
+}
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    os.makedirs(args.output_dir, exist_ok=True)
+    ensure_grpc_stubs()
+
+    servers = [ServerProcess(spec, args.output_dir) for spec in SERVERS]
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "payload": {"order": measure_order_payloads()},
+        "workloads": {w: {} for w in args.workloads},
+    }
+
+    try:
+        for server in servers:
+            print(f"  starting {server.spec.name} on :{server.spec.port}")
+            server.start()
+
+        clients = {p: WORKLOAD_CLASSES[p]() for p in args.protocols}
+        try:
+            for workload in args.workloads:
+                for protocol, client in clients.items():
+                    if workload == "streaming":
+                        if protocol != "grpc":
+                            continue
+                        with ResourceSampler(servers) as sampler:
+                            reports = client.streaming(args)
+                        for label, report in reports.items():
+                            report["servers"] = sampler.result
+                            results["workloads"][workload][label] = report
+                        print(f"  {workload:<12} grpc         done")
+                        continue
+
+                    factory = getattr(client, workload)
+                    if factory is None:
+                        continue
+                    with ResourceSampler(servers) as sampler:
+                        entry = run_workload(factory(), args.requests,
+                                             args.concurrency, args.warmup)
+                    entry["servers"] = sampler.result
+                    results["workloads"][workload][protocol] = entry
+                    print(f"  {workload:<12} {protocol:<12} "
+                          f"{entry['throughput_rps']:>9.1f} req/s  "
+                          f"p50 {entry['latency_ms']['p50'] or 0:7.2f} ms  "
+                          f"p99 {entry['latency_ms']['p99'] or 0:7.2f} ms")
+        finally:
+            for client in clients.values():
+                client.close()
+    finally:
+        for server in reversed(servers):
+            server.stop()
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    text = json.dumps(results, indent=2)
+    for name in (f"{stamp}.json", "latest.json"):
+        with open(os.path.join(args.output_dir, name), "w") as f:
+            f.write(text + "\n")
+    print(f"  results written to {os.path.join(args.output_dir, stamp + '.json')}")
+    return results
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description="RetailSync cross-protocol benchmarks")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="measured calls per workload and protocol")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="client threads per workload")
+    parser.add_argument("--warmup", type=int, default=20,
+                        help="unmeasured calls before each workload")
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS),
+                        choices=WORKLOADS)
+    parser.add_argument("--protocols", nargs="+", default=list(PROTOCOLS),
+                        choices=PROTOCOLS)
+    parser.add_argument("--stream-rate", type=float, default=500.0,
+                        help="commands per second for the streaming workload")
+    parser.add_argument("--stream-duration", type=float, default=10.0,
+                        help="seconds of streaming load")
+    parser.add_argument("--output-dir",
+                        default=os.path.join(ROOT, "benchmarks", "results"))
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
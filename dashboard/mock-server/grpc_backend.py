@@ -0,0 +1,83 @@
+"""
+gRPC adapter: robot telemetry from the Warehouse Automation service (port 50051).
+
+Loaded on first use by server.py, so that importing the gateway does not
+pay for grpc and the generated stubs (see logistics/stubs).
+
+watch_fleet() follows the logistics fleet feed (the simulator's telemetry,
+see logistics/mock-server/server.py --simulate), so robot KPIs are pushed
+rather than fetched.
+"""
+
+import threading
+from typing import Callable, Collection
+
+import grpc
+
+from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+from observability.tracing import outgoing_metadata
+
+GRPC_TARGET = "localhost:50051"
+GRPC_TIMEOUT = 5.0      # seconds, like the REST and SOAP clients
+FEED_RETRY_S = 5.0      # wait before reopening a failed fleet feed
+
+_STATUS_NAMES = {
+    warehouse_pb2.ROBOT_STATUS_IDLE: "IDLE",
+    warehouse_pb2.ROBOT_STATUS_MOVING: "MOVING",
+    warehouse_pb2.ROBOT_STATUS_PICKING: "PICKING",
+    warehouse_pb2.ROBOT_STATUS_CHARGING: "CHARGING",
+    warehouse_pb2.ROBOT_STATUS_ERROR: "ERROR",
+}
+
+# One channel shared by every call and the fleet feed; it reconnects on its
+# own after the service restarts.
+channel = grpc.insecure_channel(GRPC_TARGET)
+stub = warehouse_pb2_grpc.WarehouseAutomationStub(channel)
+
+
+def fetch_robot(robot_id: str) -> dict:
+    """One robot's status; `status` is a RobotStatus name, IDLE if unknown."""
+    resp = stub.GetRobotStatus(warehouse_pb2.RobotRequest(robot_id=robot_id),
+                               metadata=outgoing_metadata(), timeout=GRPC_TIMEOUT)
+    return _robot(resp)
+
+
+def _robot(resp) -> dict:
+    return {
+        "robot_id": resp.robot_id,
+        "x": resp.position.x,
+        "y": resp.position.y,
+        "z": resp.position.z,
+        "battery_level": resp.battery_level,
+        "status": _STATUS_NAMES.get(resp.status, "IDLE"),
+    }
+
+
+def _until(stop: threading.Event):
+    """A command stream that sends nothing and ends when `stop` is set."""
+    stop.wait()
+    return
+    yield
+
+
+def watch_fleet(robot_ids: Collection[str], on_robot: Callable[[dict], None],
+                stop: threading.Event) -> None:
+    """
+    Calls on_robot(robot) for every fleet-feed update of one of `robot_ids`
+    until `stop` is set, reopening the feed when it fails. The feed
+    conflates, so a slow callback only skips intermediate positions.
+    """
+    reported = False
+    while not stop.is_set():
+        call = stub.StreamTelemetry(_until(stop), metadata=(
+            ("x-fleet-feed", "1"), ("x-telemetry-policy", "conflate")))
+        try:
+            for telemetry in call:
+                reported = False
+                if telemetry.robot_id in robot_ids:
+                    on_robot(_robot(telemetry))
+        except grpc.RpcError as e:
+            if not reported:            # once per outage
+                print(f"fleet feed error: {e.code().name}")
+                reported = True
+        stop.wait(FEED_RETRY_S)
@@ -0,0 +1,161 @@
+"""
+Incremental KPI aggregation for the dashboardSummary query.
+
+Instead of rebuilding every store on each summary, the gateway keeps the
+KPIs as running totals. Every backend result the gateway receives, for
+any query or for the background reconciliation, replaces that store
+field's contribution:
+
+    update("inventory", "STORE-PARIS-01", {"total_skus": 2}, alerts=[...])
+
+Totals move by the difference between the old and new contribution, so
+an update costs O(size of that result). The alert and stale lists are
+kept up to date the same way, by the writes that change them, so reading
+the summary costs O(number of KPIs) plus the size of those lists, however
+many stores and SKUs there are.
+
+A contribution is replaced, never accumulated, so the totals cannot
+drift. A full reconciliation at startup, then periodically (see
+server.py), refreshes the fields that no query or change push touched. A failed
+fetch keeps the field's last contribution and marks it stale until the
+next successful update. Fields registered with expect() are listed as
+stale until their first update.
+"""
+
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+
+class StaleField(NamedTuple):
+    store_id: str
+    field: str
+    age: Optional[float]    # seconds since the last successful update, None if never
+    error: str
+
+
+class KpiAggregator:
+    """Running KPI totals built from per-(field, store) contributions."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._totals: dict[str, int] = {}
+        self._contributions: dict[tuple[str, str], dict[str, int]] = {}
+        self._alerts: dict[tuple[str, str], list] = {}
+        self._updated_at: dict[tuple[str, str], float] = {}
+        self._errors: dict[tuple[str, str], str] = {}
+        self._pending: set[tuple[str, str]] = set()     # expected, never updated
+        # Rebuilt under the lock by the writes that change them, read without it.
+        self._alert_view: tuple = ()
+        self._stale_view: tuple = ()    # (store_id, field, updated_at, error)
+
+    def expect(self, keys: Iterable[tuple[str, str]]) -> None:
+        """Registers (field, store) pairs to report stale until first updated."""
+        with self._lock:
+            self._pending = {key for key in keys if key not in self._updated_at}
+            self._refresh_stale()
+
+    def update(self, field: str, store_id: str, counters: dict[str, int],
+               alerts: Iterable = ()) -> None:
+        """Replaces the contribution of one store's field."""
+        key = (field, store_id)
+        with self._lock:
+            previous = self._contributions.get(key, {})
+            for name in previous.keys() | counters.keys():
+                delta = counters.get(name, 0) - previous.get(name, 0)
+                if delta:
+                    self._totals[name] = self._totals.get(name, 0) + delta
+            self._contributions[key] = dict(counters)
+            alerts = list(alerts)
+            if alerts:
+                self._alerts[key] = alerts
+                self._refresh_alerts()
+            elif self._alerts.pop(key, None) is not None:
+                self._refresh_alerts()
+            self._updated_at[key] = self._clock()
+            if self._errors.pop(key, None) is not None or key in self._pending:
+                self._pending.discard(key)
+                self._refresh_stale()
+
+    def failed(self, field: str, store_id: str, error: str) -> None:
+        """Keeps the field's last contribution, marked stale."""
+        with self._lock:
+            key = (field, store_id)
+            self._errors[key] = error
+            self._pending.discard(key)
+            self._refresh_stale()
+
+    def forget_store(self, store_id: str) -> None:
+        """Drops every contribution of a store that left the directory."""
+        with self._lock:
+            for key in [key for key in self._contributions if key[1] == store_id]:
+                for name, value in self._contributions.pop(key).items():
+                    self._totals[name] = self._totals.get(name, 0) - value
+                self._alerts.pop(key, None)
+                self._updated_at.pop(key, None)
+                self._errors.pop(key, None)
+            self._pending = {key for key in self._pending if key[1] != store_id}
+            self._refresh_alerts()
+            self._refresh_stale()
+
+    def _refresh_alerts(self) -> None:
+        self._alert_view = tuple(alert for alerts in self._alerts.values()
+                                 for alert in alerts)
+
+    def _refresh_stale(self) -> None:
+        self._stale_view = tuple(
+            [(store_id, field, self._updated_at.get((field, store_id)), error)
+             for (field, store_id), error in self._errors.items()]
+            + [(store_id, field, None, "not aggregated yet")
+               for field, store_id in sorted(self._pending)])
+
+    def stores(self) -> set[str]:
+        with self._lock:
+            return {store for _, store in self._contributions}
+
+    def totals(self) -> dict[str, int]:
+        """A consistent copy of every running total."""
+        with self._lock:
+            return dict(self._totals)
+
+    def alerts(self) -> tuple:
+        return self._alert_view
+
+    def stale(self) -> list[StaleField]:
+        """
+        Fields whose last fetch failed, plus the expected fields that were
+        never aggregated (age None).
+        """
+        now = self._clock()
+        return [StaleField(store_id, field,
+                           None if updated_at is None else round(now - updated_at, 1),
+                           error)
+                for store_id, field, updated_at, error in self._stale_view]
+
+
+class ChangeQueue:
+    """(field, store) pairs a backend reported as changed, waiting to be refetched."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: dict[tuple[str, str], None] = {}     # ordered set
+        self.closed = False
+
+    def push(self, field: str, store_id: str) -> None:
+        with self._cond:
+            self._pending[(field, store_id)] = None
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> list[tuple[str, str]]:
+        """Every pending pair, waiting up to `timeout` for one to arrive."""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(max(timeout, 0.0))
+            pending, self._pending = list(self._pending), {}
+        return pending
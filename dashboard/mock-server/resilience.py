@@ -0,0 +1,265 @@
+"""
+Circuit breakers, hedged requests and last-known-good fallbacks for the
+gateway's backend calls.
+
+Every backend (rest, soap, grpc) gets a BackendGuard:
+
+    closed     calls go through; `failure_threshold` failures in a row open it
+    open       calls fail at once with CircuitOpen for `reset_timeout` seconds
+    half-open  one probe call goes through; success closes the circuit,
+               failure opens it again (the other calls keep failing fast)
+
+Only the probe's own result decides the half-open state: calls admitted
+before the circuit opened may still finish late, and are ignored then.
+
+A query fanning out to a backend that is down therefore waits for at most
+`failure_threshold` real failures, not one per store per query.
+
+With hedging on, a call still running after the backend's recent p95
+latency is sent a second time, and whichever attempt succeeds first wins.
+That trims the slow tail of reads (all three backends are read-only here)
+without doubling the load: hedges are capped at `hedge_budget` of calls,
+and are only sent once `MIN_SAMPLES` latencies have been seen.
+
+State and hedges are exported as metrics next to the backend timings.
+
+LastKnownGood keeps the latest successful result per (field, store), so a
+failed or fast-failed call can still answer with data marked as stale.
+It is bounded in entries (least recently used go first) and in age.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, wait
+from typing import Callable, Hashable, NamedTuple, Optional
+
+from observability import REGISTRY
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half-open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "retailsync_circuit_state", "Backend circuit state (0 closed, 1 half-open, 2 open).",
+    ("service", "backend"))
+HEDGES = REGISTRY.counter(
+    "retailsync_backend_hedges_total", "Backend calls sent a second time.",
+    ("service", "backend"))
+
+MIN_SAMPLES = 20
+
+
+class CircuitOpen(Exception):
+    """The backend's circuit is open: the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.set(0, service="dashboard", backend=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> bool:
+        """
+        Raises CircuitOpen unless the call may go ahead. Returns True when
+        the call is the half-open probe; pass that on to record_*().
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpen(f"{self.name} circuit is open")
+                self._set(HALF_OPEN)
+            if self._probing:
+                raise CircuitOpen(f"{self.name} circuit is half-open, probe in flight")
+            self._probing = True
+            return True
+
+    def record_success(self, probe: bool = False) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+                self._failures = 0
+                self._set(CLOSED)
+                print(f"{self.name} circuit closed")
+            elif self._state == CLOSED:
+                self._failures = 0
+
+    def record_failure(self, probe: bool = False) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+                print(f"{self.name} circuit re-opened, probe failed")
+            elif self._state == CLOSED:
+                self._failures += 1
+                if self._failures < self.failure_threshold:
+                    return
+                print(f"{self.name} circuit opened after {self._failures} failure(s)")
+            else:
+                return              # admitted before the circuit opened
+            self._opened_at = self._clock()
+            self._set(OPEN)
+
+    def _set(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], service="dashboard", backend=self.name)
+
+
+class LatencyWindow:
+    """The last `size` call latencies, with a cached quantile."""
+
+    def __init__(self, size: int = 200, refresh_every: int = 20):
+        self._samples: deque = deque(maxlen=size)
+        self._refresh_every = refresh_every
+        self._since_refresh = 0
+        self._cached: dict[float, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_refresh += 1
+            if self._since_refresh >= self._refresh_every:
+                self._cached.clear()
+                self._since_refresh = 0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """None until MIN_SAMPLES latencies were observed."""
+        with self._lock:
+            if len(self._samples) < MIN_SAMPLES:
+                return None
+            value = self._cached.get(q)
+            if value is None:
+                ordered = sorted(self._samples)
+                value = self._cached[q] = ordered[min(len(ordered) - 1,
+                                                      int(q * len(ordered)))]
+            return value
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+        return _executor
+
+
+class BackendGuard:
+    """Circuit breaker plus optional hedging around one backend's calls."""
+
+    def __init__(self, name: str, hedge: bool = False, hedge_quantile: float = 0.95,
+                 hedge_budget: float = 0.10, **breaker_options):
+        self.name = name
+        self.breaker = CircuitBreaker(name, **breaker_options)
+        self.latency = LatencyWindow()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_budget = hedge_budget
+        self._calls = 0
+        self._hedges = 0
+        self._lock = threading.Lock()       # guards the hedge budget counters
+
+    def call(self, fn: Callable, *args):
+        """fn(*args) through the breaker; raises CircuitOpen when it is open."""
+        probe = self.breaker.before_call()
+        started = time.perf_counter()
+        try:
+            result = self._hedged(fn, args) if self.hedge else fn(*args)
+        except BaseException:
+            self.breaker.record_failure(probe)
+            raise
+        self.breaker.record_success(probe)
+        self.latency.observe(time.perf_counter() - started)
+        return result
+
+    def _hedged(self, fn: Callable, args: tuple):
+        with self._lock:
+            self._calls += 1
+        delay = self.latency.quantile(self.hedge_quantile)
+        if delay is None:
+            return fn(*args)
+        # Attempts run on pool threads; each gets a copy of the caller's
+        # context so its spans and outgoing trace headers stay in the trace.
+        first = _pool().submit(contextvars.copy_context().run, fn, *args)
+        try:
+            return first.result(timeout=delay)
+        except TimeoutError:
+            pass
+        with self._lock:
+            within_budget = self._hedges < self.hedge_budget * self._calls
+            if within_budget:
+                self._hedges += 1
+        if not within_budget:
+            return first.result()
+        HEDGES.inc(service="dashboard", backend=self.name)
+        second = _pool().submit(contextvars.copy_context().run, fn, *args)
+
+        pending, error = {first, second}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+
+
+class Snapshot(NamedTuple):
+    value: object
+    age: float          # seconds since it was fetched
+
+
+class LastKnownGood:
+    """Bounded LRU of the last successful result per key."""
+
+    def __init__(self, max_entries: int = 256, max_age: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Snapshot]:
+        """The last value stored under `key`, unless older than max_age."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, fetched_at = entry
+            age = self._clock() - fetched_at
+            if age > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return Snapshot(value, age)
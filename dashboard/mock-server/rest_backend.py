@@ -0,0 +1,28 @@
+"""
+REST adapter: store inventory from the Marketplace API (port 8002).
+
+Loaded on first use by server.py, so that importing the gateway does not
+pay for the httpx client stack.
+"""
+
+import httpx
+
+from observability.tracing import inject_traceparent
+
+REST_URL = "http://localhost:8002/inventory"
+
+# One pooled client shared by every resolver call, as in soap_backend; the
+# request hook adds the current trace context to each call.
+client = httpx.Client(
+    timeout=5.0,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    event_hooks={"request": [inject_traceparent]},
+)
+
+
+def fetch_inventory(store_id: str = None) -> list[dict]:
+    """Inventory items as returned by GET /inventory, optionally for one store."""
+    # The marketplace filters by store, so other stores' items stay there.
+    resp = client.get(REST_URL, params={"store_id": store_id} if store_id else None)
+    resp.raise_for_status()
+    return resp.json()
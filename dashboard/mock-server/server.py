@@ -2,36 +2,88 @@
 GraphQL Mock Server - Manager Dashboard (Aggregator Pattern)
 
 Implements the schema defined in contracts/schema.graphql using Strawberry.
-All resolvers return static data. In production, each resolver would fan
-out to a different backend service (REST, SOAP, gRPC).
+Each resolver fans out to a different backend service through an adapter
+module: rest_backend (marketplace), soap_backend (procurement) and
+grpc_backend (logistics). An adapter, and the client stack it imports, is
+only loaded when first needed. Once the server is up, a background thread
+preloads them all, so startup and each new worker skip that cost and the
+first query does not pay it either.
+
+Backend calls go through a circuit breaker per backend, which fails fast
+while the backend is down, and can be hedged past the backend's p95
+latency with DASHBOARD_HEDGING=1 (see resilience.py). When a call fails,
+the store's field is served from its last-known-good snapshot and listed
+in `Store.stale` with the snapshot's age, so an outage never looks like
+an empty store.
+
+dashboardSummary reads running totals (kpi.py) instead of rebuilding every
+store. They are updated from each backend result the gateway receives and
+pushed by the backends themselves:
+  - robots follow the logistics fleet feed (grpc_backend.watch_fleet);
+  - the marketplace (PATCH /inventory) and procurement (SubmitOrder) post
+    the store fields they changed to POST /hooks/changes, and only those
+    fields are refetched.
+A background thread also refetches every store at startup, then each
+DASHBOARD_RECONCILE_SECONDS (default 15), for anything a push missed.
+Until a store's field has been aggregated once, the summary lists it in
+`stale`.
 
 Run:      python dashboard/mock-server/server.py
 GraphiQL: http://localhost:8003/graphql
+Metrics:  http://localhost:8003/metrics (includes per-backend fan-out timings)
+Tracing:  send `X-Debug-Trace: 1` to get per-resolver and per-backend spans
+          in the response `extensions` (see tracing.py)
 """
 
 import strawberry
 from strawberry.fastapi import GraphQLRouter
 from fastapi import FastAPI
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from enum import Enum
 from typing import Optional
-import uvicorn
-import httpx
-import zeep
-import grpc
+import importlib
+import threading
+import time
 import sys
 import os
 
-# Add logistics to path to import generated protobufs
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../logistics/mock-server')))
-import warehouse_pb2
-import warehouse_pb2_grpc
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add the project root to path for the shared packages (procurement client,
+# logistics stubs, observability)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from observability import MetricsASGIMiddleware
+from kpi import ChangeQueue, KpiAggregator
+from resilience import BackendGuard, CircuitOpen, LastKnownGood
+from tracing import TracingExtension, backend_span
 
 # ---------------------------------------------------------------------------
-# Backend Service URLs
+# Backend adapters (imported on first use)
 # ---------------------------------------------------------------------------
-REST_URL = "http://localhost:8002/inventory"
-SOAP_WSDL = "http://localhost:8001/?wsdl"
-GRPC_TARGET = "localhost:50051"
+
+BACKENDS = {"rest": "rest_backend", "soap": "soap_backend", "grpc": "grpc_backend"}
+
+HEDGING = os.environ.get("DASHBOARD_HEDGING", "0") == "1"
+GUARDS = {protocol: BackendGuard(protocol, hedge=HEDGING) for protocol in BACKENDS}
+LAST_KNOWN_GOOD = LastKnownGood()
+KPIS = KpiAggregator()
+CHANGES = ChangeQueue()
+RECONCILE_SECONDS = float(os.environ.get("DASHBOARD_RECONCILE_SECONDS", "15"))
+LOW_STOCK_THRESHOLD = 10
+KPI_FIELDS = ("inventory", "orders", "robots")
+
+
+def backend(protocol: str):
+    """The adapter module for `protocol`, imported the first time it is asked for."""
+    return importlib.import_module(BACKENDS[protocol])
+
+
+def preload_backends() -> None:
+    for protocol in BACKENDS:
+        try:
+            backend(protocol)
+        except Exception as e:      # the first fetch reports it again
+            print(f"{protocol} backend preload error: {e}")
 
 
 # ---------------------------------------------------------------------------
@@ -93,6 +145,15 @@ class RobotTelemetry:
     status: RobotStatus
 
 
+@strawberry.type
+class StaleData:
+    """A Store field whose backend call failed."""
+    store_id: strawberry.ID
+    field: str
+    age_seconds: Optional[float]    # of the snapshot served; None: no snapshot, field empty
+    error: str
+
+
 @strawberry.type
 class Store:
     """Aggregated store entity nesting data from three backend systems."""
@@ -103,6 +164,7 @@ class Store:
     inventory: list[InventoryItem]
     orders: list[Order]
     robots: list[RobotTelemetry]
+    stale: list[StaleData]
 
 
 @strawberry.type
@@ -113,6 +175,7 @@ class DashboardSummary:
     total_orders_pending: int
     total_robots_active: int
     low_stock_alerts: list[InventoryItem]
+    stale: list[StaleData]
 
 
 # ---------------------------------------------------------------------------
@@ -124,116 +187,168 @@ class DashboardSummary:
 # ---------------------------------------------------------------------------
 
 def fetch_rest_inventory(store_id: str = None) -> list[InventoryItem]:
-    try:
-        with httpx.Client() as client:
-            resp = client.get(REST_URL)
-            if resp.status_code == 200:
-                data = resp.json()
-                items = [
-                    InventoryItem(
-                        sku=item["sku"],
-                        name=item["name"],
-                        category=item["category"],
-                        quantity=item["quantity"],
-                        price_cents=item["price_cents"]
-                    ) for item in data if (not store_id or item.get("store_id") == store_id)
-                ]
-                return items
-    except Exception as e:
-        print(f"REST fetch error: {e}")
-    return []
+    rest = backend("rest")
+    with backend_span("rest", "GET /inventory", store=store_id):
+        data = GUARDS["rest"].call(rest.fetch_inventory, store_id)
+    return [
+        InventoryItem(
+            sku=item["sku"],
+            name=item["name"],
+            category=item["category"],
+            quantity=item["quantity"],
+            price_cents=item["price_cents"]
+        ) for item in data
+    ]
 
 
 def fetch_soap_orders(store_id: str) -> list[Order]:
-    try:
-        client = zeep.Client(wsdl=SOAP_WSDL)
-        resp = client.service.GetRecentOrders(request={'storeId': store_id})
-        if resp:
-            orders_data = getattr(resp, "PurchaseOrder", getattr(resp, "orders", []))
-            if orders_data:
-                if not getattr(orders_data, "__iter__", False) or isinstance(orders_data, dict):
-                    orders_data = [orders_data]
-                
-                orders = []
-                for o in orders_data:
-                    # Robust parsing for Spyne's nested items
-                    item_count = 0
-                    items_obj = getattr(o, "items", None)
-                    if items_obj:
-                        order_items = getattr(items_obj, "OrderItem", items_obj)
-                        if order_items:
-                            if getattr(order_items, "__iter__", False) and not isinstance(order_items, str):
-                                item_count = len(list(order_items))
-                            else:
-                                item_count = 1
-
-                    orders.append(Order(
-                        id=getattr(o, "order_id", "UNKNOWN"),
-                        supplier_id=getattr(o, "supplier_org_id", "UNKNOWN"),
-                        status=OrderStatus.PENDING,
-                        total_price_cents=item_count * 1000, 
-                        item_count=item_count,
-                        order_date=str(getattr(o, "order_date", "UNKNOWN")),
-                        estimated_delivery=None
-                    ))
-                return orders
-    except Exception as e:
-        print(f"SOAP fetch error: {e}")
-    return []
+    soap = backend("soap")
+    with backend_span("soap", "GetRecentOrders", store=store_id):
+        orders = GUARDS["soap"].call(soap.fetch_orders, store_id)
+    return [
+        Order(
+            id=o.order_id,
+            supplier_id=o.supplier_org_id,
+            status=OrderStatus.__members__.get(o.status, OrderStatus.PENDING),
+            total_price_cents=o.total_price_cents or 0,
+            item_count=o.item_count or 0,
+            order_date=str(o.order_date),
+            estimated_delivery=None
+        ) for o in orders
+    ]
+
+
+def store_robot_id(store_id: str) -> str:
+    # In a real scenario, you might filter robots by store_id
+    # For the demo, each store has a single robot whose ID derives from the store_id
+    return f"ROBOT-{store_id[-2:]}"
+
+
+def to_robot(robot: dict) -> RobotTelemetry:
+    return RobotTelemetry(**{**robot, "status": RobotStatus[robot["status"]]})
 
 
 def fetch_grpc_robots(store_id: str) -> list[RobotTelemetry]:
+    grpc_adapter = backend("grpc")
+    with backend_span("grpc", "GetRobotStatus", store=store_id):
+        robot = GUARDS["grpc"].call(grpc_adapter.fetch_robot, store_robot_id(store_id))
+    return [to_robot(robot)]
+
+
+FETCHERS = {
+    "inventory": fetch_rest_inventory,
+    "orders": fetch_soap_orders,
+    "robots": fetch_grpc_robots,
+}
+
+
+def record_kpis(field: str, store_id: str, value: list) -> None:
+    """Replaces this store field's contribution to the dashboard KPIs."""
+    if field == "inventory":
+        KPIS.update(field, store_id, {"total_skus": len(value)},
+                    alerts=[item for item in value if item.quantity < LOW_STOCK_THRESHOLD])
+    elif field == "orders":
+        KPIS.update(field, store_id, {"total_orders_pending": sum(
+            1 for o in value if o.status == OrderStatus.PENDING)})
+    elif field == "robots":
+        KPIS.update(field, store_id, {"total_robots_active": sum(
+            1 for r in value if r.status != RobotStatus.IDLE)})
+
+
+def fetch_or_fallback(field: str, fetch, store_id: str, stale: list[StaleData]) -> list:
+    """
+    fetch(store_id), remembered as the field's last-known-good value and
+    fed to the KPI aggregator. On failure, the snapshot (or []) is returned
+    and an entry added to `stale`.
+    """
+    key = (field, store_id)
     try:
-        # In a real scenario, you might filter robots by store_id
-        # For the demo, we just fetch a single status for a robot ID derived from the store_id
-        robot_id = f"ROBOT-{store_id[-2:]}"
-        with grpc.insecure_channel(GRPC_TARGET) as channel:
-            stub = warehouse_pb2_grpc.WarehouseAutomationStub(channel)
-            req = warehouse_pb2.RobotRequest(robot_id=robot_id)
-            resp = stub.GetRobotStatus(req)
-            
-            # Map enum to our GraphQL enum
-            status_map = {
-                warehouse_pb2.ROBOT_STATUS_IDLE: RobotStatus.IDLE,
-                warehouse_pb2.ROBOT_STATUS_MOVING: RobotStatus.MOVING,
-                warehouse_pb2.ROBOT_STATUS_PICKING: RobotStatus.PICKING,
-                warehouse_pb2.ROBOT_STATUS_CHARGING: RobotStatus.CHARGING,
-                warehouse_pb2.ROBOT_STATUS_ERROR: RobotStatus.ERROR,
-            }
-            
-            return [
-                RobotTelemetry(
-                    robot_id=resp.robot_id,
-                    x=resp.position.x,
-                    y=resp.position.y,
-                    z=resp.position.z,
-                    battery_level=resp.battery_level,
-                    status=status_map.get(resp.status, RobotStatus.IDLE)
-                )
-            ]
+        value = fetch(store_id)
     except Exception as e:
-        print(f"gRPC fetch error: {e}")
-    return []
+        if not isinstance(e, CircuitOpen):      # already reported when it opened
+            print(f"{field} fetch error ({store_id}): {e}")
+        error = str(e) or type(e).__name__
+        KPIS.failed(field, store_id, error)
+        snapshot = LAST_KNOWN_GOOD.get(key)
+        stale.append(StaleData(
+            store_id=strawberry.ID(store_id), field=field,
+            age_seconds=round(snapshot.age, 1) if snapshot else None,
+            error=error))
+        return snapshot.value if snapshot else []
+    LAST_KNOWN_GOOD.put(key, value)
+    record_kpis(field, store_id, value)
+    return value
 
 
 STORE_DIRECTORY = [
     {"id": "STORE-PARIS-01", "name": "RetailSync Paris - Le Marais", "city": "Paris", "country": "France"},
     {"id": "STORE-BERLIN-02", "name": "RetailSync Berlin - Mitte", "city": "Berlin", "country": "Germany"},
 ]
+STORE_IDS = frozenset(s["id"] for s in STORE_DIRECTORY)
+ROBOT_STORES = {store_robot_id(s["id"]): s["id"] for s in STORE_DIRECTORY}
+KPIS.expect((field, store["id"]) for store in STORE_DIRECTORY for field in KPI_FIELDS)
 
 def build_store(store_data: dict) -> Store:
     store_id = store_data["id"]
+    stale = []
     return Store(
         id=strawberry.ID(store_id),
         name=store_data["name"],
         city=store_data["city"],
         country=store_data["country"],
-        inventory=fetch_rest_inventory(store_id),
-        orders=fetch_soap_orders(store_id),
-        robots=fetch_grpc_robots(store_id)
+        inventory=fetch_or_fallback("inventory", FETCHERS["inventory"], store_id, stale),
+        orders=fetch_or_fallback("orders", FETCHERS["orders"], store_id, stale),
+        robots=fetch_or_fallback("robots", FETCHERS["robots"], store_id, stale),
+        stale=stale,
     )
 
 
+def reconcile_kpis() -> None:
+    """Refetches every store, so that fields no query asked for stay current."""
+    directory = {s["id"] for s in STORE_DIRECTORY}
+    for store_data in STORE_DIRECTORY:
+        build_store(store_data)
+    for store_id in KPIS.stores() - directory:
+        KPIS.forget_store(store_id)
+
+
+def refresh_field(field: str, store_id: str) -> None:
+    """Refetches one store field a backend reported as changed."""
+    fetch_or_fallback(field, FETCHERS[field], store_id, [])
+
+
+def on_fleet_update(robot: dict) -> None:
+    """A robot update from the fleet feed, applied like a fetched one."""
+    store_id = ROBOT_STORES[robot["robot_id"]]
+    value = [to_robot(robot)]
+    LAST_KNOWN_GOOD.put(("robots", store_id), value)
+    record_kpis("robots", store_id, value)
+
+
+def _reconcile_loop(stop: threading.Event) -> None:
+    """Applies pushed changes as they arrive, with a full reconciliation each period."""
+    next_full = time.monotonic()
+    while not stop.is_set():
+        if time.monotonic() >= next_full:
+            try:
+                reconcile_kpis()
+            except Exception as e:
+                print(f"KPI reconciliation error: {e}")
+            next_full = time.monotonic() + RECONCILE_SECONDS
+        for field, store_id in CHANGES.wait(next_full - time.monotonic()):
+            try:
+                refresh_field(field, store_id)
+            except Exception as e:
+                print(f"KPI refresh error ({field}, {store_id}): {e}")
+
+
+def _watch_fleet(stop: threading.Event) -> None:
+    try:
+        backend("grpc").watch_fleet(ROBOT_STORES.keys(), on_fleet_update, stop)
+    except Exception as e:
+        print(f"fleet feed stopped: {e}")
+
+
 # ---------------------------------------------------------------------------
 # Root query
 # ---------------------------------------------------------------------------
@@ -256,24 +371,17 @@ class Query:
 
     @strawberry.field
     def dashboard_summary(self) -> DashboardSummary:
-        """Aggregated KPIs across all stores."""
-        all_stores = [build_store(s) for s in STORE_DIRECTORY]
-        all_inventory = [item for store in all_stores for item in store.inventory]
-        all_orders = [order for store in all_stores for order in store.orders]
-        all_robots = [robot for store in all_stores for robot in store.robots]
-
-        low_stock = [item for item in all_inventory if item.quantity < 10]
-
+        """Aggregated KPIs across all stores, read from the running totals."""
+        totals = KPIS.totals()
         return DashboardSummary(
-            total_stores=len(all_stores),
-            total_skus=len(all_inventory),
-            total_orders_pending=sum(
-                1 for o in all_orders if o.status == OrderStatus.PENDING
-            ),
-            total_robots_active=sum(
-                1 for r in all_robots if r.status != RobotStatus.IDLE
-            ),
-            low_stock_alerts=low_stock,
+            total_stores=len(STORE_DIRECTORY),
+            total_skus=totals.get("total_skus", 0),
+            total_orders_pending=totals.get("total_orders_pending", 0),
+            total_robots_active=totals.get("total_robots_active", 0),
+            low_stock_alerts=KPIS.alerts(),
+            stale=[StaleData(store_id=strawberry.ID(entry.store_id), field=entry.field,
+                             age_seconds=entry.age, error=entry.error)
+                   for entry in KPIS.stale()],
         )
 
 
@@ -281,24 +389,68 @@ class Query:
 # Application wiring
 # ---------------------------------------------------------------------------
 
-schema = strawberry.Schema(query=Query)
+schema = strawberry.Schema(query=Query, extensions=[TracingExtension])
 graphql_app = GraphQLRouter(schema)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Accept requests right away; the backend client stacks load meanwhile.
+    threading.Thread(target=preload_backends, name="backend-preload", daemon=True).start()
+    stop = threading.Event()
+    threading.Thread(target=_reconcile_loop, args=(stop,), name="kpi-reconcile",
+                     daemon=True).start()
+    threading.Thread(target=_watch_fleet, args=(stop,), name="fleet-feed",
+                     daemon=True).start()
+    yield
+    stop.set()
+    CHANGES.close()
+
+
 app = FastAPI(
     title="RetailSync - Manager Dashboard (GraphQL)",
     description="GraphQL aggregator gateway for store managers.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 app.include_router(graphql_app, prefix="/graphql")
 
+
+class ChangeNotice(BaseModel):
+    field: str
+    store_id: str
+
+
+class ChangeHookBody(BaseModel):
+    changes: list[ChangeNotice]
+
+
+@app.post("/hooks/changes", status_code=202)
+def change_hook(body: ChangeHookBody):
+    """
+    Change hook for the backends (see observability/change_hooks.py): the
+    listed store fields are refetched in the background. Fields the
+    gateway does not aggregate, and unknown stores, are ignored.
+    """
+    accepted = 0
+    for change in body.changes:
+        if change.field in FETCHERS and change.store_id in STORE_IDS:
+            CHANGES.push(change.field, change.store_id)
+            accepted += 1
+    return {"accepted": accepted}
+app.add_middleware(MetricsASGIMiddleware, service="dashboard", router=app.router)
+
 if __name__ == "__main__":
     print("=" * 60)
     print("  RetailSync - GraphQL Dashboard")
     print("=" * 60)
     print("  GraphQL endpoint : http://localhost:8003/graphql")
     print("  GraphiQL IDE     : http://localhost:8003/graphql")
+    print("  Metrics          : http://localhost:8003/metrics")
+    print("  Change hook      : http://localhost:8003/hooks/changes")
     print("  Protocol         : GraphQL over HTTP")
     print("=" * 60)
     print()
 
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8003)
@@ -0,0 +1,31 @@
+"""
+SOAP adapter: recent orders from the Procurement Service (port 8001).
+
+Loaded on first use by server.py, so that importing the gateway does not
+pay for the procurement client (httpx, lxml).
+"""
+
+import httpx
+
+from observability.tracing import inject_traceparent
+from procurement.client import ProcurementClient
+
+SOAP_URL = "http://localhost:8001/"
+PAGE_SIZE = 500                 # the procurement service's largest page
+
+# One pooled client shared by every resolver call; the request hook adds
+# the current trace context to each SOAP call.
+procurement_client = ProcurementClient(SOAP_URL, http_client=httpx.Client(
+    timeout=5.0,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    event_hooks={"request": [inject_traceparent]},
+))
+
+
+def fetch_orders(store_id: str) -> list:
+    """All the store's recent orders (procurement OrderSummary-style objects)."""
+    # Summary mode: totals and counts are precomputed by the procurement
+    # service, so line items never need to cross the wire. Every page is
+    # read: the pending-order KPI counts them all.
+    return list(procurement_client.iter_recent_orders(
+        store_id, page_size=PAGE_SIZE, summary_only=True))
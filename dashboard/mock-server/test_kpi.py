@@ -0,0 +1,73 @@
+"""
+Running KPI totals, alert and stale lists, and the change queue.
+
+    python -m pytest dashboard/mock-server
+"""
+
+import threading
+
+from kpi import ChangeQueue, KpiAggregator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_updates_replace_contributions():
+    kpis = KpiAggregator()
+    kpis.update("inventory", "S1", {"total_skus": 3}, alerts=["a"])
+    kpis.update("inventory", "S2", {"total_skus": 2}, alerts=["b", "c"])
+    kpis.update("inventory", "S1", {"total_skus": 1})
+
+    assert kpis.totals() == {"total_skus": 3}
+    assert list(kpis.alerts()) == ["b", "c"]
+
+    kpis.forget_store("S2")
+    assert kpis.totals() == {"total_skus": 1}
+    assert list(kpis.alerts()) == []
+
+
+def test_stale_lists_expected_and_failed_fields():
+    clock = FakeClock()
+    kpis = KpiAggregator(clock)
+    kpis.expect([("inventory", "S1"), ("orders", "S1")])
+    assert {(e.field, e.age, e.error) for e in kpis.stale()} == {
+        ("inventory", None, "not aggregated yet"),
+        ("orders", None, "not aggregated yet"),
+    }
+
+    kpis.update("inventory", "S1", {"total_skus": 1})
+    kpis.failed("orders", "S1", "down")
+    assert [(e.field, e.age, e.error) for e in kpis.stale()] == [("orders", None, "down")]
+
+    kpis.update("orders", "S1", {"total_orders_pending": 2})
+    clock.now += 30
+    kpis.failed("orders", "S1", "down again")
+    assert [(e.field, e.age) for e in kpis.stale()] == [("orders", 30.0)]
+    assert kpis.totals()["total_orders_pending"] == 2   # last contribution kept
+
+    kpis.forget_store("S1")
+    assert kpis.stale() == []
+
+
+def test_change_queue_coalesces_pushes():
+    changes = ChangeQueue()
+    changes.push("inventory", "S1")
+    changes.push("orders", "S1")
+    changes.push("inventory", "S1")
+    assert changes.wait(0) == [("inventory", "S1"), ("orders", "S1")]
+    assert changes.wait(0) == []
+
+
+def test_change_queue_wakes_on_push_and_close():
+    changes = ChangeQueue()
+    threading.Timer(0.05, changes.push, ("robots", "S1")).start()
+    assert changes.wait(5.0) == [("robots", "S1")]
+
+    threading.Timer(0.05, changes.close).start()
+    assert changes.wait(5.0) == []
+    assert changes.closed
@@ -0,0 +1,82 @@
+"""
+Per-request tracing for the GraphQL gateway.
+
+TracingExtension opens a trace for every operation (continuing the caller's
+`traceparent` when one is sent), records a span for every field with its
+own resolver, and backend_span() adds one span per REST / SOAP / gRPC call
+made while resolving. Outgoing calls carry the trace context.
+
+Send `X-Debug-Trace: 1` to get the timing breakdown back in the response:
+
+    { "data": ..., "extensions": { "tracing": { "traceId": ..., "durationMs": ...,
+        "spans": [ { "name": "soap GetRecentOrders", "parentId": ..., "startMs": ...,
+                     "durationMs": ..., "attributes": {...}, "error": null }, ... ] } } }
+"""
+
+import contextlib
+import inspect
+import time
+
+from strawberry.extensions import SchemaExtension
+
+from observability import backend_call
+from observability.tracing import TRACEPARENT, Trace, span
+
+
+DEBUG_HEADER = "x-debug-trace"
+
+
+@contextlib.contextmanager
+def backend_span(backend: str, operation: str, **attributes):
+    """Times one backend call as both a metric and a trace span."""
+    with backend_call("dashboard", backend), \
+            span(f"{backend} {operation}", backend=backend, **attributes) as s:
+        yield s
+
+
+class TracingExtension(SchemaExtension):
+    """Strawberry extension recording resolver and backend spans."""
+
+    def on_operation(self):
+        request = self._request()
+        headers = request.headers if request is not None else {}
+        self.trace = Trace.from_traceparent(headers.get(TRACEPARENT))
+        self.debug = headers.get(DEBUG_HEADER, "").lower() in ("1", "true")
+
+        name = self.execution_context.operation_name or "anonymous"
+        with self.trace.activate(f"graphql {name}"):
+            yield
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        field = info.parent_type.fields[info.field_name]
+        definition = field.extensions.get("strawberry-definition")
+        if getattr(definition, "base_resolver", None) is None:
+            return _next(root, info, *args, **kwargs)     # plain attribute
+
+        name = f"resolve {info.parent_type.name}.{info.field_name}"
+        path = ".".join(str(p) for p in info.path.as_list())
+        with span(name, path=path) as s:
+            result = _next(root, info, *args, **kwargs)
+        if inspect.isawaitable(result) and s is not None:
+            return self._finish_async(result, s)
+        return result
+
+    @staticmethod
+    async def _finish_async(result, s):
+        # Async resolvers finish after the span block closed; extend it to
+        # cover the await (children are not attached to it).
+        try:
+            return await result
+        finally:
+            s.end = time.perf_counter()
+
+    def get_results(self):
+        if getattr(self, "debug", False):
+            return {"tracing": self.trace.breakdown()}
+        return {}
+
+    def _request(self):
+        context = self.execution_context.context
+        if isinstance(context, dict):
+            return context.get("request")
+        return getattr(context, "request", None)
@@ -16,9 +16,13 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
+import json
 import os
+import sys
 
 OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_RESULTS = os.path.join(os.path.dirname(OUTPUT_DIR),
+                                 "benchmarks", "results", "latest.json")
 
 # ── Shared constants ────────────────────────────────────────────────────────
 
@@ -643,7 +647,24 @@ def generate_aggregator_pattern():
 # DIAGRAM 8: Payload Size Comparison
 # ═══════════════════════════════════════════════════════════════════════════
 
+def load_payload_sizes():
+    """
+    Order object sizes in bytes per protocol: from the last benchmark run
+    (benchmarks/run_benchmarks.py) if there is one, otherwise measured on
+    the spot with benchmarks/payloads.py.
+    """
+    if os.path.exists(BENCHMARK_RESULTS):
+        with open(BENCHMARK_RESULTS) as f:
+            return json.load(f)["payload"]["order"]
+    sys.path.insert(0, os.path.join(os.path.dirname(OUTPUT_DIR), "benchmarks"))
+    from payloads import measure_order_payloads
+    return measure_order_payloads()
+
+
 def generate_payload_comparison():
+    sizes = load_payload_sizes()
+    soap_b, rest_b, grpc_b = sizes["soap"], sizes["rest"], sizes["grpc"]
+
     fig, ax = plt.subplots(figsize=(15, 9))
     ax.set_xlim(-0.5, 15)
     ax.set_ylim(-0.5, 9)
@@ -703,7 +724,7 @@ def generate_payload_comparison():
 
     # Size label
     draw_box(ax, col1_x, 2.5, 1.8, 0.6,
-             "~1,000 B", COLORS["soap"]["bg"], fontsize=12)
+             f"{soap_b:,} B", COLORS["soap"]["bg"], fontsize=12)
     ax.text(col1_x, 2.0, "100%", ha="center", fontsize=9, color="#666")
 
     # ═══ Column 2: REST JSON ═══
@@ -732,8 +753,8 @@ def generate_payload_comparison():
             fontsize=CODE_SIZE, fontfamily="monospace", color="#1B5E20", linespacing=1.2)
 
     draw_box(ax, col2_x, 2.5, 1.8, 0.6,
-             "~200 B", COLORS["rest"]["bg"], fontsize=12)
-    ax.text(col2_x, 2.0, "20%", ha="center", fontsize=9, color="#666")
+             f"{rest_b:,} B", COLORS["rest"]["bg"], fontsize=12)
+    ax.text(col2_x, 2.0, f"{rest_b / soap_b:.0%}", ha="center", fontsize=9, color="#666")
 
     # ═══ Column 3: gRPC Protobuf ═══
     col3_x = 12.2
@@ -759,18 +780,18 @@ def generate_payload_comparison():
             fontsize=CODE_SIZE, fontfamily="monospace", color="#BF360C", linespacing=1.2)
 
     draw_box(ax, col3_x, 2.5, 1.8, 0.6,
-             "~50 B", COLORS["grpc"]["bg"], fontsize=12)
-    ax.text(col3_x, 2.0, "5%", ha="center", fontsize=9, color="#666")
+             f"{grpc_b:,} B", COLORS["grpc"]["bg"], fontsize=12)
+    ax.text(col3_x, 2.0, f"{grpc_b / soap_b:.0%}", ha="center", fontsize=9, color="#666")
 
     # ── Reduction arrows ──
     ax.annotate("", xy=(col2_x - 0.9, 2.5), xytext=(col1_x + 0.9, 2.5),
                 arrowprops=dict(arrowstyle="-|>", color="#333", lw=1.5))
-    ax.text((col1_x + col2_x) / 2, 2.85, "5x smaller", ha="center",
+    ax.text((col1_x + col2_x) / 2, 2.85, f"{soap_b / rest_b:.1f}x smaller", ha="center",
             fontsize=8, fontweight="bold", color="#333")
 
     ax.annotate("", xy=(col3_x - 0.9, 2.5), xytext=(col2_x + 0.9, 2.5),
                 arrowprops=dict(arrowstyle="-|>", color="#333", lw=1.5))
-    ax.text((col2_x + col3_x) / 2, 2.85, "4x smaller", ha="center",
+    ax.text((col2_x + col3_x) / 2, 2.85, f"{rest_b / grpc_b:.1f}x smaller", ha="center",
             fontsize=8, fontweight="bold", color="#333")
 
     # ── Tradeoff bar ──
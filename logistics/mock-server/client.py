@@ -7,17 +7,25 @@ streaming RPC (StreamTelemetry) against the warehouse mock server.
 Usage:
     python logistics/mock-server/server.py   (in one terminal)
     python logistics/mock-server/client.py   (in another terminal)
+
+    python logistics/mock-server/client.py --batched
+        Uses StreamTelemetryBatches and decodes the TelemetryBatch frames.
+
+    python logistics/mock-server/client.py --load [load_test.py flags]
+        Runs the grpc.aio load generator instead of the demo (see load_test.py).
 """
 
+import argparse
 import grpc
 import time
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-import warehouse_pb2
-import warehouse_pb2_grpc
+from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+from telemetry_codec import TelemetryBatchDecoder
 
 
 def generate_commands():
@@ -51,7 +59,14 @@ def generate_commands():
         time.sleep(0.5)
 
 
-def run():
+def receive_batches(stub, commands):
+    """Yields decoded RobotTelemetry from the batched telemetry stream."""
+    decoder = TelemetryBatchDecoder()
+    for batch in stub.StreamTelemetryBatches(commands):
+        yield from decoder.decode(batch)
+
+
+def run(batched: bool = False):
     print("=" * 60)
     print("  RetailSync - gRPC Warehouse Client")
     print("=" * 60)
@@ -81,12 +96,16 @@ def run():
     print()
 
     # -- Bi-directional Streaming: StreamTelemetry --
-    print("  -- Bi-directional Streaming: StreamTelemetry --")
+    rpc_name = "StreamTelemetryBatches" if batched else "StreamTelemetry"
+    print(f"  -- Bi-directional Streaming: {rpc_name} --")
     print("  Stream of commands, stream of telemetry")
     print()
 
     try:
-        responses = stub.StreamTelemetry(generate_commands())
+        if batched:
+            responses = receive_batches(stub, generate_commands())
+        else:
+            responses = stub.StreamTelemetry(generate_commands())
 
         print()
         print("  -- Receiving telemetry stream --")
@@ -114,4 +133,15 @@ def run():
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="RetailSync gRPC demo client")
+    parser.add_argument("--batched", action="store_true",
+                        help="receive delta-encoded TelemetryBatch frames")
+    parser.add_argument("--load", action="store_true",
+                        help="run the load generator; other flags go to load_test.py")
+    args, rest = parser.parse_known_args()
+    if args.load:
+        import load_test
+        load_test.main(rest + (["--batched"] if args.batched else []))
+    else:
+        parser.parse_args()
+        run(batched=args.batched)
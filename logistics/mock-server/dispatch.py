@@ -0,0 +1,180 @@
+"""
+Command dispatch engine for a controller stream.
+
+Every robot gets its own FIFO of pending commands. A single scheduler
+thread keeps a timer heap of robots with a step due and advances each one
+independently, so a MOVE for robot A never delays a PICK for robot B, and
+command-to-first-telemetry latency does not grow with the number of robots
+sharing the stream.
+
+Queueing rules:
+  - COMMAND_HALT preempts: the robot's running command stops, its queue is
+    cleared, and a single IDLE telemetry is emitted right away.
+  - A MOVE queued directly behind another pending MOVE supersedes it; only
+    the newest target is executed.
+
+DispatchStats counts what happened to a stream's commands; the server
+returns them as trailing metadata and adds them to its metrics.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from logistics.stubs import warehouse_pb2
+
+
+@dataclass
+class DispatchStats:
+    received: int = 0
+    completed: int = 0
+    coalesced: int = 0
+    preempted: int = 0
+
+    def as_metadata(self) -> tuple[tuple[str, str], ...]:
+        return (
+            ("x-commands-received", str(self.received)),
+            ("x-commands-completed", str(self.completed)),
+            ("x-commands-coalesced", str(self.coalesced)),
+            ("x-commands-preempted", str(self.preempted)),
+        )
+
+
+@dataclass
+class _Robot:
+    robot_id: str
+    pending: deque = field(default_factory=deque)
+    current: Optional[Iterator] = None
+    generation: int = 0          # bumped on HALT to invalidate timer entries
+    scheduled: bool = False
+    last: Optional[object] = None
+
+
+class CommandDispatcher:
+    """Runs WarehouseCommands with per-robot queues on one timer thread."""
+
+    def __init__(self, simulate: Callable, emit: Callable[[object], bool],
+                 step_interval: float):
+        self._simulate = simulate
+        self._emit = emit
+        self._step_interval = step_interval
+        self._robots: dict[str, _Robot] = {}
+        self._timers: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._stopped = False
+        self.stats = DispatchStats()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # -- Producer side -----------------------------------------------------
+
+    def submit(self, command) -> None:
+        with self._cond:
+            self.stats.received += 1
+            robot = self._robots.get(command.robot_id)
+            if robot is None:
+                robot = self._robots[command.robot_id] = _Robot(command.robot_id)
+
+            if command.command == warehouse_pb2.COMMAND_HALT:
+                if robot.current is not None:
+                    self.stats.preempted += 1
+                self.stats.preempted += len(robot.pending)
+                robot.pending.clear()
+                robot.current = None
+                robot.generation += 1
+                robot.scheduled = False
+                robot.pending.append(command)
+            elif (command.command == warehouse_pb2.COMMAND_MOVE and robot.pending
+                  and robot.pending[-1].command == warehouse_pb2.COMMAND_MOVE):
+                robot.pending[-1] = command
+                self.stats.coalesced += 1
+            else:
+                robot.pending.append(command)
+
+            if not robot.scheduled:
+                self._schedule(robot, time.monotonic())
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Waits until every queued command has finished, then stops."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stop(self) -> None:
+        """Stops immediately, discarding queued and running commands."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    # -- Scheduler ---------------------------------------------------------
+
+    def _schedule(self, robot: _Robot, due: float) -> None:
+        robot.scheduled = True
+        heapq.heappush(self._timers, (due, next(self._seq), robot.generation, robot))
+        self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._timers:
+                        wait = self._timers[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    elif self._closing:
+                        return
+                    else:
+                        self._cond.wait()
+                if self._stopped:
+                    return
+
+                due, _, generation, robot = heapq.heappop(self._timers)
+                if generation != robot.generation:
+                    continue        # superseded by a HALT
+                telemetry = self._next_step(robot)
+                if telemetry is None:
+                    robot.scheduled = False
+                    continue
+                robot.last = telemetry
+                self._schedule(robot, max(due + self._step_interval, time.monotonic()))
+
+            if not self._emit(telemetry):
+                self.stop()
+
+    def _next_step(self, robot: _Robot):
+        """Returns the robot's next telemetry event, or None when idle."""
+        while True:
+            if robot.current is not None:
+                telemetry = next(robot.current, None)
+                if telemetry is not None:
+                    return telemetry
+                robot.current = None
+                self.stats.completed += 1
+            if not robot.pending:
+                return None
+
+            command = robot.pending.popleft()
+            if command.command == warehouse_pb2.COMMAND_HALT:
+                self.stats.completed += 1
+                return self._halted(robot, command)
+            robot.current = iter(self._simulate(command))
+
+    @staticmethod
+    def _halted(robot: _Robot, command):
+        last = robot.last
+        return warehouse_pb2.RobotTelemetry(
+            robot_id=command.robot_id,
+            position=last.position if last else warehouse_pb2.Coordinates(),
+            battery_level=last.battery_level if last else 0.0,
+            status=warehouse_pb2.ROBOT_STATUS_IDLE,
+            speed_mps=0.0,
+            timestamp_ms=int(time.time() * 1000),
+        )
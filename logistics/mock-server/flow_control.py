@@ -0,0 +1,172 @@
+"""
+Per-stream flow control for the telemetry RPCs.
+
+The simulation pushes telemetry into a TelemetryOutbox; the gRPC response
+generator drains it as fast as the consumer reads. When a consumer falls
+behind, the stream's OverflowPolicy decides what happens:
+
+    block        producer waits for room (lossless, the simulation stalls)
+    drop-oldest  bounded FIFO, the oldest queued update is discarded
+    conflate     one pending update per robot, newer positions replace
+                 older ones, so slow readers always get current state;
+                 bounded by the number of robots, not by the capacity
+
+Clients pick a policy per stream with the `x-telemetry-policy` metadata
+key; counters come back as trailing metadata when the stream ends. The
+fleet feed is shared by every subscriber, so its streams cannot use block.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from enum import Enum
+
+
+class OverflowPolicy(str, Enum):
+    BLOCK = "block"
+    DROP_OLDEST = "drop-oldest"
+    CONFLATE = "conflate"
+
+
+@dataclass
+class StreamStats:
+    published: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    conflated: int = 0
+
+    def as_metadata(self) -> tuple[tuple[str, str], ...]:
+        return (
+            ("x-telemetry-published", str(self.published)),
+            ("x-telemetry-delivered", str(self.delivered)),
+            ("x-telemetry-dropped", str(self.dropped)),
+            ("x-telemetry-conflated", str(self.conflated)),
+        )
+
+
+class TelemetryOutbox:
+    """Bounded hand-off queue between a stream's producer and its consumer."""
+
+    def __init__(self, policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 capacity: int = 1024):
+        self.policy = OverflowPolicy(policy)
+        self.capacity = capacity
+        self.stats = StreamStats()
+        self.closed = False
+        self._cond = threading.Condition()
+        if self.policy is OverflowPolicy.CONFLATE:
+            self._pending: OrderedDict[str, object] = OrderedDict()
+        else:
+            self._queue: deque = deque()
+
+    def __len__(self) -> int:
+        if self.policy is OverflowPolicy.CONFLATE:
+            return len(self._pending)
+        return len(self._queue)
+
+    def put(self, telemetry) -> bool:
+        """Queues one update. Returns False once the outbox is closed."""
+        with self._cond:
+            if self.closed:
+                return False
+            self.stats.published += 1
+
+            if self.policy is OverflowPolicy.CONFLATE:
+                self._conflate((telemetry,))
+
+            elif self.policy is OverflowPolicy.DROP_OLDEST:
+                if len(self._queue) >= self.capacity:
+                    self._queue.popleft()
+                    self.stats.dropped += 1
+                self._queue.append(telemetry)
+
+            else:
+                while len(self._queue) >= self.capacity and not self.closed:
+                    self._cond.wait()
+                if self.closed:
+                    return False
+                self._queue.append(telemetry)
+
+            self._cond.notify_all()
+            return True
+
+    def put_many(self, updates) -> bool:
+        """
+        Queues a burst of updates (e.g. one simulator tick), which may be
+        larger than the capacity. A BLOCK outbox hands it over in chunks
+        as the consumer makes room, so the producer waits but nothing is
+        lost. Returns False once the outbox is closed.
+        """
+        with self._cond:
+            if self.closed:
+                return False
+
+            if self.policy is OverflowPolicy.CONFLATE:
+                self.stats.published += len(updates)
+                self._conflate(updates)
+
+            elif self.policy is OverflowPolicy.DROP_OLDEST:
+                self.stats.published += len(updates)
+                queue = self._queue
+                queue.extend(updates)
+                overflow = len(queue) - self.capacity
+                if overflow > 0:
+                    for _ in range(overflow):
+                        queue.popleft()
+                    self.stats.dropped += overflow
+
+            else:
+                queue = self._queue
+                start = 0
+                while start < len(updates):
+                    while len(queue) >= self.capacity and not self.closed:
+                        self._cond.wait()
+                    if self.closed:
+                        return False
+                    chunk = updates[start:start + self.capacity - len(queue)]
+                    queue.extend(chunk)
+                    start += len(chunk)
+                    self.stats.published += len(chunk)
+                    self._cond.notify_all()
+
+            self._cond.notify_all()
+            return True
+
+    def _conflate(self, updates) -> None:
+        pending = self._pending
+        for telemetry in updates:
+            if telemetry.robot_id in pending:
+                # Keep the robot's place in line, replace its position.
+                pending[telemetry.robot_id] = telemetry
+                self.stats.conflated += 1
+            else:
+                pending[telemetry.robot_id] = telemetry
+
+    def get_batch(self, max_items: int | None = None,
+                  timeout: float | None = None) -> list | None:
+        """
+        Waits for at least one update and returns everything pending (up to
+        max_items). Returns [] on timeout and None once closed and drained.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self) or self.closed, timeout):
+                return []
+            if not len(self):
+                return None
+
+            if self.policy is OverflowPolicy.CONFLATE:
+                take = len(self._pending) if max_items is None else min(max_items, len(self._pending))
+                batch = [self._pending.popitem(last=False)[1] for _ in range(take)]
+            else:
+                take = len(self._queue) if max_items is None else min(max_items, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(take)]
+
+            self.stats.delivered += len(batch)
+            self._cond.notify_all()
+            return batch
+
+    def close(self) -> None:
+        """Stops accepting updates; queued ones can still be drained."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
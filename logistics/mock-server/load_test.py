@@ -0,0 +1,255 @@
+"""
+gRPC Load Generator - Warehouse Robot Telemetry
+
+Opens M channels x N concurrent bi-directional streams against the warehouse
+server with grpc.aio, drives PICK commands at a target aggregate rate, and
+prints a JSON report: command-to-first-telemetry latency percentiles,
+telemetry messages per second and error counts.
+
+Usage:
+    python logistics/mock-server/load_test.py --channels 4 --streams 16 \
+        --rate 2000 --duration 30 --server-workers 64
+    python logistics/mock-server/client.py --load --rate 500   (same flags)
+
+Every open stream holds one of the server's worker threads, so channels x
+streams must stay within its --max-workers (10 by default); the streams
+beyond that wait for a thread and the latencies measure the queueing.
+Start the server with e.g. `--max-workers 64` for the run above.
+
+Each stream owns a pool of robots and keeps at most one command in flight
+per robot, so every telemetry event maps back to exactly one command: the
+first event after a send is the latency sample, the IDLE event completes
+the command. When a stream has no idle robot at a scheduled send, the
+command is counted as skipped; raise --robots if that happens.
+
+Streams use the conflate policy unless --policy says otherwise: it never
+discards a robot's latest update, so the IDLE event always arrives. Under
+drop-oldest it can be discarded; a command still in flight after
+--command-timeout then counts as a COMMAND_TIMEOUT error and its robot is
+reused, and commands without an IDLE when the stream ends count as NO_IDLE.
+commands_per_s covers the send window only, not the drain that follows.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+import grpc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+from telemetry_codec import TelemetryBatchDecoder
+
+
+@dataclass
+class LoadStats:
+    sent: int = 0
+    completed: int = 0
+    skipped: int = 0
+    telemetry: int = 0
+    send_ended: float = 0.0
+    latencies_ms: list = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+
+
+def percentile(sorted_values: list, pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_stream(stub, stream_id: str, rate: float, robots: int,
+                     deadline: float, batched: bool, metadata, stats: LoadStats,
+                     command_timeout: float = 5.0):
+    """Drives one bi-directional stream until the deadline, then drains it."""
+    rpc = stub.StreamTelemetryBatches if batched else stub.StreamTelemetry
+    call = rpc(metadata=metadata)
+    loop = asyncio.get_running_loop()
+    idle = deque(f"LOAD-{stream_id}-{r:03d}" for r in range(robots))
+    in_flight: dict[str, list] = {}      # robot -> [sent_at, first_seen]
+
+    def reclaim() -> bool:
+        # The oldest command is first in the dict; free its robot if its
+        # IDLE event is overdue (dropped by the stream's policy).
+        robot_id, (sent_at, _) = next(iter(in_flight.items()))
+        if time.perf_counter() - sent_at < command_timeout:
+            return False
+        del in_flight[robot_id]
+        idle.append(robot_id)
+        stats.errors["COMMAND_TIMEOUT"] += 1
+        return True
+
+    async def write():
+        interval = 1.0 / rate
+        next_send = loop.time()
+        while next_send < deadline:
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+            next_send += interval
+            if not idle and not (in_flight and reclaim()):
+                stats.skipped += 1
+                continue
+            robot_id = idle.popleft()     # longest-idle robot first
+            in_flight[robot_id] = [time.perf_counter(), False]
+            await call.write(warehouse_pb2.WarehouseCommand(
+                robot_id=robot_id,
+                command=warehouse_pb2.COMMAND_PICK,
+                target=warehouse_pb2.Coordinates(x=10.0, y=5.0, z=1.0),
+                payload_sku="SKU-LOAD",
+                timestamp_ms=int(time.time() * 1000),
+            ))
+            stats.sent += 1
+        stats.send_ended = max(stats.send_ended, time.perf_counter())
+        await call.done_writing()
+
+    def observe(telemetry):
+        stats.telemetry += 1
+        pending = in_flight.get(telemetry.robot_id)
+        if pending is None:
+            return
+        if not pending[1]:
+            pending[1] = True
+            stats.latencies_ms.append((time.perf_counter() - pending[0]) * 1000)
+        if telemetry.status == warehouse_pb2.ROBOT_STATUS_IDLE:
+            del in_flight[telemetry.robot_id]
+            idle.append(telemetry.robot_id)
+            stats.completed += 1
+
+    async def read():
+        decoder = TelemetryBatchDecoder() if batched else None
+        async for message in call:
+            if batched:
+                for telemetry in decoder.decode(message):
+                    observe(telemetry)
+            else:
+                observe(message)
+
+    try:
+        await asyncio.gather(write(), read())
+    except grpc.aio.AioRpcError as e:
+        stats.errors[e.code().name] += 1
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+    finally:
+        if in_flight:
+            stats.errors["NO_IDLE"] += len(in_flight)
+
+
+async def run_load(args) -> dict:
+    stats = LoadStats()
+    metadata = (("x-telemetry-policy", args.policy or "conflate"),)
+    total_streams = args.channels * args.streams
+    per_stream_rate = args.rate / total_streams
+
+    channels = [grpc.aio.insecure_channel(args.target) for _ in range(args.channels)]
+    try:
+        await asyncio.gather(*(
+            asyncio.wait_for(ch.channel_ready(), timeout=5) for ch in channels))
+    except asyncio.TimeoutError:
+        for ch in channels:
+            await ch.close()
+        raise SystemExit(f"Cannot reach warehouse server at {args.target}")
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    deadline = loop.time() + args.duration
+    tasks = [
+        run_stream(warehouse_pb2_grpc.WarehouseAutomationStub(ch), f"{c}-{s}",
+                   per_stream_rate, args.robots, deadline, args.batched,
+                   metadata, stats, args.command_timeout)
+        for c, ch in enumerate(channels) for s in range(args.streams)
+    ]
+    try:
+        await asyncio.wait_for(asyncio.gather(*tasks),
+                               timeout=args.duration + args.drain_timeout)
+    except asyncio.TimeoutError:
+        stats.errors["DRAIN_TIMEOUT"] += 1
+    elapsed = time.perf_counter() - started
+    send_window = (stats.send_ended or time.perf_counter()) - started
+
+    for ch in channels:
+        await ch.close()
+
+    latencies = sorted(stats.latencies_ms)
+    return {
+        "target": args.target,
+        "rpc": "StreamTelemetryBatches" if args.batched else "StreamTelemetry",
+        "channels": args.channels,
+        "streams_per_channel": args.streams,
+        "target_rate_per_s": args.rate,
+        "policy": metadata[0][1],
+        "duration_s": round(elapsed, 3),
+        "send_window_s": round(send_window, 3),
+        "commands_sent": stats.sent,
+        "commands_completed": stats.completed,
+        "commands_skipped": stats.skipped,
+        "commands_per_s": round(stats.sent / send_window, 1),
+        "telemetry_received": stats.telemetry,
+        "messages_per_s": round(stats.telemetry / elapsed, 1),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+            "samples": len(latencies),
+        },
+        "errors": dict(stats.errors),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="RetailSync gRPC load generator")
+    parser.add_argument("--target", default="localhost:50051")
+    parser.add_argument("--channels", type=int, default=2,
+                        help="number of gRPC channels (M)")
+    parser.add_argument("--streams", type=int, default=4,
+                        help="concurrent streams per channel (N)")
+    parser.add_argument("--server-workers", type=int, default=10,
+                        help="the server's --max-workers; warns when M x N exceeds it")
+    parser.add_argument("--rate", type=float, default=200.0,
+                        help="aggregate commands per second across all streams")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="seconds to send commands for")
+    parser.add_argument("--robots", type=int, default=32,
+                        help="robots per stream (max commands in flight)")
+    parser.add_argument("--batched", action="store_true",
+                        help="use StreamTelemetryBatches")
+    parser.add_argument("--policy", choices=["block", "drop-oldest", "conflate"],
+                        default="conflate",
+                        help="x-telemetry-policy sent on every stream")
+    parser.add_argument("--drain-timeout", type=float, default=10.0,
+                        help="seconds to wait for in-flight commands at the end")
+    parser.add_argument("--command-timeout", type=float, default=5.0,
+                        help="seconds before a command without an IDLE event "
+                             "frees its robot")
+    parser.add_argument("--output", help="also write the JSON report here")
+    return parser
+
+
+def main(argv=None) -> dict:
+    args = build_parser().parse_args(argv)
+    if args.channels * args.streams > args.server_workers:
+        print(f"warning: {args.channels} x {args.streams} streams exceed the server's "
+              f"{args.server_workers} worker threads; the extra streams queue and "
+              f"their latency measures the wait (raise the server's --max-workers)",
+              file=sys.stderr)
+    report = asyncio.run(run_load(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -4,25 +4,92 @@ gRPC Mock Server - Warehouse Robot Automation
 Implements the WarehouseAutomation service defined in contracts/warehouse.proto.
 Returns simulated telemetry data for demonstration purposes.
 
-Stub generation (run once from project root):
-    python -m grpc_tools.protoc -Ilogistics/contracts \
-        --python_out=logistics/mock-server \
-        --grpc_python_out=logistics/mock-server \
-        logistics/contracts/warehouse.proto
+Stub generation (run once from project root, see logistics/stubs):
+    python -m logistics.stubs.generate
 
 Run: python logistics/mock-server/server.py
+     python logistics/mock-server/server.py --simulate 10000 --tick-hz 2
+
+With --simulate, a vectorized fleet simulator (fleet_simulator.py) moves N
+robots in the background. Their telemetry updates GetRobotStatus and the
+spatial queries, and is streamed to every StreamTelemetry /
+StreamTelemetryBatches call that sends `x-fleet-feed: 1` metadata. Those
+streams conflate by default (block is refused for them), so a reader that
+stops reading never stalls the simulation.
+
+Metrics are served in Prometheus text format on a side port
+(http://localhost:9100/metrics, --metrics-port to change).
 """
 
 import grpc
 from concurrent import futures
+import argparse
+import math
+import threading
 import time
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add the project root to path to import the generated stubs and the shared
+# observability package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+from telemetry_codec import TelemetryBatchEncoder
+from flow_control import OverflowPolicy, TelemetryOutbox
+from dispatch import CommandDispatcher
+from spatial_index import FleetState
+from observability import REGISTRY, start_metrics_server
+from observability.grpc_metrics import MetricsInterceptor
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+STEPS_PER_COMMAND = 3
+STEP_INTERVAL_S = 0.3
+MAX_BATCH_SIZE = 4096
+MAX_NEAREST_K = 1000
+
+COMMANDS = REGISTRY.counter(
+    "retailsync_logistics_commands_total",
+    "Warehouse commands by what the dispatcher did with them.", ("outcome",))
+
+
+def simulate_command(command):
+    """Yields one telemetry event per step of a robot executing a command."""
+    for step in range(STEPS_PER_COMMAND):
+        yield warehouse_pb2.RobotTelemetry(
+            robot_id=command.robot_id,
+            position=warehouse_pb2.Coordinates(
+                x=command.target.x * (step + 1) / 3.0 if command.target else 0.0,
+                y=command.target.y * (step + 1) / 3.0 if command.target else 0.0,
+                z=command.target.z if command.target else 0.0,
+            ),
+            battery_level=round(0.95 - (step * 0.02), 2),
+            status=(warehouse_pb2.ROBOT_STATUS_MOVING if step < 2
+                    else warehouse_pb2.ROBOT_STATUS_IDLE),
+            speed_mps=round(1.5 - (step * 0.5), 1),
+            timestamp_ms=int(time.time() * 1000),
+        )
+
 
-import warehouse_pb2
-import warehouse_pb2_grpc
+def require_finite(context, **values: float) -> None:
+    """Aborts with INVALID_ARGUMENT unless every value is a finite number."""
+    bad = [name for name, value in values.items() if not math.isfinite(value)]
+    if bad:
+        context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                      f"{', '.join(bad)} must be finite")
+
+
+def log_telemetry(telemetry) -> None:
+    print(f"  [send] Telemetry: "
+          f"robot={telemetry.robot_id} "
+          f"pos=({telemetry.position.x:.1f}, {telemetry.position.y:.1f}) "
+          f"battery={telemetry.battery_level} "
+          f"status={warehouse_pb2.RobotStatusEnum.Name(telemetry.status)}")
 
 
 # ---------------------------------------------------------------------------
@@ -31,46 +98,140 @@ import warehouse_pb2_grpc
 
 class WarehouseAutomationServicer(warehouse_pb2_grpc.WarehouseAutomationServicer):
 
+    def __init__(self, default_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+                 queue_capacity: int = 1024):
+        self.default_policy = default_policy
+        self.queue_capacity = queue_capacity
+        self.fleet = FleetState()
+        self._feed_lock = threading.Lock()
+        self._feed: set[TelemetryOutbox] = set()
+
+    def publish_fleet(self, updates) -> None:
+        """
+        Fans a simulator tick out to every stream subscribed to the feed.
+        Feed outboxes never use BLOCK (see _open_outbox), so a reader that
+        stops reading cannot hold up the simulation or the other streams.
+        """
+        with self._feed_lock:
+            subscribers = list(self._feed)
+        for outbox in subscribers:
+            outbox.put_many(updates)
+
+    def _open_outbox(self, request_iterator,
+                     context) -> tuple[TelemetryOutbox, CommandDispatcher]:
+        """
+        Starts a command dispatcher for one stream, feeding an outbox with
+        the policy requested in `x-telemetry-policy`; returns both. Commands
+        are read on a producer thread so the response side never waits on
+        the client.
+
+        Fleet-feed streams are fed by the shared simulation thread, which
+        must never wait on one reader: they default to conflate instead of
+        BLOCK, and asking for block explicitly is rejected.
+        """
+        metadata = dict(context.invocation_metadata())
+        subscribed = metadata.get("x-fleet-feed", "").lower() in ("1", "true")
+        requested = metadata.get("x-telemetry-policy")
+        try:
+            policy = OverflowPolicy(requested or self.default_policy)
+        except ValueError:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                          f"Unknown x-telemetry-policy '{requested}'")
+        if subscribed and policy is OverflowPolicy.BLOCK:
+            if requested:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                              "x-fleet-feed streams cannot use the block policy: "
+                              "use conflate or drop-oldest")
+            policy = OverflowPolicy.CONFLATE
+
+        outbox = TelemetryOutbox(policy, self.queue_capacity)
+        if subscribed:
+            with self._feed_lock:
+                self._feed.add(outbox)
+
+        def emit(telemetry) -> bool:
+            log_telemetry(telemetry)
+            self.fleet.update(telemetry)
+            return outbox.put(telemetry)
+
+        dispatcher = CommandDispatcher(simulate_command, emit, STEP_INTERVAL_S)
+
+        def produce():
+            try:
+                for command in request_iterator:
+                    cmd_name = warehouse_pb2.CommandType.Name(command.command)
+                    print(f"  [recv] {cmd_name} for robot {command.robot_id}")
+                    dispatcher.submit(command)
+                dispatcher.close()
+            except grpc.RpcError:
+                dispatcher.stop()  # client went away
+            finally:
+                outbox.close()
+
+        def cancel():
+            dispatcher.stop()
+            outbox.close()
+
+        context.add_callback(cancel)
+        threading.Thread(target=produce, daemon=True).start()
+        return outbox, dispatcher
+
+    def _finish(self, outbox: TelemetryOutbox, dispatcher: CommandDispatcher,
+                context, label: str) -> None:
+        with self._feed_lock:
+            self._feed.discard(outbox)
+        outbox.close()
+        stats, commands = outbox.stats, dispatcher.stats
+        context.set_trailing_metadata(stats.as_metadata() + commands.as_metadata())
+        for outcome in ("received", "completed", "coalesced", "preempted"):
+            COMMANDS.inc(getattr(commands, outcome), outcome=outcome)
+        print(f"  [{label}] Bi-directional stream closed "
+              f"(policy={outbox.policy.value} delivered={stats.delivered} "
+              f"dropped={stats.dropped} conflated={stats.conflated} "
+              f"commands={commands.received} coalesced={commands.coalesced} "
+              f"preempted={commands.preempted})")
+
     def StreamTelemetry(self, request_iterator, context):
         """
         Bi-directional streaming RPC. For each incoming command, emits
         three telemetry events simulating the robot executing the command.
+        Robots on the same stream execute their commands in parallel.
         """
         print("  [stream] Bi-directional stream opened")
 
-        for command in request_iterator:
-            cmd_name = warehouse_pb2.CommandType.Name(command.command)
-            print(f"  [recv] {cmd_name} for robot {command.robot_id}")
-
-            for step in range(3):
-                telemetry = warehouse_pb2.RobotTelemetry(
-                    robot_id=command.robot_id,
-                    position=warehouse_pb2.Coordinates(
-                        x=command.target.x * (step + 1) / 3.0 if command.target else 0.0,
-                        y=command.target.y * (step + 1) / 3.0 if command.target else 0.0,
-                        z=command.target.z if command.target else 0.0,
-                    ),
-                    battery_level=round(0.95 - (step * 0.02), 2),
-                    status=(warehouse_pb2.ROBOT_STATUS_MOVING if step < 2
-                            else warehouse_pb2.ROBOT_STATUS_IDLE),
-                    speed_mps=round(1.5 - (step * 0.5), 1),
-                    timestamp_ms=int(time.time() * 1000),
-                )
-
-                print(f"  [send] Telemetry [{step+1}/3]: "
-                      f"robot={telemetry.robot_id} "
-                      f"pos=({telemetry.position.x:.1f}, {telemetry.position.y:.1f}) "
-                      f"battery={telemetry.battery_level}")
-
-                yield telemetry
-                time.sleep(0.3)
-
-        print("  [stream] Bi-directional stream closed")
+        outbox, dispatcher = self._open_outbox(request_iterator, context)
+        try:
+            while (batch := outbox.get_batch()) is not None:
+                yield from batch
+        finally:
+            self._finish(outbox, dispatcher, context, "stream")
+
+    def StreamTelemetryBatches(self, request_iterator, context):
+        """
+        Bi-directional streaming RPC emitting delta-encoded TelemetryBatch
+        frames, each holding every update queued since the previous frame.
+        """
+        print("  [batch] Bi-directional stream opened")
+
+        encoder = TelemetryBatchEncoder()
+        outbox, dispatcher = self._open_outbox(request_iterator, context)
+        try:
+            while (batch := outbox.get_batch(MAX_BATCH_SIZE)) is not None:
+                yield encoder.encode(batch)
+        finally:
+            self._finish(outbox, dispatcher, context, "batch")
 
     def GetRobotStatus(self, request, context):
-        """Unary RPC returning a static telemetry snapshot."""
+        """
+        Unary RPC returning the robot's latest telemetry, or a static
+        snapshot for robots that have not reported yet.
+        """
         print(f"  [status] Request for robot {request.robot_id}")
 
+        latest = self.fleet.get(request.robot_id)
+        if latest is not None:
+            return latest
+
         return warehouse_pb2.RobotTelemetry(
             robot_id=request.robot_id,
             position=warehouse_pb2.Coordinates(x=12.5, y=3.2, z=0.0),
@@ -80,20 +241,70 @@ class WarehouseAutomationServicer(warehouse_pb2_grpc.WarehouseAutomationServicer
             timestamp_ms=int(time.time() * 1000),
         )
 
+    def FindNearestRobots(self, request, context):
+        """Unary RPC returning the k robots closest to a point."""
+        require_finite(context, **{"point.x": request.point.x, "point.y": request.point.y})
+        k = min(request.k or 1, MAX_NEAREST_K)
+        matches = self.fleet.nearest(request.point.x, request.point.y, k,
+                                     set(request.status_filter))
+        return warehouse_pb2.RobotList(
+            robots=[telemetry for _, telemetry in matches],
+            distances_m=[dist for dist, _ in matches],
+        )
+
+    def ListRobotsInRegion(self, request, context):
+        """Unary RPC returning every robot inside a bounding box."""
+        bbox = request.bbox
+        require_finite(context, **{"bbox.min.x": bbox.min.x, "bbox.min.y": bbox.min.y,
+                                   "bbox.max.x": bbox.max.x, "bbox.max.y": bbox.max.y})
+        return warehouse_pb2.RobotList(robots=self.fleet.in_region(
+            bbox.min.x, bbox.min.y, bbox.max.x, bbox.max.y,
+            set(request.status_filter),
+        ))
+
 
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(
-        WarehouseAutomationServicer(), server
-    )
+    parser = argparse.ArgumentParser(description="RetailSync gRPC warehouse server")
+    parser.add_argument("--telemetry-policy", default=OverflowPolicy.BLOCK.value,
+                        choices=[p.value for p in OverflowPolicy],
+                        help="default overflow policy for telemetry streams")
+    parser.add_argument("--telemetry-queue", type=int, default=1024,
+                        help="per-stream telemetry queue capacity")
+    parser.add_argument("--max-workers", type=int, default=10,
+                        help="gRPC worker threads; every open stream holds one")
+    parser.add_argument("--metrics-port", type=int, default=9100,
+                        help="side HTTP port serving /metrics (0 disables)")
+    parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                        help="run a background fleet simulation of N robots")
+    parser.add_argument("--tick-hz", type=float, default=2.0,
+                        help="simulation ticks per second (with --simulate)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for the fleet simulation")
+    args = parser.parse_args()
+
+    servicer = WarehouseAutomationServicer(OverflowPolicy(args.telemetry_policy),
+                                           args.telemetry_queue)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=args.max_workers),
+                         interceptors=[MetricsInterceptor("logistics")])
+    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(servicer, server)
+
+    simulation = None
+    if args.simulate:
+        from fleet_simulator import FleetSimulator, SimulationLoop
+        simulation = SimulationLoop(
+            FleetSimulator(args.simulate, seed=args.seed), args.tick_hz,
+            servicer.fleet, servicer.publish_fleet,
+        ).start()
 
     PORT = 50051
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
 
     print("=" * 60)
     print("  RetailSync - gRPC Warehouse Automation")
@@ -102,7 +313,17 @@ def serve():
     print(f"  Protocol       : gRPC / HTTP/2 / Protobuf")
     print(f"  Service        : WarehouseAutomation")
     print(f"  RPCs           : StreamTelemetry (bi-directional)")
+    print(f"                   StreamTelemetryBatches (bi-directional)")
     print(f"                   GetRobotStatus (unary)")
+    print(f"                   FindNearestRobots, ListRobotsInRegion (unary)")
+    print(f"  Workers        : {args.max_workers} (one per open stream)")
+    print(f"  Flow control   : {args.telemetry_policy} "
+          f"(queue {args.telemetry_queue}/stream)")
+    if args.metrics_port:
+        print(f"  Metrics        : http://localhost:{args.metrics_port}/metrics")
+    if simulation:
+        print(f"  Simulation     : {args.simulate} robots @ {args.tick_hz:g} Hz "
+              f"(x-fleet-feed: 1 to subscribe)")
     print("=" * 60)
     print()
 
@@ -110,6 +331,8 @@ def serve():
         server.wait_for_termination()
     except KeyboardInterrupt:
         print("\n  Server shutting down...")
+        if simulation:
+            simulation.stop()
         server.stop(0)
 
 
@@ -0,0 +1,178 @@
+"""
+Spatial index over the latest robot positions.
+
+SpatialGrid buckets robots into uniform square cells on the warehouse floor
+(x, y). Nearest-neighbour queries search rings of cells outwards from the
+query point and stop as soon as no unvisited cell can hold a closer robot,
+so a lookup touches a handful of cells regardless of fleet size. Rings are
+clipped to the cells ever occupied, so a query point far outside the
+fleet costs no more than one inside it. A robot reporting a non-finite
+position is left out of the grid until it reports a finite one.
+
+FleetState keeps the last RobotTelemetry per robot and the grid in sync;
+the servicer updates it for every telemetry event it emits.
+"""
+
+import heapq
+import math
+import threading
+from typing import Iterable, Optional
+
+
+class SpatialGrid:
+    """Uniform grid of robot positions with k-NN and box queries."""
+
+    def __init__(self, cell_size: float = 5.0):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[str]] = {}
+        self._entries: dict[str, tuple[float, float, int, tuple[int, int]]] = {}
+        # Cell bounds ever occupied; bounds the ring search. Never shrinks,
+        # which only costs a few empty rings after robots leave an area.
+        self._bounds: Optional[list[int]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def update(self, robot_id: str, x: float, y: float, status: int) -> None:
+        if not (math.isfinite(x) and math.isfinite(y)):
+            self.remove(robot_id)
+            return
+        cell = self._cell(x, y)
+        previous = self._entries.get(robot_id)
+        if previous is not None and previous[3] != cell:
+            self._discard(robot_id, previous[3])
+        if previous is None or previous[3] != cell:
+            self._cells.setdefault(cell, set()).add(robot_id)
+            if self._bounds is None:
+                self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+            else:
+                b = self._bounds
+                b[0], b[1] = min(b[0], cell[0]), min(b[1], cell[1])
+                b[2], b[3] = max(b[2], cell[0]), max(b[3], cell[1])
+        self._entries[robot_id] = (x, y, status, cell)
+
+    def remove(self, robot_id: str) -> None:
+        previous = self._entries.pop(robot_id, None)
+        if previous is not None:
+            self._discard(robot_id, previous[3])
+
+    def _discard(self, robot_id: str, cell: tuple[int, int]) -> None:
+        members = self._cells[cell]
+        members.discard(robot_id)
+        if not members:
+            del self._cells[cell]
+
+    def _ring(self, cx: int, cy: int, r: int) -> Iterable[tuple[int, int]]:
+        """Cells r cells away from (cx, cy), within the occupied bounds."""
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        if r == 0:
+            if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                yield cx, cy
+            return
+        xs = range(max(cx - r, min_cx), min(cx + r, max_cx) + 1)
+        for y in (cy - r, cy + r):
+            if min_cy <= y <= max_cy:
+                for x in xs:
+                    yield x, y
+        ys = range(max(cy - r + 1, min_cy), min(cy + r - 1, max_cy) + 1)
+        for x in (cx - r, cx + r):
+            if min_cx <= x <= max_cx:
+                for y in ys:
+                    yield x, y
+
+    def nearest(self, x: float, y: float, k: int,
+                statuses: Optional[set[int]] = None) -> list[tuple[float, str]]:
+        """
+        Returns up to k (distance, robot_id) pairs, closest first. x and y
+        must be finite.
+        """
+        if k <= 0 or not self._cells:
+            return []
+
+        cx, cy = self._cell(x, y)
+        # Nearest and farthest rings that can contain an occupied cell.
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        min_ring = max(min_cx - cx, cx - max_cx, min_cy - cy, cy - max_cy, 0)
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy)
+
+        best: list[tuple[float, str]] = []     # max-heap via negated distance
+        for r in range(min_ring, max_ring + 1):
+            # Robots in ring r are at least (r - 1) cells away.
+            if len(best) == k and -best[0][0] <= (r - 1) * self.cell_size:
+                break
+            for cell in self._ring(cx, cy, r):
+                for robot_id in self._cells.get(cell, ()):
+                    rx, ry, status, _ = self._entries[robot_id]
+                    if statuses and status not in statuses:
+                        continue
+                    dist = math.hypot(rx - x, ry - y)
+                    if len(best) < k:
+                        heapq.heappush(best, (-dist, robot_id))
+                    elif dist < -best[0][0]:
+                        heapq.heapreplace(best, (-dist, robot_id))
+
+        return sorted((-d, robot_id) for d, robot_id in best)
+
+    def in_region(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                  statuses: Optional[set[int]] = None) -> list[str]:
+        """Returns the robots inside the box (edges inclusive, finite)."""
+        (x0, y0), (x1, y1) = self._cell(min_x, min_y), self._cell(max_x, max_y)
+        found = []
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            cells = [c for c in self._cells if x0 <= c[0] <= x1 and y0 <= c[1] <= y1]
+        else:
+            cells = [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+        for cell in cells:
+            for robot_id in self._cells.get(cell, ()):
+                rx, ry, status, _ = self._entries[robot_id]
+                if statuses and status not in statuses:
+                    continue
+                if min_x <= rx <= max_x and min_y <= ry <= max_y:
+                    found.append(robot_id)
+        return found
+
+
+class FleetState:
+    """Latest telemetry per robot, indexed by position. Thread-safe."""
+
+    def __init__(self, cell_size: float = 5.0):
+        self._lock = threading.Lock()
+        self._latest: dict[str, object] = {}
+        self.grid = SpatialGrid(cell_size)
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    def update(self, telemetry) -> None:
+        with self._lock:
+            self._latest[telemetry.robot_id] = telemetry
+            self.grid.update(telemetry.robot_id, telemetry.position.x,
+                             telemetry.position.y, telemetry.status)
+
+    def update_many(self, updates) -> None:
+        """Applies a tick's worth of telemetry under a single lock hold."""
+        with self._lock:
+            latest, grid = self._latest, self.grid
+            for telemetry in updates:
+                latest[telemetry.robot_id] = telemetry
+                grid.update(telemetry.robot_id, telemetry.position.x,
+                            telemetry.position.y, telemetry.status)
+
+    def get(self, robot_id: str):
+        with self._lock:
+            return self._latest.get(robot_id)
+
+    def nearest(self, x: float, y: float, k: int,
+                statuses: Optional[set[int]] = None) -> list[tuple[float, object]]:
+        with self._lock:
+            return [(dist, self._latest[robot_id])
+                    for dist, robot_id in self.grid.nearest(x, y, k, statuses)]
+
+    def in_region(self, min_x: float, min_y: float, max_x: float, max_y: float,
+                  statuses: Optional[set[int]] = None) -> list:
+        with self._lock:
+            return [self._latest[robot_id] for robot_id in
+                    self.grid.in_region(min_x, min_y, max_x, max_y, statuses)]
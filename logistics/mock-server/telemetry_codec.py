@@ -0,0 +1,94 @@
+"""
+Delta-encoded TelemetryBatch codec (see TelemetryBatch in warehouse.proto).
+
+One encoder and one decoder live for the duration of a stream: the encoder
+interns robot IDs so each string crosses the wire once, and the decoder
+rebuilds the same dictionary from new_robot_ids as batches arrive.
+
+    encoder = TelemetryBatchEncoder()           # server side
+    batch = encoder.encode(telemetry_list)
+
+    decoder = TelemetryBatchDecoder()           # client side
+    for telemetry in decoder.decode(batch): ...
+"""
+
+from logistics.stubs import warehouse_pb2
+
+
+POSITION_SCALE = 1000     # metres -> millimetres
+BATTERY_SCALE = 1000      # fraction -> per-mille
+SPEED_SCALE = 100         # m/s -> cm/s
+
+
+class TelemetryBatchEncoder:
+    """Packs RobotTelemetry messages into TelemetryBatch frames."""
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+
+    def encode(self, updates) -> warehouse_pb2.TelemetryBatch:
+        batch = warehouse_pb2.TelemetryBatch()
+        if not updates:
+            return batch
+
+        new_ids = []
+        robot_index = []
+        x, y, z = [], [], []
+        battery, status, speed, deltas = [], [], [], []
+
+        base = updates[0].timestamp_ms
+        previous = base
+        for t in updates:
+            idx = self._index.get(t.robot_id)
+            if idx is None:
+                idx = self._index[t.robot_id] = len(self._index)
+                new_ids.append(t.robot_id)
+            robot_index.append(idx)
+            x.append(round(t.position.x * POSITION_SCALE))
+            y.append(round(t.position.y * POSITION_SCALE))
+            z.append(round(t.position.z * POSITION_SCALE))
+            battery.append(max(0, round(t.battery_level * BATTERY_SCALE)))
+            status.append(t.status)
+            speed.append(max(0, round(t.speed_mps * SPEED_SCALE)))
+            deltas.append(t.timestamp_ms - previous)
+            previous = t.timestamp_ms
+
+        batch.base_timestamp_ms = base
+        batch.new_robot_ids.extend(new_ids)
+        batch.robot_index.extend(robot_index)
+        batch.x_mm.extend(x)
+        batch.y_mm.extend(y)
+        batch.z_mm.extend(z)
+        batch.battery_permille.extend(battery)
+        batch.status.extend(status)
+        batch.speed_cms.extend(speed)
+        batch.timestamp_delta_ms.extend(deltas)
+        return batch
+
+
+class TelemetryBatchDecoder:
+    """Expands TelemetryBatch frames back into RobotTelemetry messages."""
+
+    def __init__(self):
+        self.robot_ids: list[str] = []
+
+    def decode(self, batch: warehouse_pb2.TelemetryBatch) -> list:
+        self.robot_ids.extend(batch.new_robot_ids)
+
+        updates = []
+        timestamp = batch.base_timestamp_ms
+        for i, idx in enumerate(batch.robot_index):
+            timestamp += batch.timestamp_delta_ms[i]
+            updates.append(warehouse_pb2.RobotTelemetry(
+                robot_id=self.robot_ids[idx],
+                position=warehouse_pb2.Coordinates(
+                    x=batch.x_mm[i] / POSITION_SCALE,
+                    y=batch.y_mm[i] / POSITION_SCALE,
+                    z=batch.z_mm[i] / POSITION_SCALE,
+                ),
+                battery_level=batch.battery_permille[i] / BATTERY_SCALE,
+                status=batch.status[i],
+                speed_mps=batch.speed_cms[i] / SPEED_SCALE,
+                timestamp_ms=timestamp,
+            ))
+        return updates
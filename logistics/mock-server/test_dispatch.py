@@ -0,0 +1,69 @@
+"""
+Command dispatch counters, and their trailing metadata on a stream.
+
+    python -m pytest logistics/mock-server
+"""
+
+import importlib.util
+import os
+from concurrent import futures
+
+import grpc
+
+from dispatch import CommandDispatcher
+from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _steps(command):
+    for _ in range(3):
+        yield warehouse_pb2.RobotTelemetry(robot_id=command.robot_id)
+
+
+def _command(robot_id: str, command: int, x: float = 0.0):
+    return warehouse_pb2.WarehouseCommand(
+        robot_id=robot_id, command=command, target=warehouse_pb2.Coordinates(x=x))
+
+
+def test_stats_count_coalesced_and_preempted_commands():
+    emitted = []
+    dispatcher = CommandDispatcher(_steps, lambda t: emitted.append(t) or True, 0.05)
+    dispatcher.submit(_command("A", warehouse_pb2.COMMAND_PICK))
+    dispatcher.submit(_command("A", warehouse_pb2.COMMAND_MOVE, 1.0))
+    dispatcher.submit(_command("A", warehouse_pb2.COMMAND_MOVE, 2.0))     # supersedes 1.0
+    dispatcher.submit(_command("B", warehouse_pb2.COMMAND_MOVE))
+    dispatcher.submit(_command("B", warehouse_pb2.COMMAND_HALT))          # preempts B's move
+    dispatcher.close(timeout=5)
+
+    stats = dispatcher.stats
+    assert (stats.received, stats.coalesced, stats.preempted) == (5, 1, 1)
+    assert stats.completed == 3         # A: PICK and MOVE 2.0, B: HALT
+    assert dict(stats.as_metadata())["x-commands-received"] == "5"
+
+
+def test_stream_trailers_carry_command_counts():
+    spec = importlib.util.spec_from_file_location("logistics_server_dispatch",
+                                                  os.path.join(HERE, "server.py"))
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    server.STEP_INTERVAL_S = 0.0
+
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(
+        server.WarehouseAutomationServicer(), grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = warehouse_pb2_grpc.WarehouseAutomationStub(channel)
+            commands = [_command("R1", warehouse_pb2.COMMAND_PICK),
+                        _command("R2", warehouse_pb2.COMMAND_PICK)]
+            call = stub.StreamTelemetry(iter(commands), timeout=10)
+            assert len(list(call)) == 2 * server.STEPS_PER_COMMAND
+            trailers = dict(call.trailing_metadata())
+    finally:
+        grpc_server.stop(0)
+    assert trailers["x-commands-received"] == "2"
+    assert trailers["x-commands-completed"] == "2"
+    assert trailers["x-telemetry-delivered"] == str(2 * server.STEPS_PER_COMMAND)
@@ -0,0 +1,96 @@
+"""
+Fleet-feed streams must never hold up the shared simulation loop.
+
+    python -m pytest logistics/mock-server
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from concurrent import futures
+
+import grpc
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location("logistics_server",
+                                               os.path.join(HERE, "server.py"))
+server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(server)
+
+from fleet_simulator import FleetSimulator, SimulationLoop  # noqa: E402
+from flow_control import OverflowPolicy  # noqa: E402
+from logistics.stubs import warehouse_pb2_grpc  # noqa: E402
+
+
+@pytest.fixture
+def warehouse():
+    servicer = server.WarehouseAutomationServicer(OverflowPolicy.BLOCK,
+                                                  queue_capacity=4)
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(servicer, grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    simulation = SimulationLoop(FleetSimulator(500, seed=7), 100.0,
+                                servicer.fleet, servicer.publish_fleet).start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    try:
+        yield servicer, simulation, warehouse_pb2_grpc.WarehouseAutomationStub(channel)
+    finally:
+        channel.close()
+        simulation.stop()
+        grpc_server.stop(0)
+
+
+def _idle_commands(done: threading.Event):
+    """A command stream that sends nothing until the test is over."""
+    done.wait()
+    return
+    yield
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.mark.parametrize("metadata", [
+    (("x-fleet-feed", "1"),),
+    (("x-fleet-feed", "1"), ("x-telemetry-policy", "drop-oldest")),
+])
+def test_stalled_subscriber_does_not_stall_simulation(warehouse, metadata):
+    servicer, simulation, stub = warehouse
+    done = threading.Event()
+    # Never read from the response: the outbox and the transport fill up.
+    call = stub.StreamTelemetry(_idle_commands(done), metadata=metadata)
+    try:
+        assert _wait_for(lambda: servicer._feed)
+        (outbox,) = servicer._feed
+        assert outbox.policy is not OverflowPolicy.BLOCK
+
+        assert _wait_for(lambda: outbox.stats.dropped + outbox.stats.conflated > 0)
+        ticks = simulation.simulator.ticks
+        assert _wait_for(lambda: simulation.simulator.ticks > ticks + 20), \
+            "the simulation stopped ticking behind a stalled fleet subscriber"
+    finally:
+        done.set()
+        call.cancel()
+
+
+def test_block_policy_rejected_for_fleet_feed(warehouse):
+    _, _, stub = warehouse
+    done = threading.Event()
+    call = stub.StreamTelemetry(_idle_commands(done), metadata=(
+        ("x-fleet-feed", "1"), ("x-telemetry-policy", "block"),
+    ))
+    try:
+        with pytest.raises(grpc.RpcError) as error:
+            next(call)
+        assert error.value.code() is grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        done.set()
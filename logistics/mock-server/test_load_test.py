@@ -0,0 +1,58 @@
+"""
+Rates and command accounting of the load generator.
+
+    python -m pytest logistics/mock-server
+"""
+
+import importlib.util
+import os
+from concurrent import futures
+
+import grpc
+import pytest
+
+import load_test
+from logistics.stubs import warehouse_pb2_grpc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def server():
+    spec = importlib.util.spec_from_file_location("logistics_server_load",
+                                                  os.path.join(HERE, "server.py"))
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(
+        server.WarehouseAutomationServicer(), grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    yield server, f"127.0.0.1:{port}"
+    grpc_server.stop(0)
+
+
+def _run(target, *flags):
+    return load_test.main(["--target", target, "--channels", "1", "--streams", "2",
+                           "--server-workers", "4", *flags])
+
+
+def test_command_rate_excludes_the_drain(server):
+    module, target = server
+    module.STEP_INTERVAL_S = 0.1        # commands outlive the send window
+    report = _run(target, "--rate", "40", "--duration", "0.5")
+    assert report["policy"] == "conflate"
+    assert report["duration_s"] > report["send_window_s"] + 0.1
+    assert report["commands_per_s"] == pytest.approx(
+        report["commands_sent"] / report["send_window_s"], rel=0.01)
+    assert report["commands_completed"] == report["commands_sent"]
+    assert report["errors"] == {}
+
+
+def test_overdue_commands_free_their_robot(server):
+    module, target = server
+    module.STEP_INTERVAL_S = 0.2
+    report = _run(target, "--rate", "20", "--duration", "0.5", "--robots", "1",
+                  "--command-timeout", "0", "--drain-timeout", "0.2")
+    assert report["commands_skipped"] == 0
+    assert report["errors"]["COMMAND_TIMEOUT"] > 0
@@ -0,0 +1,102 @@
+"""
+Spatial grid queries against a brute-force scan, and input validation of
+the spatial RPCs.
+
+    python -m pytest logistics/mock-server
+"""
+
+import importlib.util
+import math
+import os
+import random
+from concurrent import futures
+
+import grpc
+import pytest
+
+from spatial_index import SpatialGrid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def brute_nearest(positions, x, y, k):
+    return sorted((math.hypot(rx - x, ry - y), robot_id)
+                  for robot_id, (rx, ry) in positions.items())[:k]
+
+
+@pytest.fixture(scope="module")
+def grid():
+    rng = random.Random(3)
+    positions = {f"ROBOT-{i:03d}": (rng.uniform(0, 200), rng.uniform(0, 100))
+                 for i in range(500)}
+    grid = SpatialGrid()
+    for robot_id, (x, y) in positions.items():
+        grid.update(robot_id, x, y, 0)
+    return grid, positions
+
+
+@pytest.mark.parametrize("x, y", [
+    (100.0, 50.0), (0.0, 0.0), (-30.0, 250.0), (1e6, -1e6), (-1e9, 3e9),
+])
+def test_nearest_matches_brute_force(grid, x, y):
+    grid, positions = grid
+    assert grid.nearest(x, y, 5) == brute_nearest(positions, x, y, 5)
+
+
+def test_nearest_far_outside_the_fleet(grid):
+    # Every distance rounds to the same float: only the search cost matters.
+    grid, _ = grid
+    assert len(grid.nearest(1e300, -1e300, 5)) == 5
+
+
+def test_in_region_matches_brute_force(grid):
+    grid, positions = grid
+    expected = {robot_id for robot_id, (x, y) in positions.items()
+                if 20 <= x <= 60 and 10 <= y <= 30}
+    assert set(grid.in_region(20, 10, 60, 30)) == expected
+    assert grid.in_region(-1e300, -1e300, -1e299, -1e299) == []
+
+
+def test_non_finite_position_leaves_the_grid():
+    grid = SpatialGrid()
+    grid.update("R1", 1.0, 1.0, 0)
+    grid.update("R2", 2.0, 2.0, 0)
+    grid.update("R1", math.nan, 1.0, 0)
+    grid.update("R3", math.inf, 0.0, 0)
+    assert len(grid) == 1
+    assert grid.nearest(0.0, 0.0, 5) == [(math.hypot(2.0, 2.0), "R2")]
+
+
+@pytest.fixture(scope="module")
+def stub():
+    spec = importlib.util.spec_from_file_location("logistics_server_spatial",
+                                                  os.path.join(HERE, "server.py"))
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    from logistics.stubs import warehouse_pb2_grpc
+
+    grpc_server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    warehouse_pb2_grpc.add_WarehouseAutomationServicer_to_server(
+        server.WarehouseAutomationServicer(), grpc_server)
+    port = grpc_server.add_insecure_port("127.0.0.1:0")
+    grpc_server.start()
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        yield warehouse_pb2_grpc.WarehouseAutomationStub(channel)
+    grpc_server.stop(0)
+
+
+@pytest.mark.parametrize("value", [math.inf, -math.inf, math.nan])
+def test_non_finite_queries_are_invalid_arguments(stub, value):
+    from logistics.stubs import warehouse_pb2
+
+    requests = [
+        (stub.FindNearestRobots, warehouse_pb2.NearestRobotsRequest(
+            point=warehouse_pb2.Coordinates(x=value, y=1.0), k=3)),
+        (stub.ListRobotsInRegion, warehouse_pb2.RegionRequest(
+            bbox=warehouse_pb2.BoundingBox(min=warehouse_pb2.Coordinates(x=0.0, y=0.0),
+                                           max=warehouse_pb2.Coordinates(x=5.0, y=value)))),
+    ]
+    for rpc, request in requests:
+        with pytest.raises(grpc.RpcError) as error:
+            rpc(request, timeout=5)
+        assert error.value.code() is grpc.StatusCode.INVALID_ARGUMENT
@@ -0,0 +1,12 @@
+"""
+Python stubs for the Warehouse Automation service (contracts/warehouse.proto).
+
+    from logistics.stubs import warehouse_pb2, warehouse_pb2_grpc
+
+The server, its clients and the dashboard gateway all import the stubs from
+here rather than from logistics/mock-server. The generated modules are not
+checked in, because protobuf gencode must match the installed protobuf
+runtime. Build them once, and again whenever the contract changes:
+
+    python -m logistics.stubs.generate
+"""
@@ -0,0 +1,40 @@
+"""
+Generates logistics/stubs/warehouse_pb2.py and warehouse_pb2_grpc.py from
+logistics/contracts/warehouse.proto.
+
+The contract is mapped onto the virtual path logistics/stubs/, so the
+generated gRPC module imports `logistics.stubs.warehouse_pb2` rather than
+a top-level `warehouse_pb2`.
+
+Run (from the project root):
+    python -m logistics.stubs.generate
+"""
+
+import os
+import sys
+
+from grpc_tools import protoc
+
+
+STUBS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(STUBS_DIR))
+CONTRACTS_DIR = os.path.join(ROOT, "logistics", "contracts")
+PROTO = "logistics/stubs/warehouse.proto"       # virtual path of the contract
+
+
+def main() -> int:
+    args = [
+        "grpc_tools.protoc",
+        f"-Ilogistics/stubs={CONTRACTS_DIR}",
+        f"--python_out={ROOT}",
+        f"--grpc_python_out={ROOT}",
+        PROTO,
+    ]
+    status = protoc.main(args)
+    if status == 0:
+        print(f"Generated warehouse_pb2.py and warehouse_pb2_grpc.py in {STUBS_DIR}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Binary, memory-mapped snapshot of the marketplace inventory.
+
+The file mirrors InventoryStore's columns, so opening it needs no parsing.
+The store maps it (see InventoryStore.attach) and reads items straight from
+the mapping:
+
+    header      magic, byte order, seq, item count, table sizes, section offsets
+    quantity    int64[count]
+    price       int64[count]
+    version     int64[count]
+    category    uint32[count]       code into the category table
+    store       uint32[count]       code into the store table
+    sku_ref     uint32[count]       offset of the SKU in the string table
+    name_ref    uint32[count]       offset of the name in the string table
+    categories  uint32[n]           offsets of the category strings
+    stores      uint32[n]           offsets of the store strings
+    index       uint32[capacity]    open-addressing SKU hash index, row + 1 (0 = empty)
+    strings     u32 length + UTF-8 bytes, back to back
+
+Sections are 8-byte aligned and use native byte order; a snapshot is a
+local cache of the WAL, not an exchange format. Opening one costs the same
+whatever the catalogue size. The mapping is copy-on-write (ACCESS_COPY):
+every process opening the same file shares its pages until it changes one
+of them, and changes never reach the file.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import Optional
+
+
+MAGIC = b"RSINV\x00\x00\x02"
+_HEADER = struct.Struct("=8s8sQQII" + "Q" * (2 + 11))
+_BYTE_ORDER = sys.byteorder.encode().ljust(8, b"\x00")
+_SECTIONS = ("quantity", "price", "version", "category", "store", "sku_ref", "name_ref",
+             "categories", "stores", "index", "strings")
+_LENGTH = struct.Struct("=I")
+
+
+class SnapshotError(Exception):
+    """The snapshot file is not one this code can map."""
+
+
+def _index_capacity(count: int) -> int:
+    capacity = 8
+    while capacity < count * 2:
+        capacity *= 2
+    return capacity
+
+
+def _slot(key: bytes, capacity: int) -> int:
+    return zlib.crc32(key) & (capacity - 1)
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def write_snapshot(path: str, seq: int, columns) -> int:
+    """
+    Writes `columns` (an InventoryStore export) to `path` atomically.
+
+    Returns the number of items written.
+    """
+    count = len(columns.skus)
+    strings = bytearray()
+    offsets: dict[str, int] = {}
+
+    def ref(value: str) -> int:
+        offset = offsets.get(value)
+        if offset is None:
+            encoded = value.encode()
+            offset = offsets[value] = len(strings)
+            strings.extend(_LENGTH.pack(len(encoded)))
+            strings.extend(encoded)
+        return offset
+
+    sku_ref = array("I", (ref(sku) for sku in columns.skus))
+    name_ref = array("I", (ref(name) for name in columns.names))
+    categories = array("I", (ref(value) for value in columns.categories))
+    stores = array("I", (ref(value) for value in columns.stores))
+
+    capacity = _index_capacity(count)
+    index = array("I", bytes(4 * capacity))
+    for row, sku in enumerate(columns.skus):
+        slot = _slot(sku.encode(), capacity)
+        while index[slot]:
+            slot = (slot + 1) & (capacity - 1)
+        index[slot] = row + 1
+
+    sections = [array("q", columns.quantity), array("q", columns.price),
+                array("q", columns.version), array("I", columns.category), array("I", columns.store),
+                sku_ref, name_ref, categories, stores, index, bytes(strings)]
+    offsets_out, position = [], _align(_HEADER.size)
+    for section in sections:
+        offsets_out.append(position)
+        position = _align(position + len(memoryview(section).cast("B")))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, _BYTE_ORDER, seq, count, len(categories),
+                             len(stores), capacity, len(strings), *offsets_out))
+        for offset, section in zip(offsets_out, sections):
+            f.write(b"\x00" * (offset - f.tell()))
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+class MappedSnapshot:
+    """A snapshot file mapped copy-on-write; columns are views into it."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+            except ValueError as e:         # empty file
+                raise SnapshotError(f"{path}: {e}") from e
+        if len(self._map) < _HEADER.size:
+            raise SnapshotError(f"{path}: truncated header")
+        (magic, byte_order, self.seq, self.count, n_categories, n_stores,
+         self._capacity, strings_size, *offsets) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not an inventory snapshot")
+        if byte_order != _BYTE_ORDER:
+            raise SnapshotError(f"{path}: written on a {byte_order.rstrip(bytes(1)).decode()}"
+                                "-endian host")
+
+        view = memoryview(self._map)
+        lengths = (self.count,) * 7 + (n_categories, n_stores, self._capacity)
+        formats = ("q", "q", "q", "I", "I", "I", "I", "I", "I", "I")
+        columns = {}
+        for name, offset, length, fmt in zip(_SECTIONS, offsets, lengths, formats):
+            size = length * struct.calcsize(fmt)
+            if offset + size > len(self._map):
+                raise SnapshotError(f"{path}: section {name} is truncated")
+            columns[name] = view[offset:offset + size].cast(fmt)
+        strings_offset = offsets[-1]
+        if strings_offset + strings_size > len(self._map):
+            raise SnapshotError(f"{path}: string table is truncated")
+        self._strings = view[strings_offset:strings_offset + strings_size]
+
+        self.quantity = columns["quantity"]
+        self.price = columns["price"]
+        self.version = columns["version"]
+        self.category = columns["category"]
+        self.store = columns["store"]
+        self.sku_ref = columns["sku_ref"]
+        self.name_ref = columns["name_ref"]
+        self._index = columns["index"]
+        self.categories = [self.string(o) for o in columns["categories"]]
+        self.stores = [self.string(o) for o in columns["stores"]]
+
+    def _bytes(self, offset: int) -> memoryview:
+        (length,) = _LENGTH.unpack_from(self._strings, offset)
+        return self._strings[offset + 4:offset + 4 + length]
+
+    def string(self, offset: int) -> str:
+        return str(self._bytes(offset), "utf-8")
+
+    def find(self, sku: str) -> Optional[int]:
+        """Row of `sku`, probing the hash index."""
+        key = sku.encode()
+        mask = self._capacity - 1
+        slot = _slot(key, self._capacity)
+        while True:
+            entry = self._index[slot]
+            if not entry:
+                return None
+            if self._bytes(self.sku_ref[entry - 1]) == key:
+                return entry - 1
+            slot = (slot + 1) & mask
@@ -0,0 +1,388 @@
+"""
+Columnar in-memory store for the marketplace inventory.
+
+Items are kept as struct-of-arrays rather than one pydantic model per SKU:
+
+    skus, names         plain lists of str (one object per string, no wrapper)
+    category, store_id  uint32 codes into small interned string tables
+    quantity, price     int64 arrays
+    version             int64 array, bumped by every update
+
+A row is an item's position in every column; `_rows` maps SKU to row.
+Numeric columns are contiguous buffers, so filters and aggregates run as
+NumPy operations over views of them, without copying. Pydantic models are
+only built at the API boundary (see server.py).
+
+Updates lock only their item's stripe (one of STRIPES locks picked by
+row), so writers to different SKUs never wait for each other. Under that
+lock, update() checks the expected version, applies relative quantity
+changes, and journals the result (see journal.py). The log order
+therefore matches the order each item's changes were applied in. export()
+holds every stripe and takes a consistent copy tagged with the last
+journaled position.
+
+attach() backs an empty store with a memory-mapped snapshot
+(catalogue_snapshot.py) instead: the numeric columns are views into the
+mapping, strings are decoded when read and SKUs are found through the
+file's hash index. Nothing is loaded up front. Writes land in the private
+copy-on-write pages, and adding a new SKU copies the columns into memory
+first.
+"""
+
+import contextlib
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Collection, Iterable, Optional, Union
+
+import numpy as np
+
+from catalogue_snapshot import MappedSnapshot
+
+Column = Union[array, memoryview]
+
+STRIPES = 64                    # power of two
+INT64_MAX = 2**63 - 1           # quantity, price and version columns are int64
+_INT64_MIN = -2**63
+
+
+class VersionMismatch(Exception):
+    """The item changed since the version the caller based its update on."""
+
+    def __init__(self, current: int):
+        super().__init__(f"item is at version {current}")
+        self.current = current
+
+
+class InsufficientStock(Exception):
+    """A relative quantity change would take the stock below zero."""
+
+    def __init__(self, available: int):
+        super().__init__(f"only {available} in stock")
+        self.available = available
+
+
+class _StringTable:
+    """Interns a low-cardinality string column as uint32 codes."""
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = list(values)
+        self._codes: dict[str, int] = {v: code for code, v in enumerate(self.values)}
+        self._lock = threading.Lock()       # writers on different stripes may intern
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    self.values.append(value)
+                    code = self._codes[value] = len(self.values) - 1
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class _MappedStrings:
+    """A snapshot string column; values written since are kept aside."""
+
+    def __init__(self, snapshot: MappedSnapshot, refs: memoryview):
+        self._snapshot = snapshot
+        self._refs = refs
+        self._written: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __getitem__(self, row: int) -> str:
+        value = self._written.get(row)
+        if value is None:
+            value = self._snapshot.string(self._refs[row])
+        return value
+
+    def __setitem__(self, row: int, value: str) -> None:
+        self._written[row] = value
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+    def copy(self) -> "_MappedStrings":
+        copy = _MappedStrings(self._snapshot, self._refs)
+        copy._written = dict(self._written)
+        return copy
+
+
+class _MappedRows:
+    """SKU -> row lookups through the snapshot's hash index."""
+
+    def __init__(self, snapshot: MappedSnapshot):
+        self._snapshot = snapshot
+
+    def get(self, sku: str) -> Optional[int]:
+        return self._snapshot.find(sku)
+
+    def __contains__(self, sku: str) -> bool:
+        return self._snapshot.find(sku) is not None
+
+
+def _int64(field: str, value: int) -> int:
+    if not _INT64_MIN <= value <= INT64_MAX:
+        raise OverflowError(f"{field} {value} does not fit in 64 bits")
+    return value
+
+
+def _typecode(values: Column) -> str:
+    return values.typecode if isinstance(values, array) else values.format
+
+
+def _copy(values: Column) -> array:
+    copy = array(_typecode(values))
+    copy.frombytes(memoryview(values).cast("B"))
+    return copy
+
+
+@dataclass
+class Columns:
+    """A point-in-time copy of a store's columns (see InventoryStore.export)."""
+    skus: list[str]
+    names: list[str]
+    category: array
+    store: array
+    quantity: array
+    price: array
+    version: array
+    categories: list[str]
+    stores: list[str]
+
+
+class InventoryStore:
+    """Struct-of-arrays inventory with per-stripe write locks."""
+
+    def __init__(self, items: Iterable[dict] = ()):
+        self._skus: Union[list[str], _MappedStrings] = []
+        self._names: Union[list[str], _MappedStrings] = []
+        self._category: Column = array("I")
+        self._store: Column = array("I")
+        self._quantity: Column = array("q")
+        self._price: Column = array("q")
+        self._version: Column = array("q")
+        self._categories = _StringTable()
+        self._stores = _StringTable()
+        self._rows: Union[dict[str, int], _MappedRows] = {}
+        self._mapped = False
+        self._lock = threading.Lock()       # structure: appends, attach, column views
+        self._stripes = [threading.Lock() for _ in range(STRIPES)]
+        # Last journal position written under each stripe; their max is the
+        # store's position (see journal_seq).
+        self._stripe_seq = [0] * STRIPES
+        for item in items:
+            self.add(**item)
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        with self._lock, contextlib.ExitStack() as stack:
+            for stripe in self._stripes:
+                stack.enter_context(stripe)
+            yield
+
+    @property
+    def journal_seq(self) -> int:
+        """Journal position of the last change applied."""
+        return max(self._stripe_seq)
+
+    @journal_seq.setter
+    def journal_seq(self, seq: int) -> None:
+        self._stripe_seq = [seq] * STRIPES
+
+    def attach(self, snapshot: MappedSnapshot) -> None:
+        """Serves this (empty) store from a mapped snapshot."""
+        with self._exclusive():
+            if self._skus:
+                raise ValueError("can only attach a snapshot to an empty store")
+            self._skus = _MappedStrings(snapshot, snapshot.sku_ref)
+            self._names = _MappedStrings(snapshot, snapshot.name_ref)
+            self._category, self._store = snapshot.category, snapshot.store
+            self._quantity, self._price = snapshot.quantity, snapshot.price
+            self._version = snapshot.version
+            self._categories = _StringTable(snapshot.categories)
+            self._stores = _StringTable(snapshot.stores)
+            self._rows = _MappedRows(snapshot)
+            self._mapped = True
+            self.journal_seq = snapshot.seq
+
+    def _thaw(self) -> None:
+        # Mapped columns cannot grow: copy them into memory to append.
+        self._skus, self._names = list(self._skus), list(self._names)
+        self._category, self._store = _copy(self._category), _copy(self._store)
+        self._quantity, self._price = _copy(self._quantity), _copy(self._price)
+        self._version = _copy(self._version)
+        self._rows = {sku: row for row, sku in enumerate(self._skus)}
+        self._mapped = False
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._rows
+
+    def add(self, sku: str, name: str, category: str, quantity: int,
+            price_cents: int, store_id: str, version: int = 1) -> int:
+        """Appends an item (or overwrites the one with this SKU); returns its row."""
+        with self._exclusive():
+            row = self._rows.get(sku)
+            if row is not None:
+                self._write(row, {"name": name, "category": category,
+                                  "quantity": quantity, "price_cents": price_cents,
+                                  "store_id": store_id, "version": version})
+                return row
+            if self._mapped:
+                self._thaw()
+            row = self._rows[sku] = len(self._skus)
+            self._skus.append(sku)
+            self._names.append(name)
+            self._category.append(self._categories.code(category))
+            self._store.append(self._stores.code(store_id))
+            self._quantity.append(quantity)
+            self._price.append(price_cents)
+            self._version.append(version)
+            return row
+
+    def row(self, sku: str) -> Optional[int]:
+        return self._rows.get(sku)
+
+    def version(self, row: int) -> int:
+        return self._version[row]
+
+    def record(self, row: int) -> dict:
+        """
+        The item at `row` as a plain dict with the API field names, read
+        under its stripe lock so that every field matches `version`.
+        """
+        with self._stripes[row & (STRIPES - 1)]:
+            return self._record(row)
+
+    def _record(self, row: int) -> dict:
+        return {
+            "sku": self._skus[row],
+            "name": self._names[row],
+            "category": self._categories.values[self._category[row]],
+            "quantity": self._quantity[row],
+            "price_cents": self._price[row],
+            "store_id": self._stores.values[self._store[row]],
+            "version": self._version[row],
+        }
+
+    def rows(self, category: Optional[str] = None,
+             store_id: Optional[str] = None) -> Iterable[int]:
+        """Rows in insertion order, optionally only those of a category and/or store."""
+        filters = [(column, table.lookup(value)) for column, table, value in (
+            (self._category, self._categories, category),
+            (self._store, self._stores, store_id)) if value is not None]
+        if not filters:
+            return range(len(self._skus))
+        if any(code is None for _, code in filters):
+            return []
+        with self._lock:        # an exported buffer blocks appends meanwhile
+            match = np.logical_and.reduce([self._column(column) == code
+                                           for column, code in filters])
+            return np.flatnonzero(match).tolist()
+
+    def update(self, sku: str, changes: dict, *,
+               expected_versions: Optional[Collection[int]] = None,
+               quantity_delta: Optional[int] = None,
+               log: Optional[Callable[[str, dict], int]] = None) -> Optional[dict]:
+        """
+        Applies field changes to an existing item atomically.
+
+        Returns the updated record, or None for an unknown SKU. Raises
+        VersionMismatch when the item's current version is not one of
+        `expected_versions`, InsufficientStock when `quantity_delta` would take the
+        quantity below zero, and OverflowError when a value does not fit in
+        64 bits; the item is left unchanged in every case. On success the
+        version is bumped and `log(sku, applied)` is called, once the
+        changes are validated and before they are written, under the
+        stripe lock; if it raises, the item is left unchanged too. The
+        applied changes hold absolute values (quantity and version
+        included), so the log can be replayed with apply().
+        """
+        row = self._rows.get(sku)
+        if row is None:
+            return None
+        stripe = row & (STRIPES - 1)
+        with self._stripes[stripe]:
+            version = self._version[row]
+            if expected_versions is not None and version not in expected_versions:
+                raise VersionMismatch(version)
+            applied = dict(changes)
+            if quantity_delta is not None:
+                quantity = self._quantity[row] + quantity_delta
+                if quantity < 0:
+                    raise InsufficientStock(self._quantity[row])
+                applied["quantity"] = quantity
+            applied["version"] = version + 1
+            writes = self._prepare(applied)
+            if log is not None:
+                self._stripe_seq[stripe] = log(sku, applied)
+            for column, value in writes:
+                column[row] = value
+            return self._record(row)
+
+    def versions(self, rows: Iterable[int]) -> Union[array, list[int]]:
+        """The current version of each row, in order (an int64 array for a range)."""
+        version = self._version
+        if isinstance(rows, range) and rows.step == 1:
+            return _copy(version[rows.start:rows.stop])
+        return list(map(version.__getitem__, rows))
+
+    def apply(self, sku: str, changes: dict) -> Optional[int]:
+        """Writes already-resolved changes (a journal record) as they are."""
+        row = self._rows.get(sku)
+        if row is not None:
+            with self._stripes[row & (STRIPES - 1)]:
+                self._write(row, changes)
+        return row
+
+    def export(self) -> tuple[int, Columns]:
+        """A consistent copy of every column, with the journal position it reflects."""
+        with self._exclusive():
+            seq = self.journal_seq
+            # Mapped strings are decoded after the locks are released.
+            skus, names = (self._skus.copy(), self._names.copy()) if self._mapped \
+                else (list(self._skus), list(self._names))
+            columns = Columns(skus, names, _copy(self._category), _copy(self._store),
+                              _copy(self._quantity), _copy(self._price),
+                              _copy(self._version),
+                              list(self._categories.values), list(self._stores.values))
+        if self._mapped:
+            columns.skus, columns.names = list(skus), list(names)
+        return seq, columns
+
+    def _write(self, row: int, changes: dict) -> None:
+        for column, value in self._prepare(changes):
+            column[row] = value
+
+    def _prepare(self, changes: dict) -> list[tuple[object, object]]:
+        # Every value is checked and converted before any column is touched,
+        # so a bad change leaves the item as it was.
+        writes = []
+        for field, value in changes.items():
+            if field == "quantity":
+                writes.append((self._quantity, _int64(field, value)))
+            elif field == "price_cents":
+                writes.append((self._price, _int64(field, value)))
+            elif field == "version":
+                writes.append((self._version, _int64(field, value)))
+            elif field == "name":
+                writes.append((self._names, value))
+            elif field == "category":
+                writes.append((self._category, self._categories.code(value)))
+            elif field == "store_id":
+                writes.append((self._store, self._stores.code(value)))
+            else:
+                raise KeyError(f"unknown inventory field '{field}'")
+        return writes
+
+    @staticmethod
+    def _column(values: Column) -> np.ndarray:
+        return np.frombuffer(values, dtype=_typecode(values))
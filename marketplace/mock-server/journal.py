@@ -0,0 +1,316 @@
+"""
+Durable marketplace inventory: a write-ahead log plus periodic snapshots.
+
+Every PATCH is appended to the WAL as one line and acknowledged only once
+it is on disk. Concurrent writers share fsyncs (group commit): a single
+flusher thread writes everything appended while the previous fsync was in
+progress, then wakes all the writers it covered.
+
+    <data dir>/
+        snapshot.bin             mmap-able catalogue snapshot (catalogue_snapshot.py)
+        wal-000000000042.log     WAL segment whose first record is seq 42
+
+A WAL line is `<crc32 hex> <json>`, the JSON being {"seq", "sku", "set"}.
+"set" holds the fields' resolved values (relative quantity changes already
+applied, new version included), so replaying a record twice is harmless.
+A snapshot records the last seq it contains. Writing one rotates the WAL,
+and segments that are fully covered by the snapshot are deleted.
+
+On startup, recover() maps the snapshot, which loads nothing up front,
+then replays the WAL records after its seq. A torn last line, left by a
+crash mid-append, is truncated away. Corruption anywhere else raises
+JournalError instead of silently dropping writes.
+
+A change is applied in memory before its record is on disk, so other
+readers may see it up to one group commit before its writer is answered.
+Only durable changes are acknowledged, though: when an fsync fails, the
+writers it covered get JournalError and the log refuses every later
+append, so nothing is acknowledged that a restart would lose.
+"""
+
+import glob
+import os
+import threading
+import time
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import orjson
+
+from catalogue_snapshot import MappedSnapshot, SnapshotError, write_snapshot
+from inventory_store import InventoryStore
+
+
+SNAPSHOT = "snapshot.bin"
+_SEGMENT_GLOB = "wal-*.log"
+
+
+class JournalError(Exception):
+    """The WAL or snapshot on disk is unreadable."""
+
+
+def _segment_path(directory: str, first_seq: int) -> str:
+    return os.path.join(directory, f"wal-{first_seq:012d}.log")
+
+
+def _segments(directory: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(directory, _SEGMENT_GLOB)))
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ---------------------------------------------------------------------------
+# Write-ahead log
+# ---------------------------------------------------------------------------
+
+class WriteAheadLog:
+    """Append-only change log with group-commit fsync."""
+
+    def __init__(self, directory: str, next_seq: int = 1, commit_delay: float = 0.0):
+        self.directory = directory
+        self.commit_delay = commit_delay    # extra wait to grow a batch
+        self._last_seq = next_seq - 1       # last appended
+        self._durable = next_seq - 1        # last fsynced
+        self._pending: list[bytes] = []
+        self._file = open(_segment_path(directory, next_seq), "ab")
+        self._error: Optional[BaseException] = None
+        self._writing = False               # flusher holds a batch
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flusher = threading.Thread(target=self._run, name="wal-flusher",
+                                         daemon=True)
+        self._flusher.start()
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def append(self, sku: str, changes: dict) -> int:
+        """Queues one change; returns its seq. Durable after commit()."""
+        with self._cond:
+            if self._closed:
+                raise JournalError("write-ahead log is closed")
+            if self._error is not None:
+                raise JournalError("write-ahead log flush failed") from self._error
+            self._last_seq += 1
+            seq = self._last_seq
+            body = orjson.dumps({"seq": seq, "sku": sku, "set": changes})
+            self._pending.append(b"%08x %s\n" % (zlib.crc32(body), body))
+            self._cond.notify_all()
+            return seq
+
+    def commit(self) -> None:
+        """Blocks until everything appended so far is on disk."""
+        with self._cond:
+            target = self._last_seq
+            while self._durable < target and self._error is None:
+                self._cond.wait()
+            if self._durable < target:
+                raise JournalError("write-ahead log flush failed") from self._error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            if self.commit_delay:
+                time.sleep(self.commit_delay)
+            with self._cond:
+                batch, self._pending = self._pending, []
+                last, file = self._last_seq, self._file
+                self._writing = True
+            try:
+                file.write(b"".join(batch))
+                file.flush()
+                os.fsync(file.fileno())
+            except BaseException as e:
+                with self._cond:
+                    self._error = e
+                    self._writing = False
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = last
+                self._writing = False
+                self._cond.notify_all()
+
+    def rotate(self) -> None:
+        """Starts a new segment; records not yet written go to it."""
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            self._file.close()
+            self._file = open(_segment_path(self.directory, self._durable + 1), "ab")
+        _fsync_directory(self.directory)
+
+    def drop_through(self, seq: int) -> None:
+        """Deletes segments holding only records up to `seq`."""
+        segments = _segments(self.directory)
+        for path, following in zip(segments, segments[1:]):
+            if _first_seq(following) - 1 <= seq:
+                os.remove(path)
+
+    def close(self) -> None:
+        self.commit()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self._file.close()
+
+
+def _first_seq(path: str) -> int:
+    return int(os.path.basename(path)[4:-4])
+
+
+def read_log(directory: str, after_seq: int = 0) -> Iterator[tuple[int, str, dict]]:
+    """Yields (seq, sku, changes) for every record after `after_seq`."""
+    segments = _segments(directory)
+    for path in segments:
+        with open(path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        offset = 0
+        for i, line in enumerate(lines):
+            record = _parse(line)
+            if record is None:
+                # A crash mid-append leaves garbage only at the very end.
+                torn = path == segments[-1] and all(
+                    _parse(rest) is None for rest in lines[i + 1:])
+                if not torn:
+                    raise JournalError(f"corrupt WAL record in {path} at byte {offset}")
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+                break
+            offset += len(line)
+            if record["seq"] > after_seq:
+                yield record["seq"], record["sku"], record["set"]
+
+
+def _parse(line: bytes) -> Optional[dict]:
+    if not line.endswith(b"\n"):
+        return None
+    crc, _, body = line[:-1].partition(b" ")
+    try:
+        if int(crc, 16) != zlib.crc32(body):
+            return None
+        return orjson.loads(body)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Store + log
+# ---------------------------------------------------------------------------
+
+class DurableInventory:
+    """
+    Keeps an InventoryStore recoverable from `directory`.
+
+    A snapshot is taken every `snapshot_every` logged changes and on close().
+    """
+
+    def __init__(self, store: InventoryStore, directory: str,
+                 snapshot_every: int = 50_000, commit_delay: float = 0.0):
+        self.store = store
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.commit_delay = commit_delay
+        self.wal: Optional[WriteAheadLog] = None
+        self._snapshot_seq = 0
+        self._snapshot_due = threading.Event()
+        self._snapshot_lock = threading.Lock()
+        self._stopping = False
+        self._snapshotter: Optional[threading.Thread] = None
+
+    def recover(self, seed: Iterable[dict] = ()) -> dict:
+        """Loads the snapshot (or `seed` on first start) and replays the WAL."""
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, SNAPSHOT)
+        # The first snapshot is written before any change is accepted, so
+        # without one the WAL can only hold changes to the seed.
+        fresh = not os.path.exists(path)
+        if fresh:
+            for item in seed:
+                self.store.add(**item)
+        else:
+            try:
+                self.store.attach(MappedSnapshot(path))
+            except SnapshotError as e:
+                raise JournalError(str(e)) from e
+        snapshot_items = len(self.store)
+        self._snapshot_seq = last_seq = snapshot_seq = self.store.journal_seq
+
+        replayed = 0
+        for seq, sku, changes in read_log(self.directory, after_seq=snapshot_seq):
+            self.store.apply(sku, changes)
+            replayed += 1
+            last_seq = seq
+        # An empty segment still marks the seqs handed out before it.
+        last_seq = max([last_seq] + [_first_seq(p) - 1 for p in _segments(self.directory)])
+        self.store.journal_seq = last_seq
+
+        self.wal = WriteAheadLog(self.directory, next_seq=last_seq + 1,
+                                 commit_delay=self.commit_delay)
+        if fresh:
+            self.snapshot()
+        elif replayed:
+            self._snapshot_due.set()        # compact the tail without delaying startup
+        self._snapshotter = threading.Thread(target=self._snapshot_loop,
+                                             name="inventory-snapshots", daemon=True)
+        self._snapshotter.start()
+        return {"items": len(self.store), "snapshot_items": snapshot_items,
+                "replayed": replayed, "seconds": round(time.perf_counter() - started, 3)}
+
+    def update(self, sku: str, changes: dict, **conditions) -> Optional[dict]:
+        """
+        InventoryStore.update(), returning once the change is durable.
+
+        Readers may see the change before then (see the module docstring).
+        Raises JournalError if it could not be made durable; after that, the
+        log refuses further changes before they reach the store.
+        """
+        record = self.store.update(sku, changes, log=self.wal.append, **conditions)
+        if record is not None:
+            self.wal.commit()
+            if self.wal.last_seq - self._snapshot_seq >= self.snapshot_every:
+                self._snapshot_due.set()
+        return record
+
+    def snapshot(self) -> int:
+        """Writes a snapshot and drops the WAL it covers; returns its seq."""
+        with self._snapshot_lock:
+            path = os.path.join(self.directory, SNAPSHOT)
+            if self.store.journal_seq == self._snapshot_seq and os.path.exists(path):
+                return self._snapshot_seq
+            seq, columns = self.store.export()
+            self.wal.rotate()
+            write_snapshot(path, seq, columns)
+            _fsync_directory(self.directory)
+            self.wal.drop_through(seq)
+            self._snapshot_seq = seq
+            return seq
+
+    def _snapshot_loop(self) -> None:
+        while True:
+            self._snapshot_due.wait()
+            self._snapshot_due.clear()
+            if self._stopping:
+                return
+            self.snapshot()
+
+    def close(self) -> None:
+        self._stopping = True
+        self._snapshot_due.set()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self.snapshot()
+        self.wal.close()
@@ -2,16 +2,51 @@
 REST Mock Server - Partner Marketplace Inventory API
 
 Implements the endpoints defined in contracts/openapi.yaml using FastAPI.
-Uses an in-memory inventory list that resets on restart.
+Uses an in-memory columnar inventory (inventory_store.py); pydantic models
+are only built for request and response bodies. The inventory resets on
+restart unless MARKETPLACE_DATA_DIR points at a directory for its
+write-ahead log and snapshots (journal.py).
+
+MARKETPLACE_STORAGE=sqlite keeps the inventory in a SQLite database in
+MARKETPLACE_DATA_DIR instead (sqlite_inventory.py). Every process shares
+it, so MARKETPLACE_WORKERS can then start several uvicorn workers.
+
+Reads are encoded straight from the stored rows with orjson, skipping
+FastAPI's response_model re-validation; send `Accept: application/msgpack`
+to get MessagePack instead of JSON. The encoded bytes of the most recently
+read items are cached (MARKETPLACE_ENCODED_CACHE_ROWS per media type,
+16384 by default).
+
+Every successful PATCH is announced to the dashboard gateway's change
+hook (MARKETPLACE_CHANGE_HOOKS, comma-separated URLs, empty to disable;
+see observability/change_hooks.py), so its KPIs follow inventory writes.
 
 Run:     python marketplace/mock-server/server.py
 Swagger: http://localhost:8002/docs
+Metrics: http://localhost:8002/metrics
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from array import array
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Sequence
+import msgpack
+import orjson
 import uvicorn
+import threading
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from inventory_store import INT64_MAX, InsufficientStock, InventoryStore, VersionMismatch
+from journal import DurableInventory
+from sqlite_inventory import SqliteInventory
+
+# Add the project root to path to import the shared observability package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from observability import MetricsASGIMiddleware
+from observability.change_hooks import ChangeHooks
 
 
 # ---------------------------------------------------------------------------
@@ -26,103 +61,327 @@ class InventoryItem(BaseModel):
     quantity: int
     price_cents: int
     store_id: str
+    version: int
 
 
 class InventoryUpdate(BaseModel):
-    """Partial update payload. Only provided fields are applied."""
+    """
+    Partial update payload. Only provided fields are applied.
+
+    quantity_delta adjusts the stock relative to its current value, in the
+    same atomic step, so concurrent decrements never overwrite each other.
+    """
     name: Optional[str] = None
     category: Optional[str] = None
-    quantity: Optional[int] = None
-    price_cents: Optional[int] = None
+    quantity: Optional[int] = Field(None, ge=0, le=INT64_MAX)
+    quantity_delta: Optional[int] = Field(None, ge=-INT64_MAX, le=INT64_MAX)
+    price_cents: Optional[int] = Field(None, ge=0, le=INT64_MAX)
+
+    @model_validator(mode="after")
+    def _one_quantity_change(self):
+        if self.quantity is not None and self.quantity_delta is not None:
+            raise ValueError("send either quantity or quantity_delta, not both")
+        return self
 
 
 # ---------------------------------------------------------------------------
 # Mock data
 # ---------------------------------------------------------------------------
 
-inventory_db: list[InventoryItem] = [
-    InventoryItem(
-        sku="SKU001", name="Urban Wool Jacket - Black, L",
-        category="jackets", quantity=150, price_cents=4500,
-        store_id="STORE-PARIS-01",
-    ),
-    InventoryItem(
-        sku="SKU002", name="RetroFlex Sneaker - White, EU 42",
-        category="sneakers", quantity=320, price_cents=3200,
-        store_id="STORE-PARIS-01",
-    ),
-    InventoryItem(
-        sku="SKU003", name="Cashmere Scarf - Navy",
-        category="accessories", quantity=80, price_cents=2800,
-        store_id="STORE-BERLIN-02",
-    ),
-    InventoryItem(
-        sku="SKU004", name="Organic Cotton T-Shirt - Grey, M",
-        category="tops", quantity=500, price_cents=1200,
-        store_id="STORE-LONDON-03",
-    ),
-    InventoryItem(
-        sku="SKU005", name="Leather Messenger Bag - Brown",
-        category="bags", quantity=45, price_cents=8900,
-        store_id="STORE-BERLIN-02",
-    ),
+SEED_ITEMS = [
+    dict(sku="SKU001", name="Urban Wool Jacket - Black, L",
+         category="jackets", quantity=150, price_cents=4500,
+         store_id="STORE-PARIS-01"),
+    dict(sku="SKU002", name="RetroFlex Sneaker - White, EU 42",
+         category="sneakers", quantity=320, price_cents=3200,
+         store_id="STORE-PARIS-01"),
+    dict(sku="SKU003", name="Cashmere Scarf - Navy",
+         category="accessories", quantity=80, price_cents=2800,
+         store_id="STORE-BERLIN-02"),
+    dict(sku="SKU004", name="Organic Cotton T-Shirt - Grey, M",
+         category="tops", quantity=500, price_cents=1200,
+         store_id="STORE-LONDON-03"),
+    dict(sku="SKU005", name="Leather Messenger Bag - Brown",
+         category="bags", quantity=45, price_cents=8900,
+         store_id="STORE-BERLIN-02"),
 ]
 
+# Storage backends:
+#   memory  in this process. With MARKETPLACE_DATA_DIR set, it is persisted
+#           there (WAL + snapshots, see journal.py) and recovered at startup;
+#           without it, the inventory resets on restart. One worker only.
+#   sqlite  a database file in MARKETPLACE_DATA_DIR shared by all workers.
+# Either way the seed is only used for an empty directory.
+STORAGE = os.environ.get("MARKETPLACE_STORAGE", "memory")
+DATA_DIR = os.environ.get("MARKETPLACE_DATA_DIR")
+WORKERS = int(os.environ.get("MARKETPLACE_WORKERS", "1"))
+
+if STORAGE == "sqlite":
+    if not DATA_DIR:
+        raise SystemExit("MARKETPLACE_STORAGE=sqlite needs MARKETPLACE_DATA_DIR")
+    os.makedirs(DATA_DIR, exist_ok=True)
+    inventory = SqliteInventory(os.path.join(DATA_DIR, "inventory.sqlite3"))
+    durable = None
+elif STORAGE == "memory":
+    inventory = InventoryStore(() if DATA_DIR else SEED_ITEMS)
+    durable = DurableInventory(inventory, DATA_DIR) if DATA_DIR else None
+else:
+    raise SystemExit(f"Unknown MARKETPLACE_STORAGE '{STORAGE}' (memory or sqlite)")
+
 
 # ---------------------------------------------------------------------------
 # Application
 # ---------------------------------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if durable is not None:
+        stats = durable.recover(seed=SEED_ITEMS)
+        print(f"  Recovered {stats['items']} items from {DATA_DIR} "
+              f"({stats['replayed']} WAL records replayed in {stats['seconds']}s)")
+    elif STORAGE == "sqlite":
+        inventory.seed(SEED_ITEMS)
+    yield
+    if durable is not None:
+        durable.close()
+    elif STORAGE == "sqlite":
+        inventory.close()
+
+
 app = FastAPI(
     title="RetailSync - Partner Marketplace API",
     description="REST API for third-party boutiques to synchronise inventory.",
     version="1.0.0",
+    lifespan=lifespan,
 )
+app.add_middleware(MetricsASGIMiddleware, service="marketplace", router=app.router)
+change_hooks = ChangeHooks.from_env("marketplace", "MARKETPLACE_CHANGE_HOOKS")
 
 
-def find_item(sku: str) -> InventoryItem | None:
-    for item in inventory_db:
-        if item.sku == sku:
-            return item
-    return None
+def find_row(sku: str) -> int:
+    row = inventory.row(sku)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Item '{sku}' not found")
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Response encoding
+# ---------------------------------------------------------------------------
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        key, _, value = param.strip().partition("=")
+        if key.strip() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Picks JSON or MessagePack from an Accept header (JSON by default)."""
+    best, best_q = JSON, 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *params = media_range.split(";")
+        media_type = media_type.strip().lower()
+        q = _quality(params)
+        if media_type in _MSGPACK_TYPES and q > best_q:
+            best, best_q = MSGPACK, q
+        elif media_type in (JSON, "application/*", "*/*") and q > best_q:
+            best, best_q = JSON, q
+    return best
+
+
+_ENCODERS = {JSON: orjson.dumps, MSGPACK: msgpack.packb}
+ENCODED_CACHE_ROWS = int(os.environ.get("MARKETPLACE_ENCODED_CACHE_ROWS", "16384"))
+
+
+class EncodedRows:
+    """
+    Encoded bytes of recently read items in one media type, by store row.
+    Each slot remembers the item version it encodes and is only served
+    while the item is still at that version, so an update (from this
+    worker or another) never needs to invalidate it and a read racing an
+    update cannot leave stale bytes behind.
+
+    Slots are plain arrays indexed by row (16 bytes per row, up to the
+    highest row read), so a listing of a row range compares all versions
+    in one step. At most `max_entries` items stay encoded; the least
+    recently encoded or fetched alone goes first (listings do not refresh
+    their rows).
+    """
+
+    def __init__(self, media_type: str, max_entries: int):
+        self.encode = _ENCODERS[media_type]
+        self.max_entries = max_entries
+        self._versions = array("q")             # 0: not cached (versions start at 1)
+        self._data: list[Optional[bytes]] = []
+        self._order: dict[int, None] = {}       # cached rows, in eviction order
+        self._lock = threading.Lock()
+
+    def get(self, row: int) -> tuple[int, bytes]:
+        """The item's (version, bytes), consistent with each other."""
+        version = inventory.version(row)
+        with self._lock:
+            if row < len(self._versions) and self._versions[row] == version:
+                del self._order[row]
+                self._order[row] = None
+                return version, self._data[row]
+        record = inventory.record(row)
+        entry = (record["version"], self.encode(record))
+        self._store([(row, *entry)])
+        return entry
+
+    def get_many(self, rows: Sequence[int], versions: Sequence[int]) -> list[bytes]:
+        """Encoded rows; `versions` are their current versions, in order."""
+        with self._lock:
+            cached, data = self._versions, self._data
+            if isinstance(rows, range) and rows.step == 1 and isinstance(versions, array):
+                if cached[rows.start:rows.stop] == versions:
+                    return data[rows.start:rows.stop]
+            elif rows and max(rows) < len(cached) and \
+                    list(map(cached.__getitem__, rows)) == list(versions):
+                return list(map(data.__getitem__, rows))
+            parts, missing = [], []
+            size = len(cached)
+            for i, (row, version) in enumerate(zip(rows, versions)):
+                if row < size and cached[row] == version:
+                    parts.append(data[row])
+                else:
+                    parts.append(None)
+                    missing.append(i)
+        fresh = []
+        for i in missing:
+            # Stored values were validated on the way in; the record is
+            # serialised as is, tagged with the version it was read at.
+            record = inventory.record(rows[i])
+            parts[i] = self.encode(record)
+            fresh.append((rows[i], record["version"], parts[i]))
+        self._store(fresh)
+        return parts
+
+    def _store(self, fresh) -> None:
+        with self._lock:
+            cached, data, order = self._versions, self._data, self._order
+            for row, version, encoded in fresh:
+                if row >= len(cached):
+                    grow = row + 1 - len(cached)
+                    cached.extend(array("q", bytes(8 * grow)))
+                    data.extend([None] * grow)
+                cached[row], data[row] = version, encoded
+                order.pop(row, None)
+                order[row] = None
+            while len(order) > self.max_entries:
+                row = next(iter(order))
+                del order[row]
+                cached[row], data[row] = 0, None
+
+
+_encoded_rows = {media_type: EncodedRows(media_type, ENCODED_CACHE_ROWS)
+                 for media_type in _ENCODERS}
+
+
+def _encode_rows(rows: Sequence[int], media_type: str) -> bytes:
+    parts = _encoded_rows[media_type].get_many(rows, inventory.versions(rows))
+    if media_type == MSGPACK:
+        return msgpack.Packer().pack_array_header(len(parts)) + b"".join(parts)
+    return b"[" + b",".join(parts) + b"]"
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: Optional[str]) -> Optional[set[int]]:
+    """
+    Versions an If-Match header accepts; None when any version will do.
+
+    Weak or unparsable tags can never match (If-Match compares strongly),
+    so they contribute nothing and the update fails with 412.
+    """
+    if value is None or value.strip() == "*":
+        return None
+    versions = set()
+    for tag in value.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+
+def encoded(request: Request, rows) -> Response:
+    """
+    Encodes one store row, or a sequence of them, in the negotiated format.
+
+    Returning a Response makes FastAPI skip the response_model pass over
+    data that was validated when it was stored.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    headers = {"Vary": "Accept"}
+    if isinstance(rows, int):
+        version, body = _encoded_rows[media_type].get(rows)
+        headers["ETag"] = etag(version)
+    else:
+        body = _encode_rows(rows, media_type)
+    return Response(body, media_type=media_type, headers=headers)
 
 
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
+_ENCODED_RESPONSES = {200: {"content": {MSGPACK: {}}}}
+
+
 @app.get("/inventory", response_model=list[InventoryItem],
-         summary="List all inventory items")
-def list_inventory(category: Optional[str] = None):
-    """Returns the full inventory list, optionally filtered by category."""
-    if category:
-        return [item for item in inventory_db if item.category == category]
-    return inventory_db
+         responses=_ENCODED_RESPONSES, summary="List all inventory items")
+def list_inventory(request: Request, category: Optional[str] = None,
+                   store_id: Optional[str] = None):
+    """Returns the full inventory list, optionally filtered by category and store."""
+    return encoded(request, inventory.rows(category or None, store_id or None))
 
 
 @app.get("/inventory/{sku}", response_model=InventoryItem,
-         summary="Get a single inventory item by SKU")
-def get_inventory_item(sku: str):
+         responses=_ENCODED_RESPONSES, summary="Get a single inventory item by SKU")
+def get_inventory_item(request: Request, sku: str):
     """Returns one item identified by its SKU."""
-    item = find_item(sku)
-    if not item:
-        raise HTTPException(status_code=404, detail=f"Item '{sku}' not found")
-    return item
+    return encoded(request, find_row(sku))
 
 
 @app.patch("/inventory/{sku}", response_model=InventoryItem,
+           responses={409: {"description": "Not enough stock for quantity_delta"},
+                      412: {"description": "If-Match does not match the current version"}},
            summary="Partially update an inventory item")
-def update_inventory_item(sku: str, update: InventoryUpdate):
+def update_inventory_item(sku: str, update: InventoryUpdate,
+                          if_match: Optional[str] = Header(None)):
     """Applies a partial update to an existing inventory item."""
-    item = find_item(sku)
-    if not item:
+    changes = update.model_dump(exclude_unset=True, exclude_none=True)
+    delta = changes.pop("quantity_delta", None)
+    target = durable if durable is not None else inventory   # durable returns once synced
+    try:
+        record = target.update(sku, changes, expected_versions=parse_if_match(if_match),
+                               quantity_delta=delta)
+    except VersionMismatch as e:
+        raise HTTPException(status_code=412, headers={"ETag": etag(e.current)},
+                            detail=f"Item '{sku}' is at version {e.current}")
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409,
+                            detail=f"Item '{sku}' has only {e.available} in stock")
+    except OverflowError:               # quantity + quantity_delta past int64
+        raise HTTPException(status_code=422,
+                            detail=f"Item '{sku}' quantity would not fit in 64 bits")
+    if record is None:
         raise HTTPException(status_code=404, detail=f"Item '{sku}' not found")
-
-    update_data = update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(item, field, value)
-
-    return item
+    change_hooks.notify("inventory", record["store_id"])
+    return Response(orjson.dumps(record), media_type=JSON,
+                    headers={"ETag": etag(record["version"])})
 
 
 # ---------------------------------------------------------------------------
@@ -136,8 +395,19 @@ if __name__ == "__main__":
     print("  API endpoint  : http://localhost:8002")
     print("  Swagger UI    : http://localhost:8002/docs")
     print("  OpenAPI spec  : http://localhost:8002/openapi.json")
-    print("  Protocol      : REST / JSON over HTTP")
+    print("  Metrics       : http://localhost:8002/metrics")
+    print("  Protocol      : REST / JSON (or MessagePack) over HTTP")
+    print(f"  Storage       : {STORAGE}, {WORKERS} worker(s)")
+    print(f"  Data dir      : {DATA_DIR or '(in memory, resets on restart)'}")
     print("=" * 60)
     print()
 
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    if WORKERS > 1 and STORAGE != "sqlite":
+        raise SystemExit("Several workers would each hold their own inventory: "
+                         "set MARKETPLACE_STORAGE=sqlite to share it")
+    if WORKERS > 1:
+        # Workers import the app themselves, so uvicorn needs its import path.
+        uvicorn.run("server:app", host="0.0.0.0", port=8002, workers=WORKERS,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8002)
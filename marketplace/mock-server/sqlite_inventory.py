@@ -0,0 +1,184 @@
+"""
+Shared marketplace inventory in a SQLite database (WAL mode).
+
+InventoryStore lives in one process, so the REST server can only run one
+uvicorn worker with it. SqliteInventory offers the same read and update
+methods over a single database file that every worker opens. Readers in
+WAL mode never block the writer, and writers are serialised by SQLite's
+own lock (BEGIN IMMEDIATE), which takes the place of the store's stripes.
+
+    inventory(row, sku, name, category, quantity, price_cents, store_id,
+              version)
+
+`row` is the rowid and plays the role of an InventoryStore row. Every
+update bumps the item's version, which is how a worker tells that another
+one changed an item it has cached (see versions()).
+
+Each thread gets its own connection; sync FastAPI handlers run on a
+thread pool.
+"""
+
+import contextlib
+import sqlite3
+import threading
+from typing import Collection, Iterable, Optional
+
+from inventory_store import InsufficientStock, VersionMismatch
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inventory (
+    row         INTEGER PRIMARY KEY,
+    sku         TEXT    NOT NULL UNIQUE,
+    name        TEXT    NOT NULL,
+    category    TEXT    NOT NULL,
+    quantity    INTEGER NOT NULL,
+    price_cents INTEGER NOT NULL,
+    store_id    TEXT    NOT NULL,
+    version     INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS inventory_category ON inventory (category, row);
+CREATE INDEX IF NOT EXISTS inventory_store ON inventory (store_id, row);
+"""
+
+_FIELDS = ("sku", "name", "category", "quantity", "price_cents", "store_id", "version")
+_WRITABLE = frozenset(_FIELDS) - {"sku"}
+_SELECT = f"SELECT {', '.join(_FIELDS)} FROM inventory"
+_IN_CHUNK = 500         # rows per `row IN (...)` lookup, under SQLite's variable limit
+
+
+class SqliteInventory:
+    """Inventory shared by every process that opens the same database file."""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Autocommit mode: transactions are opened explicitly below.
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            # Like the WAL in journal.py, a change is acknowledged once synced.
+            db.execute("PRAGMA synchronous=FULL")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _immediate(db: sqlite3.Connection):
+        # Takes the write lock up front, so the read-check-write below cannot
+        # interleave with another worker's.
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def seed(self, items: Iterable[dict]) -> None:
+        """Inserts the items whose SKU is not stored yet (safe to race)."""
+        db = self._db()
+        with self._immediate(db):
+            db.executemany(
+                "INSERT OR IGNORE INTO inventory "
+                "(sku, name, category, quantity, price_cents, store_id) "
+                "VALUES (:sku, :name, :category, :quantity, :price_cents, :store_id)",
+                items)
+
+    def __len__(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM inventory").fetchone()[0]
+
+    def __contains__(self, sku: str) -> bool:
+        return self.row(sku) is not None
+
+    def row(self, sku: str) -> Optional[int]:
+        found = self._db().execute("SELECT row FROM inventory WHERE sku = ?", (sku,)).fetchone()
+        return found[0] if found else None
+
+    def version(self, row: int) -> int:
+        return self._db().execute("SELECT version FROM inventory WHERE row = ?",
+                                  (row,)).fetchone()[0]
+
+    def record(self, row: int) -> dict:
+        """The item at `row` as a plain dict with the API field names."""
+        values = self._db().execute(f"{_SELECT} WHERE row = ?", (row,)).fetchone()
+        return dict(zip(_FIELDS, values))
+
+    def rows(self, category: Optional[str] = None,
+             store_id: Optional[str] = None) -> list[int]:
+        """Rows in insertion order, optionally only those of a category and/or store."""
+        filters = {name: value for name, value in
+                   (("category", category), ("store_id", store_id)) if value is not None}
+        where = " AND ".join(f"{name} = ?" for name in filters)
+        found = self._db().execute(
+            f"SELECT row FROM inventory {'WHERE ' + where if where else ''} ORDER BY row",
+            tuple(filters.values()))
+        return [row for (row,) in found]
+
+    def versions(self, rows: Iterable[int]) -> list[int]:
+        """
+        The current version of each row, in order. Rows that mostly fill
+        their span (a full listing) are read in one range scan, scattered
+        ones (a category) by primary key, so only the rows asked for are read.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        db = self._db()
+        low, high = min(rows), max(rows)
+        if high - low < 2 * len(rows):
+            current = dict(db.execute(
+                "SELECT row, version FROM inventory WHERE row BETWEEN ? AND ?",
+                (low, high)))
+        else:
+            current = {}
+            for start in range(0, len(rows), _IN_CHUNK):
+                chunk = rows[start:start + _IN_CHUNK]
+                current.update(db.execute(
+                    f"SELECT row, version FROM inventory "
+                    f"WHERE row IN ({', '.join('?' * len(chunk))})", chunk))
+        return [current[row] for row in rows]
+
+    def update(self, sku: str, changes: dict, *,
+               expected_versions: Optional[Collection[int]] = None,
+               quantity_delta: Optional[int] = None) -> Optional[dict]:
+        """Same contract as InventoryStore.update(); durable once it returns."""
+        for field in changes:
+            if field not in _WRITABLE:
+                raise KeyError(f"unknown inventory field '{field}'")
+        db = self._db()
+        with self._immediate(db):
+            found = db.execute("SELECT row, quantity, version FROM inventory WHERE sku = ?",
+                               (sku,)).fetchone()
+            if found is None:
+                return None
+            row, quantity, version = found
+            if expected_versions is not None and version not in expected_versions:
+                raise VersionMismatch(version)
+            applied = dict(changes)
+            if quantity_delta is not None:
+                if quantity + quantity_delta < 0:
+                    raise InsufficientStock(quantity)
+                applied["quantity"] = quantity + quantity_delta
+            applied["version"] = version + 1
+            assignments = ", ".join(f"{field} = ?" for field in applied)
+            db.execute(f"UPDATE inventory SET {assignments} WHERE row = ?",
+                       (*applied.values(), row))
+            return self.record(row)
+
+    def close(self) -> None:
+        with self._lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,137 @@
+"""
+Conditional and relative updates of the inventory API, consistent reads,
+and string updates on a memory-mapped snapshot.
+
+    python -m pytest marketplace/mock-server
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from catalogue_snapshot import MappedSnapshot, write_snapshot
+from inventory_store import InventoryStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ITEMS = [
+    dict(sku=f"SKU{i:03d}", name=f"Item {i}", category="tops", quantity=100,
+         price_cents=1000, store_id="STORE-PARIS-01")
+    for i in range(4)
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    os.environ["MARKETPLACE_CHANGE_HOOKS"] = ""     # no gateway to notify
+    spec = importlib.util.spec_from_file_location("marketplace_server",
+                                                  os.path.join(HERE, "server.py"))
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    with TestClient(server.app) as client:
+        yield client
+    del os.environ["MARKETPLACE_CHANGE_HOOKS"]
+
+
+def test_if_match(client):
+    etag = client.get("/inventory/SKU001").headers["etag"]
+    ok = client.patch("/inventory/SKU001", json={"quantity": 7},
+                      headers={"If-Match": etag})
+    assert ok.status_code == 200
+    assert ok.json()["quantity"] == 7
+    assert ok.headers["etag"] != etag
+
+    stale = client.patch("/inventory/SKU001", json={"quantity": 8},
+                         headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert stale.headers["etag"] == ok.headers["etag"]
+
+    weak = client.patch("/inventory/SKU001", json={"quantity": 8},
+                        headers={"If-Match": "W/" + ok.headers["etag"]})
+    assert weak.status_code == 412
+    assert client.get("/inventory/SKU001").json()["quantity"] == 7
+
+
+def test_quantity_delta(client):
+    before = client.get("/inventory/SKU002").json()
+    short = client.patch("/inventory/SKU002",
+                         json={"quantity_delta": -(before["quantity"] + 1)})
+    assert short.status_code == 409
+    assert client.get("/inventory/SKU002").json() == before
+
+    taken = client.patch("/inventory/SKU002", json={"quantity_delta": -5})
+    assert taken.status_code == 200
+    assert taken.json()["quantity"] == before["quantity"] - 5
+    assert taken.json()["version"] == before["version"] + 1
+
+    both = client.patch("/inventory/SKU002", json={"quantity": 1, "quantity_delta": 1})
+    assert both.status_code == 422
+
+
+def test_list_by_store(client):
+    listing = client.get("/inventory").json()
+    berlin = client.get("/inventory", params={"store_id": "STORE-BERLIN-02"}).json()
+    assert berlin == [item for item in listing if item["store_id"] == "STORE-BERLIN-02"]
+    assert berlin
+    category = berlin[0]["category"]
+    assert client.get("/inventory", params={"store_id": "STORE-BERLIN-02",
+                                            "category": category}).json() == \
+        [item for item in berlin if item["category"] == category]
+    assert client.get("/inventory", params={"store_id": "STORE-NOWHERE"}).json() == []
+
+
+def _mapped_store(tmp_path) -> InventoryStore:
+    seq, columns = InventoryStore(ITEMS).export()
+    path = str(tmp_path / "snapshot.bin")
+    write_snapshot(path, seq, columns)
+    store = InventoryStore()
+    store.attach(MappedSnapshot(path))
+    return store
+
+
+def test_record_matches_its_version(tmp_path):
+    # Update n renames the item to "n<n>" at version n + 1. Mapped strings
+    # are decoded by Python code, where the writer can slip in between
+    # the name and the version; a tiny switch interval makes it likely.
+    store = _mapped_store(tmp_path)
+    row = store.row("SKU000")
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            store.update("SKU000", {"name": f"n{n}"})
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        torn = [record for record in (store.record(row) for _ in range(20_000))
+                if record["version"] > 1 and record["name"] != f"n{record['version'] - 1}"]
+    finally:
+        stop.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+    assert torn == []
+
+
+def test_mapped_snapshot_string_updates(tmp_path):
+    store = _mapped_store(tmp_path)
+    store.update("SKU001", {"name": "Renamed ☃", "category": "outerwear",
+                            "store_id": "STORE-BERLIN-02"})
+
+    record = store.record(store.row("SKU001"))
+    assert (record["name"], record["category"], record["store_id"]) == \
+        ("Renamed ☃", "outerwear", "STORE-BERLIN-02")
+    assert store.record(store.row("SKU002"))["name"] == "Item 2"
+    assert store.rows("outerwear") == [store.row("SKU001")]
+
+    _, exported = store.export()
+    assert exported.names[store.row("SKU001")] == "Renamed ☃"
+    assert exported.skus == [item["sku"] for item in ITEMS]
@@ -0,0 +1,129 @@
+"""
+Write-ahead log and snapshot recovery of the durable inventory.
+
+    python -m pytest marketplace/mock-server
+"""
+
+import os
+import threading
+
+import pytest
+
+import journal
+from inventory_store import InventoryStore
+from journal import DurableInventory, JournalError, WriteAheadLog, read_log
+
+SEED = [
+    dict(sku=f"SKU{i:03d}", name=f"Item {i}", category="tops", quantity=100,
+         price_cents=1000, store_id="STORE-PARIS-01")
+    for i in range(8)
+]
+
+
+def _segment(directory) -> str:
+    (path,) = journal._segments(str(directory))
+    return path
+
+
+def test_group_commit_shares_fsyncs(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(journal.os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    wal = WriteAheadLog(str(tmp_path), commit_delay=0.05)
+    start = threading.Barrier(16)
+
+    def writer(n):
+        start.wait()
+        wal.append(f"SKU{n:03d}", {"quantity": n})
+        wal.commit()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wal.close()
+
+    assert len(fsyncs) < 16
+    records = list(read_log(str(tmp_path)))
+    assert [seq for seq, _, _ in records] == list(range(1, 17))
+    assert sorted(changes["quantity"] for _, _, changes in records) == list(range(16))
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    wal = WriteAheadLog(str(tmp_path))
+    for n in range(3):
+        wal.append("SKU000", {"quantity": n})
+    wal.close()
+    path = _segment(tmp_path)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(b'0badc0de {"seq": 4, "sku": "SK')     # crash mid-append
+
+    assert [seq for seq, _, _ in read_log(str(tmp_path))] == [1, 2, 3]
+    assert os.path.getsize(path) == size
+
+
+def test_mid_log_corruption_raises(tmp_path):
+    wal = WriteAheadLog(str(tmp_path))
+    for n in range(3):
+        wal.append("SKU000", {"quantity": n})
+    wal.close()
+    path = _segment(tmp_path)
+    with open(path, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    lines[1] = lines[1].replace(b'"quantity":1', b'"quantity":7')
+    with open(path, "wb") as f:
+        f.writelines(lines)
+
+    with pytest.raises(JournalError):
+        list(read_log(str(tmp_path)))
+
+
+def test_recover_replays_wal_after_snapshot(tmp_path):
+    durable = DurableInventory(InventoryStore(), str(tmp_path))
+    durable.recover(seed=SEED)
+    durable.update("SKU001", {"quantity": 11})
+    snapshot_seq = durable.snapshot()
+    durable.update("SKU002", {}, quantity_delta=-30)
+    durable.update("SKU001", {"name": "Renamed"}, expected_versions={2})
+    durable.wal.close()                 # crash: no snapshot on the way out
+
+    store = InventoryStore()
+    stats = DurableInventory(store, str(tmp_path)).recover()
+    assert stats["replayed"] == 2
+    assert store.journal_seq == snapshot_seq + 2
+    first = store.record(store.row("SKU001"))
+    assert (first["name"], first["quantity"], first["version"]) == ("Renamed", 11, 3)
+    assert store.record(store.row("SKU002"))["quantity"] == 70
+
+
+def test_snapshot_drops_covered_segments(tmp_path):
+    durable = DurableInventory(InventoryStore(), str(tmp_path))
+    durable.recover(seed=SEED)
+    for n in range(3):
+        durable.update("SKU003", {"quantity": n})
+    seq = durable.snapshot()
+    durable.update("SKU003", {"quantity": 99})
+    durable.close()
+
+    # Only segments holding records after a snapshot are kept.
+    first_seqs = [journal._first_seq(p) for p in journal._segments(str(tmp_path))]
+    assert first_seqs and all(first > seq for first in first_seqs)
+    assert DurableInventory(InventoryStore(), str(tmp_path)).recover()["replayed"] == 0
+
+
+def test_failed_fsync_refuses_later_changes(tmp_path, monkeypatch):
+    durable = DurableInventory(InventoryStore(), str(tmp_path))
+    durable.recover(seed=SEED)
+
+    def failing_fsync(fd):
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(journal.os, "fsync", failing_fsync)
+    with pytest.raises(JournalError):
+        durable.update("SKU004", {"quantity": 1})
+    version = durable.store.version(durable.store.row("SKU005"))
+    with pytest.raises(JournalError):
+        durable.update("SKU005", {"quantity": 1})
+    assert durable.store.version(durable.store.row("SKU005")) == version
@@ -0,0 +1,54 @@
+"""
+Version lookups of the SQLite-backed inventory.
+
+    python -m pytest marketplace/mock-server
+"""
+
+import pytest
+
+from sqlite_inventory import SqliteInventory
+
+CATEGORIES = ("tops", "bags", "shoes")
+STORES = ("STORE-PARIS-01", "STORE-BERLIN-02")
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    inventory = SqliteInventory(str(tmp_path / "inventory.sqlite3"))
+    inventory.seed([
+        dict(sku=f"SKU{i:04d}", name=f"Item {i}", category=CATEGORIES[i % 3],
+             quantity=10, price_cents=100, store_id=STORES[i % 2])
+        for i in range(1200)
+    ])
+    yield inventory
+    inventory.close()
+
+
+def test_versions_of_a_listing(inventory):
+    rows = inventory.rows()
+    inventory.update("SKU0007", {"quantity": 1})
+    versions = inventory.versions(rows)
+    assert len(versions) == 1200
+    assert versions[rows.index(inventory.row("SKU0007"))] == 2
+    assert versions.count(1) == 1199
+
+
+def test_versions_of_scattered_rows(inventory):
+    rows = inventory.rows("bags")
+    for sku in ("SKU0001", "SKU1198", "SKU0002"):
+        inventory.update(sku, {"quantity": 3})
+    expected = [inventory.version(row) for row in rows]
+    assert inventory.versions(rows) == expected
+    assert expected.count(2) == 2                   # SKU0001 and SKU1198 are bags
+
+    sparse = [rows[-1], rows[0], rows[10]]          # spread out, any order
+    assert inventory.versions(sparse) == [inventory.version(row) for row in sparse]
+    assert inventory.versions([]) == []
+
+
+def test_rows_of_a_store(inventory):
+    assert inventory.rows(store_id="STORE-BERLIN-02") == \
+        [inventory.row(f"SKU{i:04d}") for i in range(1, 1200, 2)]
+    assert inventory.rows("bags", "STORE-BERLIN-02") == \
+        [inventory.row(f"SKU{i:04d}") for i in range(1, 1200, 6)]
+    assert inventory.rows(store_id="STORE-NOWHERE") == []
@@ -0,0 +1,19 @@
+"""Shared instrumentation for the RetailSync mock servers."""
+
+from .metrics import (
+    REGISTRY,
+    MetricsASGIMiddleware,
+    MetricsWSGIMiddleware,
+    backend_call,
+    start_metrics_server,
+    track_request,
+)
+
+__all__ = [
+    "REGISTRY",
+    "MetricsASGIMiddleware",
+    "MetricsWSGIMiddleware",
+    "backend_call",
+    "start_metrics_server",
+    "track_request",
+]
@@ -0,0 +1,98 @@
+"""
+Change hooks: a backend tells the dashboard gateway which store fields a
+write changed, so the gateway's KPIs follow writes instead of waiting for
+its next reconciliation.
+
+    hooks = ChangeHooks.from_env("marketplace", "MARKETPLACE_CHANGE_HOOKS")
+    hooks.notify("inventory", "STORE-PARIS-01")
+
+notify() only records the (field, store_id) pair. A daemon thread posts
+the pairs gathered over HOOK_BATCH_S to every hook URL as one JSON body,
+
+    {"changes": [{"field": "inventory", "store_id": "STORE-PARIS-01"}]}
+
+so a slow or absent gateway never delays the write, and a burst of
+writes costs one post. A pair notified again before it is sent is sent
+once. Failed posts are dropped and counted in retailsync_change_hooks_total,
+and the thread waits HOOK_RETRY_S before the next one; the gateway's
+periodic reconciliation catches up with whatever it missed.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from typing import Iterable
+
+from .metrics import REGISTRY
+
+DEFAULT_HOOKS = "http://localhost:8003/hooks/changes"   # the dashboard gateway
+HOOK_TIMEOUT = 2.0      # seconds
+HOOK_BATCH_S = 0.05     # gather notifications this long before posting
+HOOK_RETRY_S = 1.0      # pause after a failed post
+
+HOOK_POSTS = REGISTRY.counter(
+    "retailsync_change_hooks_total", "Change notifications posted to hooks.",
+    ("service", "outcome"))
+
+
+class ChangeHooks:
+    """Coalesces change notifications and posts them from a background thread."""
+
+    def __init__(self, service: str, urls: Iterable[str]):
+        self.service = service
+        self.urls = list(urls)
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[str, str], None] = {}     # ordered set
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._failing: set[str] = set()
+
+    @classmethod
+    def from_env(cls, service: str, variable: str) -> "ChangeHooks":
+        """Hook URLs from a comma-separated variable; empty disables them."""
+        value = os.environ.get(variable, DEFAULT_HOOKS)
+        return cls(service, [url.strip() for url in value.split(",") if url.strip()])
+
+    def notify(self, field: str, store_id: str) -> None:
+        if not self.urls:
+            return
+        with self._lock:
+            self._pending[(field, store_id)] = None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True,
+                                                name=f"{self.service}-change-hooks")
+                self._thread.start()
+        if not self._wakeup.is_set():       # cheap check on the write path
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            time.sleep(HOOK_BATCH_S)
+            self._wakeup.clear()            # before taking the batch: later pairs wake us again
+            with self._lock:
+                changes, self._pending = list(self._pending), {}
+            if not changes:
+                continue
+            body = json.dumps({"changes": [{"field": field, "store_id": store_id}
+                                           for field, store_id in changes]}).encode()
+            if not all([self._post(url, body) for url in self.urls]):
+                time.sleep(HOOK_RETRY_S)
+
+    def _post(self, url: str, body: bytes) -> bool:
+        request = urllib.request.Request(
+            url, data=body, method="POST",
+            headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=HOOK_TIMEOUT).close()
+        except OSError as e:
+            HOOK_POSTS.inc(service=self.service, outcome="error")
+            if url not in self._failing:        # report once per outage
+                self._failing.add(url)
+                print(f"{self.service} change hook {url} failed: {e}")
+            return False
+        HOOK_POSTS.inc(service=self.service, outcome="ok")
+        self._failing.discard(url)
+        return True
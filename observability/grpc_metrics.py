@@ -0,0 +1,109 @@
+"""
+gRPC server interceptor recording into observability.metrics.
+
+Unary calls are timed like HTTP requests. For streaming calls the duration
+is the stream's lifetime, in-flight counts open streams, sizes are the
+total bytes per stream, and every message is counted in
+retailsync_stream_messages_total.
+
+    server = grpc.server(executor, interceptors=[MetricsInterceptor("logistics")])
+    start_metrics_server(9100)
+"""
+
+import grpc
+
+from .metrics import STREAM_MESSAGES, track_request
+
+
+def _status(context, exc: BaseException) -> str:
+    # context.abort() raises after setting the code; anything else is a
+    # handler bug that surfaces to the client as UNKNOWN.
+    code = context.code() if hasattr(context, "code") else None
+    if isinstance(code, grpc.StatusCode):
+        return code.name
+    return "UNKNOWN" if exc is not None else "OK"
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Wraps every RPC handler of a server with request metrics."""
+
+    def __init__(self, service: str):
+        self.service = service
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        operation = handler_call_details.method.rsplit("/", 1)[-1]
+
+        if handler.unary_unary:
+            return handler._replace(
+                unary_unary=self._unary(handler.unary_unary, operation))
+        if handler.unary_stream:
+            return handler._replace(
+                unary_stream=self._streaming(handler.unary_stream, operation, False))
+        if handler.stream_unary:
+            return handler._replace(
+                stream_unary=self._client_streaming(handler.stream_unary, operation))
+        return handler._replace(
+            stream_stream=self._streaming(handler.stream_stream, operation, True))
+
+    def _unary(self, behavior, operation):
+        def wrapper(request, context):
+            with track_request(self.service, operation) as tracker:
+                tracker.request_bytes = request.ByteSize()
+                try:
+                    response = behavior(request, context)
+                except BaseException as e:
+                    tracker.status = _status(context, e)
+                    raise
+                tracker.status = _status(context, None)
+                tracker.response_bytes = response.ByteSize()
+                return response
+        return wrapper
+
+    def _counted(self, requests, operation, tracker):
+        for request in requests:
+            tracker.request_bytes += request.ByteSize()
+            STREAM_MESSAGES.inc(service=self.service, operation=operation,
+                                direction="received")
+            yield request
+
+    def _client_streaming(self, behavior, operation):
+        def wrapper(request_iterator, context):
+            with track_request(self.service, operation) as tracker:
+                tracker.request_bytes = 0
+                try:
+                    response = behavior(
+                        self._counted(request_iterator, operation, tracker), context)
+                except BaseException as e:
+                    tracker.status = _status(context, e)
+                    raise
+                tracker.status = _status(context, None)
+                tracker.response_bytes = response.ByteSize()
+                return response
+        return wrapper
+
+    def _streaming(self, behavior, operation, client_streams: bool):
+        def wrapper(request, context):
+            with track_request(self.service, operation) as tracker:
+                if client_streams:
+                    tracker.request_bytes = 0
+                    request = self._counted(request, operation, tracker)
+                else:
+                    tracker.request_bytes = request.ByteSize()
+                tracker.response_bytes = 0
+                try:
+                    for response in behavior(request, context):
+                        tracker.response_bytes += response.ByteSize()
+                        STREAM_MESSAGES.inc(service=self.service, operation=operation,
+                                            direction="sent")
+                        yield response
+                except GeneratorExit:
+                    tracker.status = "CANCELLED"
+                    raise
+                except BaseException as e:
+                    tracker.status = _status(context, e)
+                    raise
+                tracker.status = _status(context, None)
+        return wrapper
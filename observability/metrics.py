@@ -0,0 +1,421 @@
+"""
+Dependency-free metrics in the Prometheus text exposition format.
+
+Every service records into the same metric families so one dashboard works
+across SOAP, REST, GraphQL and gRPC:
+
+    retailsync_requests_total               counter   service, operation, status
+    retailsync_request_duration_seconds     histogram service, operation
+    retailsync_requests_in_flight           gauge     service, operation
+    retailsync_request_size_bytes           histogram service, operation
+    retailsync_response_size_bytes          histogram service, operation
+    retailsync_stream_messages_total        counter   service, operation, direction
+    retailsync_backend_duration_seconds     histogram service, backend, outcome
+    retailsync_change_hooks_total           counter   service, outcome
+
+HTTP services mount MetricsWSGIMiddleware / MetricsASGIMiddleware, which time
+each request and answer GET /metrics. The gRPC server uses the interceptor in
+observability.grpc_metrics and serves /metrics on a side port. Change hook
+posts are counted by observability.change_hooks.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+OTHER = "other"     # operation label for requests outside the known set
+HTTP_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, "
+                             f"got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (+Inf last), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key: tuple, state) -> list[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket"
+                         f"{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Holds metric families and renders them for a scrape."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames=(),
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> bytes:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "retailsync_requests_total", "Requests handled.",
+    ("service", "operation", "status"))
+REQUEST_DURATION = REGISTRY.histogram(
+    "retailsync_request_duration_seconds", "Request handling time.",
+    ("service", "operation"))
+IN_FLIGHT = REGISTRY.gauge(
+    "retailsync_requests_in_flight", "Requests currently being handled.",
+    ("service", "operation"))
+REQUEST_SIZE = REGISTRY.histogram(
+    "retailsync_request_size_bytes", "Request payload size.",
+    ("service", "operation"), SIZE_BUCKETS)
+RESPONSE_SIZE = REGISTRY.histogram(
+    "retailsync_response_size_bytes", "Response payload size.",
+    ("service", "operation"), SIZE_BUCKETS)
+STREAM_MESSAGES = REGISTRY.counter(
+    "retailsync_stream_messages_total", "Messages sent or received on streams.",
+    ("service", "operation", "direction"))
+BACKEND_DURATION = REGISTRY.histogram(
+    "retailsync_backend_duration_seconds", "Time spent calling a downstream backend.",
+    ("service", "backend", "outcome"))
+
+
+# ---------------------------------------------------------------------------
+# Recording helpers
+# ---------------------------------------------------------------------------
+
+class track_request:
+    """
+    Times one request. Set `status`, `request_bytes` and `response_bytes`
+    on the tracker before it exits; an exception records status "error".
+
+        with track_request("procurement", "SubmitOrder") as t:
+            ...
+            t.status = "200"
+    """
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self.status = "ok"
+        self.request_bytes: int | None = None
+        self.response_bytes: int | None = None
+
+    def __enter__(self):
+        IN_FLIGHT.inc(service=self.service, operation=self.operation)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = {"service": self.service, "operation": self.operation}
+        REQUEST_DURATION.observe(time.perf_counter() - self._started, **labels)
+        IN_FLIGHT.dec(**labels)
+        if exc_type is not None and self.status == "ok":
+            self.status = "error"
+        REQUESTS.inc(status=self.status, **labels)
+        if self.request_bytes is not None:
+            REQUEST_SIZE.observe(self.request_bytes, **labels)
+        if self.response_bytes is not None:
+            RESPONSE_SIZE.observe(self.response_bytes, **labels)
+        return False
+
+
+class backend_call:
+    """Times one downstream call made by a gateway (outcome ok/error)."""
+
+    def __init__(self, service: str, backend: str):
+        self.service = service
+        self.backend = backend
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        BACKEND_DURATION.observe(time.perf_counter() - self._started,
+                                 service=self.service, backend=self.backend,
+                                 outcome="error" if exc_type else "ok")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# WSGI / ASGI middleware
+# ---------------------------------------------------------------------------
+
+class MetricsWSGIMiddleware:
+    """
+    Serves GET /metrics and times every other request. The operation label
+    is the operation named by the SOAPAction header (its last path segment,
+    e.g. SubmitOrder), otherwise the request path. Both come from the
+    client, so only the given `operations` and `paths` become label values;
+    anything else is counted as "other".
+    """
+
+    def __init__(self, app, service: str, operations: Iterable[str] = (),
+                 paths: Iterable[str] = ("/",), registry: Registry = REGISTRY):
+        self.app = app
+        self.service = service
+        self.operations = frozenset(operations)
+        self.paths = frozenset(paths)
+        self.registry = registry
+
+    def _operation(self, environ) -> str:
+        action = environ.get("HTTP_SOAPACTION", "").strip('" ')
+        if action:
+            name = action.rsplit("/", 1)[-1].rsplit("#", 1)[-1]
+            return name if name in self.operations else OTHER
+        path = environ.get("PATH_INFO", "/")
+        return path if path in self.paths else OTHER
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "/")
+        if path == "/metrics" and environ.get("REQUEST_METHOD") == "GET":
+            body = self.registry.render()
+            start_response("200 OK", [("Content-Type", CONTENT_TYPE),
+                                      ("Content-Length", str(len(body)))])
+            return [body]
+
+        tracker = track_request(self.service, self._operation(environ)).__enter__()
+        tracker.request_bytes = int(environ.get("CONTENT_LENGTH") or 0)
+
+        def tracking_start_response(status, headers, exc_info=None):
+            tracker.status = status.split(" ", 1)[0]
+            return start_response(status, headers, exc_info)
+
+        try:
+            result = self.app(environ, tracking_start_response)
+            try:
+                chunks = list(result)
+            finally:
+                # PEP 3333: the server calls close() on the app's iterable;
+                # having consumed it, so must we.
+                if hasattr(result, "close"):
+                    result.close()
+        except BaseException as e:
+            tracker.__exit__(type(e), e, e.__traceback__)
+            raise
+        tracker.response_bytes = sum(len(c) for c in chunks)
+        tracker.__exit__(None, None, None)
+        return chunks
+
+
+class MetricsASGIMiddleware:
+    """
+    ASGI counterpart for the FastAPI services. The operation label is the
+    method and the matched route template (e.g. PATCH /inventory/{sku}) so
+    SKUs do not become label values, and methods outside HTTP_METHODS are
+    counted as "other"; pass the app's router, since add_middleware hands
+    the middleware the inner stack:
+
+        app.add_middleware(MetricsASGIMiddleware, service="marketplace",
+                           router=app.router)
+    """
+
+    def __init__(self, app, service: str, router=None,
+                 registry: Registry = REGISTRY):
+        self.app = app
+        self.service = service
+        self.router = router if router is not None else app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"] == "/metrics" and scope["method"] == "GET":
+            body = self.registry.render()
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", CONTENT_TYPE.encode()),
+                                    (b"content-length", str(len(body)).encode())]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        state = {"status": "500", "request": 0, "response": 0}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["request"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = str(message["status"])
+            elif message["type"] == "http.response.body":
+                state["response"] += len(message.get("body", b""))
+            await send(message)
+
+        tracker = track_request(self.service, self._operation(scope))
+        with tracker:
+            await self.app(scope, counting_receive, counting_send)
+            tracker.status = state["status"]
+            tracker.request_bytes = state["request"]
+            tracker.response_bytes = state["response"]
+
+    def _operation(self, scope) -> str:
+        # Starlette-style routers expose routes with matches(scope); the
+        # first full match gives the template. Duck-typed to stay
+        # dependency-free.
+        method = scope["method"] if scope["method"] in HTTP_METHODS else OTHER
+        routes = getattr(self.router, "routes", None)
+        if routes is None:
+            return f"{method} {scope['path']}"
+        for route in routes:
+            matches = getattr(route, "matches", None)
+            if matches is not None and matches(scope)[0].name == "FULL":
+                return f"{method} {getattr(route, 'path', scope['path'])}"
+        return f"{method} unmatched"
+
+
+# ---------------------------------------------------------------------------
+# Side-port exporter (for non-HTTP services)
+# ---------------------------------------------------------------------------
+
+def start_metrics_server(port: int, registry: Registry = REGISTRY,
+                         host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves GET /metrics on its own port from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
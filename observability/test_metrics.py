@@ -0,0 +1,76 @@
+"""
+Label hygiene and iterable handling of the metrics middleware.
+
+    python -m pytest observability
+"""
+
+import asyncio
+
+import pytest
+
+from observability.metrics import REGISTRY, MetricsASGIMiddleware, MetricsWSGIMiddleware
+
+
+class ClosingBody:
+    """A WSGI response iterable that records whether it was closed."""
+
+    def __init__(self, chunks, fail: bool = False):
+        self.chunks = chunks
+        self.fail = fail
+        self.closed = False
+
+    def __iter__(self):
+        yield from self.chunks
+        if self.fail:
+            raise RuntimeError("body failed")
+
+    def close(self):
+        self.closed = True
+
+
+def wsgi_app(body):
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return body
+    return app
+
+
+def test_wsgi_closes_the_app_iterable():
+    body = ClosingBody([b"a", b"bc"])
+    middleware = MetricsWSGIMiddleware(wsgi_app(body), service="test-wsgi")
+    chunks = middleware({"PATH_INFO": "/", "REQUEST_METHOD": "POST"},
+                        lambda status, headers, exc_info=None: None)
+    assert b"".join(chunks) == b"abc"
+    assert body.closed
+
+
+def test_wsgi_closes_the_app_iterable_on_error():
+    body = ClosingBody([b"a"], fail=True)
+    middleware = MetricsWSGIMiddleware(wsgi_app(body), service="test-wsgi-error")
+    with pytest.raises(RuntimeError):
+        middleware({"PATH_INFO": "/", "REQUEST_METHOD": "POST"},
+                   lambda status, headers, exc_info=None: None)
+    assert body.closed
+
+
+@pytest.mark.parametrize("method, label", [
+    ("GET", "GET /x"), ("PATCH", "PATCH /x"), ("BREW", "other /x"),
+    ("get", "other /x"),
+])
+def test_asgi_unknown_methods_are_other(method, label):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    service = f"test-asgi-{method}"
+    middleware = MetricsASGIMiddleware(app, service=service)
+    asyncio.run(middleware({"type": "http", "method": method, "path": "/x"},
+                           receive, send))
+    assert f'service="{service}",operation="{label}",status="204"' \
+        in REGISTRY.render().decode()
@@ -0,0 +1,151 @@
+"""
+Minimal request tracing with W3C trace-context propagation.
+
+A Trace collects Spans for one request; the active span lives in a
+contextvar, so nested `span()` blocks become children automatically and
+outgoing calls can carry the current position as a `traceparent` header
+(or gRPC metadata entry):
+
+    trace = Trace.from_traceparent(request.headers.get("traceparent"))
+    with trace.activate():
+        with span("rest GET /inventory", backend="rest"):
+            httpx.get(url, headers=outgoing_headers())
+    trace.breakdown()       # JSON-friendly timing tree
+
+Outside an active trace, span() does nothing, so instrumented code paths
+cost next to nothing when tracing is off.
+"""
+
+import contextlib
+import contextvars
+import re
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "retailsync_span", default=None)
+
+
+@dataclass
+class Span:
+    trace: "Trace"
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    end: Optional[float] = None
+    attributes: dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "startMs": round((self.start - self.trace.start) * 1000, 3),
+            "durationMs": round((end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans recorded while handling one request."""
+
+    def __init__(self, trace_id: Optional[str] = None,
+                 parent_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.parent_id = parent_id           # caller's span, if propagated
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> "Trace":
+        """Continues the caller's trace when the header is valid."""
+        match = _TRACEPARENT_RE.match((header or "").strip().lower())
+        if match and match.group(1) != "0" * 32:
+            return cls(match.group(1), match.group(2))
+        return cls()
+
+    @contextlib.contextmanager
+    def activate(self, name: str = "request", **attributes):
+        """Opens the root span and makes this trace current."""
+        root = self._open(name, self.parent_id, attributes)
+        token = _current.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end = time.perf_counter()
+            _current.reset(token)
+
+    def _open(self, name: str, parent_id: Optional[str], attributes: dict) -> Span:
+        s = Span(self, name, secrets.token_hex(8), parent_id,
+                 time.perf_counter(), attributes=attributes)
+        with self._lock:
+            self.spans.append(s)
+        return s
+
+    def breakdown(self) -> dict:
+        with self._lock:
+            spans = [s.as_dict() for s in self.spans]
+        return {
+            "traceId": self.trace_id,
+            "durationMs": round((time.perf_counter() - self.start) * 1000, 3),
+            "spans": spans,
+        }
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes):
+    """Records a child of the current span; a no-op without an active trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace._open(name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def current_traceparent() -> Optional[str]:
+    """The traceparent value for a call made from the current span."""
+    current = _current.get()
+    if current is None:
+        return None
+    return f"00-{current.trace.trace_id}-{current.span_id}-01"
+
+
+def outgoing_headers() -> dict[str, str]:
+    """HTTP headers carrying the current trace context ({} when untraced)."""
+    value = current_traceparent()
+    return {TRACEPARENT: value} if value else {}
+
+
+def outgoing_metadata() -> tuple[tuple[str, str], ...]:
+    """gRPC metadata carrying the current trace context (() when untraced)."""
+    value = current_traceparent()
+    return ((TRACEPARENT, value),) if value else ()
+
+
+def inject_traceparent(request) -> None:
+    """httpx request event hook adding the current trace context."""
+    request.headers.update(outgoing_headers())
@@ -0,0 +1,28 @@
+"""
+Reusable client for the RetailSync Procurement Service (SOAP).
+
+Built ahead of time from the service WSDL (see generate_stub.py), so
+importing it never fetches a WSDL.
+
+    from procurement.client import AsyncProcurementClient
+
+    async with AsyncProcurementClient(max_concurrency=20) as client:
+        page = await client.get_recent_orders("STORE-PARIS-01", summary_only=True)
+"""
+
+from ._stub import (
+    OrderItem, OrderList, OrderResponse, PurchaseOrder, DEFAULT_ENDPOINT,
+)
+from .client import AsyncProcurementClient, ProcurementClient
+from .codec import ProcurementFault
+
+__all__ = [
+    "AsyncProcurementClient",
+    "ProcurementClient",
+    "ProcurementFault",
+    "OrderItem",
+    "OrderList",
+    "OrderResponse",
+    "PurchaseOrder",
+    "DEFAULT_ENDPOINT",
+]
@@ -0,0 +1,139 @@
+"""
+Procurement Service stub - GENERATED, do not edit.
+
+Source: http://localhost:8001/?wsdl
+Regenerate: python -m procurement.client.generate_stub
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+
+NAMESPACE = 'http://retailsync.retail/procurement'
+DEFAULT_ENDPOINT = 'http://localhost:8001/'
+
+
+@dataclass
+class OrderItem:
+    sku: Optional[str] = None
+    product_name: Optional[str] = None
+    quantity: Optional[int] = None
+    unit_price_cents: Optional[int] = None
+    manufacturing_id: Optional[str] = None
+
+
+@dataclass
+class PurchaseOrder:
+    order_id: Optional[str] = None
+    buyer_org_id: Optional[str] = None
+    supplier_org_id: Optional[str] = None
+    order_date: Optional[date] = None
+    currency: Optional[str] = None
+    items: Optional[list[OrderItem]] = None
+    total_price_cents: Optional[int] = None
+    item_count: Optional[int] = None
+    status: Optional[str] = None
+
+
+@dataclass
+class GetRecentOrdersRequest:
+    storeId: Optional[str] = None
+    since: Optional[date] = None
+    until: Optional[date] = None
+    pageSize: Optional[int] = None
+    pageToken: Optional[str] = None
+    summaryOnly: Optional[bool] = None
+
+
+@dataclass
+class OrderResponse:
+    confirmation_id: Optional[str] = None
+    status: Optional[str] = None
+    estimated_delivery: Optional[date] = None
+    total_price_cents: Optional[int] = None
+    message: Optional[str] = None
+
+
+@dataclass
+class OrderList:
+    orders: Optional[list[PurchaseOrder]] = None
+    nextPageToken: Optional[str] = None
+
+
+@dataclass
+class GetRecentOrders:
+    request: Optional[GetRecentOrdersRequest] = None
+
+
+@dataclass
+class SubmitOrderResponse:
+    SubmitOrderResult: Optional[OrderResponse] = None
+
+
+@dataclass
+class GetRecentOrdersResponse:
+    GetRecentOrdersResult: Optional[OrderList] = None
+
+
+@dataclass
+class SubmitOrder:
+    order: Optional[PurchaseOrder] = None
+
+
+# type name -> ((field, xsd or complex type, array item element), ...)
+SCHEMA = {'OrderItem': (('sku', 'string', None),
+               ('product_name', 'string', None),
+               ('quantity', 'integer', None),
+               ('unit_price_cents', 'integer', None),
+               ('manufacturing_id', 'string', None)),
+ 'PurchaseOrder': (('order_id', 'string', None),
+                   ('buyer_org_id', 'string', None),
+                   ('supplier_org_id', 'string', None),
+                   ('order_date', 'date', None),
+                   ('currency', 'string', None),
+                   ('items', 'OrderItem', 'OrderItem'),
+                   ('total_price_cents', 'integer', None),
+                   ('item_count', 'integer', None),
+                   ('status', 'string', None)),
+ 'GetRecentOrdersRequest': (('storeId', 'string', None),
+                            ('since', 'date', None),
+                            ('until', 'date', None),
+                            ('pageSize', 'integer', None),
+                            ('pageToken', 'string', None),
+                            ('summaryOnly', 'boolean', None)),
+ 'OrderResponse': (('confirmation_id', 'string', None),
+                   ('status', 'string', None),
+                   ('estimated_delivery', 'date', None),
+                   ('total_price_cents', 'integer', None),
+                   ('message', 'string', None)),
+ 'OrderList': (('orders', 'PurchaseOrder', 'PurchaseOrder'),
+               ('nextPageToken', 'string', None)),
+ 'GetRecentOrders': (('request', 'GetRecentOrdersRequest', None),),
+ 'SubmitOrderResponse': (('SubmitOrderResult', 'OrderResponse', None),),
+ 'GetRecentOrdersResponse': (('GetRecentOrdersResult', 'OrderList', None),),
+ 'SubmitOrder': (('order', 'PurchaseOrder', None),)}
+
+TYPES = {
+    'OrderItem': OrderItem,
+    'PurchaseOrder': PurchaseOrder,
+    'GetRecentOrdersRequest': GetRecentOrdersRequest,
+    'OrderResponse': OrderResponse,
+    'OrderList': OrderList,
+    'GetRecentOrders': GetRecentOrders,
+    'SubmitOrderResponse': SubmitOrderResponse,
+    'GetRecentOrdersResponse': GetRecentOrdersResponse,
+    'SubmitOrder': SubmitOrder,
+}
+
+# operation -> soapAction and (element, type) of the request and
+# response wrappers
+OPERATIONS = {'SubmitOrder': {'soap_action': 'SubmitOrder',
+                 'input': ('SubmitOrder', 'SubmitOrder'),
+                 'output': ('SubmitOrderResponse', 'SubmitOrderResponse')},
+ 'GetRecentOrders': {'soap_action': 'GetRecentOrders',
+                     'input': ('GetRecentOrders', 'GetRecentOrders'),
+                     'output': ('GetRecentOrdersResponse',
+                                'GetRecentOrdersResponse')}}
@@ -0,0 +1,183 @@
+"""
+Procurement Service clients.
+
+AsyncProcurementClient is the primary API: one pooled httpx.AsyncClient per
+instance, a semaphore bounding in-flight calls, and batch helpers that fan
+out over the pool. ProcurementClient is the same API for synchronous callers
+(e.g. the GraphQL dashboard's resolvers) on a pooled httpx.Client.
+
+Create one client per process (or per event loop for the async one) and
+share it; every call reuses the pooled keep-alive connections.
+"""
+
+import asyncio
+from datetime import date
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+import httpx
+
+from . import _stub
+from .codec import decode_response, encode_request
+from ._stub import OrderList, OrderResponse, PurchaseOrder
+
+
+DEFAULT_TIMEOUT = 5.0
+
+
+def _headers(operation: str) -> dict[str, str]:
+    action = _stub.OPERATIONS[operation]["soap_action"]
+    return {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": f'"{action}"'}
+
+
+def _recent_orders_request(store_id: str, since: Optional[date],
+                           until: Optional[date], page_size: Optional[int],
+                           page_token: Optional[str], summary_only: bool) -> dict:
+    return {"request": {
+        "storeId": store_id,
+        "since": since,
+        "until": until,
+        "pageSize": page_size,
+        "pageToken": page_token,
+        "summaryOnly": summary_only or None,
+    }}
+
+
+def _check_status(resp: httpx.Response) -> None:
+    # SOAP Faults travel as HTTP 500 with an envelope; decode_response
+    # turns those into ProcurementFault.
+    if resp.status_code not in (200, 500):
+        resp.raise_for_status()
+
+
+class AsyncProcurementClient:
+    """asyncio client with a shared connection pool and bounded concurrency."""
+
+    def __init__(self, endpoint: str = _stub.DEFAULT_ENDPOINT, *,
+                 max_connections: int = 20, max_concurrency: int = 10,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        self.endpoint = endpoint
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def _call(self, operation: str, **params):
+        body = encode_request(operation, **params)
+        async with self._semaphore:
+            resp = await self._http.post(self.endpoint, content=body,
+                                         headers=_headers(operation))
+        _check_status(resp)
+        return decode_response(operation, resp.content)
+
+    async def submit_order(self, order: PurchaseOrder) -> OrderResponse:
+        return await self._call("SubmitOrder", order=order)
+
+    async def get_recent_orders(self, store_id: str, *,
+                                since: Optional[date] = None,
+                                until: Optional[date] = None,
+                                page_size: Optional[int] = None,
+                                page_token: Optional[str] = None,
+                                summary_only: bool = False) -> OrderList:
+        return await self._call("GetRecentOrders", **_recent_orders_request(
+            store_id, since, until, page_size, page_token, summary_only))
+
+    async def iter_recent_orders(self, store_id: str, **filters
+                                 ) -> AsyncIterator[PurchaseOrder]:
+        """Yields every matching order, following nextPageToken."""
+        token = None
+        while True:
+            page = await self.get_recent_orders(store_id, page_token=token, **filters)
+            for order in page.orders or []:
+                yield order
+            token = page.nextPageToken
+            if not token:
+                return
+
+    # -- Batching ----------------------------------------------------------
+
+    async def submit_orders(self, orders: Iterable[PurchaseOrder], *,
+                            return_exceptions: bool = False) -> list:
+        """Submits many orders concurrently, in input order."""
+        return await asyncio.gather(
+            *(self.submit_order(o) for o in orders),
+            return_exceptions=return_exceptions,
+        )
+
+    async def get_recent_orders_many(self, store_ids: Iterable[str], *,
+                                     return_exceptions: bool = False,
+                                     **filters) -> dict[str, OrderList]:
+        """Fetches the first page for several stores concurrently."""
+        store_ids = list(store_ids)
+        pages = await asyncio.gather(
+            *(self.get_recent_orders(s, **filters) for s in store_ids),
+            return_exceptions=return_exceptions,
+        )
+        return dict(zip(store_ids, pages))
+
+
+class ProcurementClient:
+    """Synchronous client on a pooled, thread-safe httpx.Client."""
+
+    def __init__(self, endpoint: str = _stub.DEFAULT_ENDPOINT, *,
+                 max_connections: int = 20, timeout: float = DEFAULT_TIMEOUT,
+                 http_client: Optional[httpx.Client] = None):
+        self.endpoint = endpoint
+        self._owns_http = http_client is None
+        self._http = http_client or httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self._http.close()
+
+    def _call(self, operation: str, **params):
+        resp = self._http.post(self.endpoint,
+                               content=encode_request(operation, **params),
+                               headers=_headers(operation))
+        _check_status(resp)
+        return decode_response(operation, resp.content)
+
+    def submit_order(self, order: PurchaseOrder) -> OrderResponse:
+        return self._call("SubmitOrder", order=order)
+
+    def get_recent_orders(self, store_id: str, *,
+                          since: Optional[date] = None,
+                          until: Optional[date] = None,
+                          page_size: Optional[int] = None,
+                          page_token: Optional[str] = None,
+                          summary_only: bool = False) -> OrderList:
+        return self._call("GetRecentOrders", **_recent_orders_request(
+            store_id, since, until, page_size, page_token, summary_only))
+
+    def iter_recent_orders(self, store_id: str, **filters) -> Iterator[PurchaseOrder]:
+        """Yields every matching order, following nextPageToken."""
+        token = None
+        while True:
+            page = self.get_recent_orders(store_id, page_token=token, **filters)
+            yield from page.orders or []
+            token = page.nextPageToken
+            if not token:
+                return
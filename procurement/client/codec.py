@@ -0,0 +1,143 @@
+"""
+SOAP 1.1 envelope encoding/decoding driven by the generated stub.
+
+Requests are rendered by string concatenation from the SCHEMA field specs;
+responses are parsed once with lxml and mapped onto the stub dataclasses.
+No WSDL is read at runtime.
+"""
+
+from datetime import date
+
+from lxml import etree
+
+from . import _stub
+
+
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+_ENVELOPE_HEAD = (
+    f'<?xml version="1.0" encoding="UTF-8"?>'
+    f'<soapenv:Envelope xmlns:soapenv="{SOAP_ENV_NS}" '
+    f'xmlns:tns="{_stub.NAMESPACE}"><soapenv:Body>'
+)
+_ENVELOPE_TAIL = "</soapenv:Body></soapenv:Envelope>"
+
+
+class ProcurementFault(Exception):
+    """A SOAP Fault returned by the Procurement Service."""
+
+    def __init__(self, faultcode: str, faultstring: str):
+        super().__init__(f"{faultcode}: {faultstring}")
+        self.faultcode = faultcode
+        self.faultstring = faultstring
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _scalar_text(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, int):
+        return str(value)
+    return _escape(str(value))
+
+
+def _get(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _encode_fields(type_name: str, obj, out: list) -> None:
+    for name, field_type, item_element in _stub.SCHEMA[type_name]:
+        value = _get(obj, name)
+        if value is None:
+            continue
+        if item_element:
+            out.append(f"<tns:{name}>")
+            for item in value:
+                out.append(f"<tns:{item_element}>")
+                _encode_fields(field_type, item, out)
+                out.append(f"</tns:{item_element}>")
+            out.append(f"</tns:{name}>")
+        elif field_type in _stub.SCHEMA:
+            out.append(f"<tns:{name}>")
+            _encode_fields(field_type, value, out)
+            out.append(f"</tns:{name}>")
+        else:
+            out.append(f"<tns:{name}>{_scalar_text(value)}</tns:{name}>")
+
+
+def encode_request(operation: str, **params) -> bytes:
+    """Builds the SOAP envelope for an operation from its wrapper fields."""
+    element, type_name = _stub.OPERATIONS[operation]["input"]
+    out = [_ENVELOPE_HEAD, f"<tns:{element}>"]
+    _encode_fields(type_name, params, out)
+    out.append(f"</tns:{element}>")
+    out.append(_ENVELOPE_TAIL)
+    return "".join(out).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _parse_scalar(field_type: str, text: str):
+    if field_type in ("integer", "int", "long",
+                      "positiveInteger", "nonNegativeInteger"):
+        return int(text)
+    if field_type == "boolean":
+        return text in ("true", "1")
+    if field_type == "date":
+        return date.fromisoformat(text)
+    return text
+
+
+def _decode(type_name: str, element):
+    spec = {name: (field_type, item) for name, field_type, item
+            in _stub.SCHEMA[type_name]}
+    values = {}
+    for child in element:
+        name = etree.QName(child).localname
+        if name not in spec or child.get(XSI_NIL) == "true":
+            continue
+        field_type, item_element = spec[name]
+        if item_element:
+            values[name] = [_decode(field_type, item) for item in child]
+        elif field_type in _stub.SCHEMA:
+            values[name] = _decode(field_type, child)
+        else:
+            values[name] = _parse_scalar(field_type, child.text or "")
+    return _stub.TYPES[type_name](**values)
+
+
+def decode_response(operation: str, body: bytes):
+    """
+    Parses a response envelope and returns the operation's result object
+    (e.g. OrderResponse for SubmitOrder). Raises ProcurementFault on a
+    SOAP Fault.
+    """
+    root = etree.fromstring(body)
+    soap_body = root.find(f"{{{SOAP_ENV_NS}}}Body")
+    payload = soap_body[0]
+
+    if payload.tag == f"{{{SOAP_ENV_NS}}}Fault":
+        raise ProcurementFault(
+            payload.findtext("faultcode") or "",
+            payload.findtext("faultstring") or "",
+        )
+
+    _, type_name = _stub.OPERATIONS[operation]["output"]
+    wrapper = _decode(type_name, payload)
+    # Wrapped document/literal: the response holds a single *Result field.
+    (result_field, _, _), = _stub.SCHEMA[type_name]
+    return getattr(wrapper, result_field)
@@ -0,0 +1,181 @@
+"""
+Generates procurement/client/_stub.py from the Procurement Service WSDL.
+
+The stub holds one dataclass per XSD complexType plus the operation table
+(soapAction, request wrapper, response wrapper), so importing the client
+never has to fetch or parse a WSDL at runtime. Re-run this whenever the
+service contract changes.
+
+Run (with the SOAP mock server on port 8001):
+    python -m procurement.client.generate_stub
+    python -m procurement.client.generate_stub --wsdl path/or/url.wsdl
+"""
+
+import argparse
+import os
+import pprint
+import urllib.request
+
+from lxml import etree
+
+
+DEFAULT_WSDL = "http://localhost:8001/?wsdl"
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_stub.py")
+
+NS = {
+    "wsdl": "http://schemas.xmlsoap.org/wsdl/",
+    "soap": "http://schemas.xmlsoap.org/wsdl/soap/",
+    "xs": "http://www.w3.org/2001/XMLSchema",
+}
+
+PYTHON_TYPES = {
+    "string": "str",
+    "integer": "int",
+    "positiveInteger": "int",
+    "nonNegativeInteger": "int",
+    "int": "int",
+    "long": "int",
+    "boolean": "bool",
+    "date": "date",
+}
+
+
+def load_wsdl(source: str) -> etree._Element:
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source) as resp:
+            return etree.fromstring(resp.read())
+    return etree.parse(source).getroot()
+
+
+def local(qname: str) -> str:
+    return qname.split(":", 1)[-1]
+
+
+def parse_types(schema) -> dict[str, tuple]:
+    """Maps each complexType to a tuple of (field, type, array_item) specs."""
+    types = {}
+    for ctype in schema.findall("xs:complexType", NS):
+        fields = []
+        for el in ctype.findall("xs:sequence/xs:element", NS):
+            fields.append((el.get("name"), local(el.get("type")),
+                           el.get("maxOccurs") == "unbounded"))
+        types[ctype.get("name")] = fields
+
+    # Spyne wraps arrays in a type holding one unbounded element; fold
+    # those wrappers into list-valued fields on the owning type.
+    arrays = {name: fields[0] for name, fields in types.items()
+              if len(fields) == 1 and fields[0][2]}
+    specs = {}
+    for name, fields in types.items():
+        if name in arrays:
+            continue
+        spec = []
+        for field, type_name, _ in fields:
+            if type_name in arrays:
+                item_name, item_type, _ = arrays[type_name]
+                spec.append((field, item_type, item_name))
+            else:
+                spec.append((field, type_name, None))
+        specs[name] = tuple(spec)
+    return specs
+
+
+def parse_operations(root, schema) -> dict[str, dict]:
+    element_types = {
+        el.get("name"): local(el.get("type"))
+        for el in schema.findall("xs:element", NS)
+    }
+    messages = {
+        m.get("name"): local(m.find("wsdl:part", NS).get("element"))
+        for m in root.findall("wsdl:message", NS)
+    }
+    port_ops = {
+        op.get("name"): op for op in root.findall("wsdl:portType/wsdl:operation", NS)
+    }
+    operations = {}
+    for op in root.findall("wsdl:binding/wsdl:operation", NS):
+        name = op.get("name")
+        port_op = port_ops[name]
+        request = messages[local(port_op.find("wsdl:input", NS).get("message"))]
+        response = messages[local(port_op.find("wsdl:output", NS).get("message"))]
+        operations[name] = {
+            "soap_action": op.find("soap:operation", NS).get("soapAction"),
+            "input": (request, element_types[request]),
+            "output": (response, element_types[response]),
+        }
+    return operations
+
+
+def render(source: str, namespace: str, endpoint: str,
+           specs: dict[str, tuple], operations: dict[str, dict]) -> str:
+    lines = [
+        '"""',
+        "Procurement Service stub - GENERATED, do not edit.",
+        "",
+        f"Source: {source}",
+        "Regenerate: python -m procurement.client.generate_stub",
+        '"""',
+        "",
+        "from __future__ import annotations",
+        "",
+        "from dataclasses import dataclass",
+        "from datetime import date",
+        "from typing import Optional",
+        "",
+        "",
+        f"NAMESPACE = {namespace!r}",
+        f"DEFAULT_ENDPOINT = {endpoint!r}",
+        "",
+    ]
+    for name, spec in specs.items():
+        lines += ["", "@dataclass", f"class {name}:"]
+        for field_name, type_name, item in spec:
+            py_type = PYTHON_TYPES.get(type_name, type_name)
+            if item:
+                lines.append(f"    {field_name}: Optional[list[{py_type}]] = None")
+            else:
+                lines.append(f"    {field_name}: Optional[{py_type}] = None")
+        lines.append("")
+
+    lines += [
+        "",
+        "# type name -> ((field, xsd or complex type, array item element), ...)",
+        "SCHEMA = " + pprint.pformat(specs, width=80, sort_dicts=False),
+        "",
+        "TYPES = {",
+        *(f"    {n!r}: {n}," for n in specs),
+        "}",
+        "",
+        "# operation -> soapAction and (element, type) of the request and",
+        "# response wrappers",
+        "OPERATIONS = " + pprint.pformat(operations, width=80, sort_dicts=False),
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--wsdl", default=DEFAULT_WSDL,
+                        help=f"WSDL path or URL (default: {DEFAULT_WSDL})")
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+
+    root = load_wsdl(args.wsdl)
+    schema = root.find("wsdl:types/xs:schema", NS)
+    address = root.find("wsdl:service/wsdl:port/soap:address", NS)
+
+    code = render(
+        source=args.wsdl,
+        namespace=schema.get("targetNamespace"),
+        endpoint=address.get("location") if address is not None else "",
+        specs=parse_types(schema),
+        operations=parse_operations(root, schema),
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(code)
+    print(f"  Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Precompiled SOAP response serializer for the Procurement Service.
+
+Spyne's Soap11 out_protocol builds an lxml tree for every response by
+walking the model through reflection, then serialises the tree. The
+responses of SubmitOrder and GetRecentOrders have a fixed shape, so this
+module compiles each return type once into a flat list of tag fragments
+and per-field formatters, and renders responses by string concatenation.
+
+The output is byte-identical to the generic path. Spyne skips its own
+serialisation when a `method_return_object` listener has already set
+ctx.out_string, which is how install() hooks in. Any response the compiled
+templates cannot reproduce exactly falls back to the generic path.
+
+test_fast_serializer.py compares both paths byte for byte.
+"""
+
+import re
+from datetime import date
+
+from spyne.model.complex import Array, ComplexModelBase
+from spyne.model.primitive import Boolean, Date, Integer, Unicode
+
+
+XML_DECLARATION = "<?xml version='1.0' encoding='UTF-8'?>\n"
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+
+# Characters lxml would reject in text nodes; such responses take the
+# generic path so errors surface exactly as they do today.
+_INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+class Unsupported(Exception):
+    """Raised when a value or type cannot be rendered by the templates."""
+
+
+def _escape(text: str) -> str:
+    if _INVALID_XML_CHARS.search(text):
+        raise Unsupported("control character in text")
+    return (text.replace("&", "&amp;").replace("<", "&lt;")
+                .replace(">", "&gt;").replace("\r", "&#13;"))
+
+
+def _format_unicode(value) -> str:
+    if not isinstance(value, str):
+        raise Unsupported(f"expected str, got {type(value).__name__}")
+    return _escape(value)
+
+
+def _format_integer(value) -> str:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise Unsupported(f"expected int, got {type(value).__name__}")
+    return str(value)
+
+
+def _format_date(value) -> str:
+    if type(value) is not date:
+        raise Unsupported(f"expected date, got {type(value).__name__}")
+    return value.isoformat()
+
+
+def _format_boolean(value) -> str:
+    if not isinstance(value, bool):
+        raise Unsupported(f"expected bool, got {type(value).__name__}")
+    return "true" if value else "false"
+
+
+PRIMITIVE_FORMATTERS = (
+    (Boolean, _format_boolean),
+    (Integer, _format_integer),
+    (Date, _format_date),
+    (Unicode, _format_unicode),
+)
+
+
+def _element(prefix: str, name: str) -> tuple[str, str, str]:
+    tag = f"{prefix}:{name}"
+    return f"<{tag}>", f"</{tag}>", f"<{tag}/>"
+
+
+def compile_model(cls, prefix: str):
+    """
+    Compiles a ComplexModel subclass into a render(value, out) function that
+    appends the XML fragments of its child elements to `out`.
+    """
+    fields = []
+    for name, field_type in cls._type_info.items():
+        open_tag, close_tag, empty_tag = _element(prefix, name)
+
+        if issubclass(field_type, Array):
+            (item_name, item_type), = field_type._type_info.items()
+            item_open, item_close, item_empty = _element(prefix, item_name)
+            render_item = compile_model(item_type, prefix)
+
+            def render_array(items, out, render_item=render_item,
+                             item_open=item_open, item_close=item_close,
+                             item_empty=item_empty, open_tag=open_tag,
+                             close_tag=close_tag, empty_tag=empty_tag):
+                if not isinstance(items, (list, tuple)):
+                    raise Unsupported("array value is not a list")
+                if not items:
+                    out.append(empty_tag)
+                    return
+                out.append(open_tag)
+                for item in items:
+                    if item is None:
+                        raise Unsupported("null array member")
+                    children = []
+                    render_item(item, children)
+                    if children:
+                        out.append(item_open)
+                        out.extend(children)
+                        out.append(item_close)
+                    else:
+                        out.append(item_empty)
+                out.append(close_tag)
+
+            fields.append((name, render_array))
+            continue
+
+        if issubclass(field_type, ComplexModelBase):
+            raise Unsupported(f"nested complex field {cls.__name__}.{name}")
+
+        for primitive, formatter in PRIMITIVE_FORMATTERS:
+            if issubclass(field_type, primitive):
+                break
+        else:
+            raise Unsupported(f"field type of {cls.__name__}.{name}")
+
+        def render_primitive(value, out, formatter=formatter,
+                             open_tag=open_tag, close_tag=close_tag):
+            out.append(open_tag)
+            out.append(formatter(value))
+            out.append(close_tag)
+
+        fields.append((name, render_primitive))
+
+    # Array members are customised subclasses; instances are of the original.
+    model_cls = getattr(cls, "__orig__", None) or cls
+
+    def render(obj, out):
+        if not isinstance(obj, model_cls):
+            raise Unsupported(f"expected {model_cls.__name__}")
+        for name, render_field in fields:
+            value = getattr(obj, name, None)
+            if value is not None:
+                render_field(value, out)
+
+    return render
+
+
+class FastResponseSerializer:
+    """Renders wrapped SOAP 1.1 responses from precompiled templates."""
+
+    def __init__(self, application, operations):
+        nsmap = application.interface.nsmap
+        tns = application.interface.get_tns()
+        env_prefix = next(p for p, ns in nsmap.items() if ns == SOAP_ENV_NS)
+        tns_prefix = next(p for p, ns in nsmap.items() if ns == tns)
+
+        self._head = (
+            f'{XML_DECLARATION}<{env_prefix}:Envelope '
+            f'xmlns:{env_prefix}="{SOAP_ENV_NS}" xmlns:{tns_prefix}="{tns}">'
+            f'<{env_prefix}:Body>'
+        )
+        self._tail = f"</{env_prefix}:Body></{env_prefix}:Envelope>"
+        self._templates = {}
+
+        for service in application.services:
+            for name, descriptor in service.public_methods.items():
+                if name not in operations:
+                    continue
+                wrapper = descriptor.out_message
+                (result_name, result_type), = wrapper._type_info.items()
+                wrapper_open, wrapper_close, wrapper_empty = _element(
+                    tns_prefix, wrapper.get_type_name())
+                result_open, result_close, result_empty = _element(
+                    tns_prefix, result_name)
+                self._templates[name] = (
+                    compile_model(result_type, tns_prefix),
+                    wrapper_open, wrapper_close, wrapper_empty,
+                    result_open, result_close, result_empty,
+                )
+
+    def serialize(self, operation: str, result) -> bytes:
+        """Returns the full response document, or raises Unsupported."""
+        template = self._templates.get(operation)
+        if template is None:
+            raise Unsupported(f"operation {operation}")
+        (render, wrapper_open, wrapper_close, wrapper_empty,
+         result_open, result_close, result_empty) = template
+
+        out = [self._head]
+        if result is None:
+            out.append(wrapper_empty)
+        else:
+            children = []
+            render(result, children)
+            out.append(wrapper_open)
+            if children:
+                out.append(result_open)
+                out.extend(children)
+                out.append(result_close)
+            else:
+                out.append(result_empty)
+            out.append(wrapper_close)
+        out.append(self._tail)
+        return "".join(out).encode("utf-8")
+
+    def on_method_return_object(self, ctx):
+        """Spyne event listener: pre-renders ctx.out_string when possible."""
+        if ctx.out_error is not None or ctx.out_header is not None:
+            return
+        if ctx.out_object is None or len(ctx.out_object) != 1:
+            return
+        try:
+            ctx.out_string = [
+                self.serialize(ctx.descriptor.name, ctx.out_object[0])
+            ]
+        except Unsupported:
+            pass
+
+
+def install(application, operations) -> FastResponseSerializer:
+    """Registers the fast path for the given operations on a Spyne app."""
+    serializer = FastResponseSerializer(application, operations)
+    application.event_manager.add_listener(
+        "method_return_object", serializer.on_method_return_object)
+    return serializer
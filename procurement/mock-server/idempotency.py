@@ -0,0 +1,93 @@
+"""
+Idempotency layer for SubmitOrder.
+
+ERP clients retry SubmitOrder after network timeouts. Retries are keyed on
+(order_id, buyer_org_id): the first call is processed, every retry gets the
+original OrderResponse back. Recent responses live in a bounded TTL cache;
+older ones fall back to a lookup in the order store, so a retry that arrives
+after eviction is still never processed twice. Replays are counted in
+retailsync_procurement_replays_total, by where the response came from.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from observability import REGISTRY
+
+REPLAYS = REGISTRY.counter(
+    "retailsync_procurement_replays_total",
+    "SubmitOrder retries answered with the original response.", ("source",))
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class IdempotentSubmitter:
+    """
+    Runs a submit function at most once per idempotency key.
+
+    `lookup` is the durable fallback (the order store); `submit` does the
+    real work. Concurrent retries of the same key are serialised on a
+    striped lock so only one of them can reach `submit`.
+    """
+
+    STRIPES = 64
+
+    def __init__(self, submit: Callable, lookup: Callable[[Hashable], object],
+                 cache: TTLCache | None = None):
+        self._submit = submit
+        self._lookup = lookup
+        self.cache = cache if cache is not None else TTLCache()   # an empty one is falsy
+        self._locks = [threading.Lock() for _ in range(self.STRIPES)]
+
+    def __call__(self, key: Hashable, *args):
+        response = self.cache.get(key)
+        if response is not None:
+            REPLAYS.inc(source="cache")
+            return response
+
+        with self._locks[hash(key) % self.STRIPES]:
+            response = self.cache.get(key)
+            if response is not None:
+                REPLAYS.inc(source="cache")
+            else:
+                response = self._lookup(key)
+                if response is not None:
+                    REPLAYS.inc(source="store")
+                else:
+                    response = self._submit(*args)
+            self.cache.put(key, response)
+            return response
@@ -0,0 +1,103 @@
+"""
+In-memory order store for the SOAP Procurement Service.
+
+Orders are indexed per buyer organisation (store) and kept sorted by
+(order_date, order_id), so GetRecentOrders can apply a date range and walk
+one page at a time with bisect instead of scanning every order the store
+has ever placed.
+
+Page tokens are opaque keyset cursors: they encode the sort key of the last
+order returned, so pages stay stable when new orders arrive in between.
+"""
+
+import base64
+import binascii
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidPageToken(ValueError):
+    """Raised when a pageToken cannot be decoded."""
+
+
+def encode_page_token(key: tuple[int, str]) -> str:
+    ordinal, order_id = key
+    raw = f"{ordinal}|{order_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_page_token(token: str) -> tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii")).decode("utf-8")
+        ordinal, order_id = raw.split("|", 1)
+        return int(ordinal), order_id
+    except (UnicodeError, binascii.Error, ValueError) as exc:
+        raise InvalidPageToken(f"Invalid pageToken '{token}'") from exc
+
+
+class OrderStore:
+    """Thread-safe store of purchase orders, newest first per buyer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: dict[str, list[tuple[int, str]]] = {}
+        self._orders: dict[str, dict[tuple[int, str], object]] = {}
+        self._confirmations: dict[tuple[str, str], object] = {}
+
+    @staticmethod
+    def _key(order) -> tuple[int, str]:
+        order_date = order.order_date or date.today()
+        return order_date.toordinal(), order.order_id or ""
+
+    def add(self, order, confirmation=None) -> None:
+        """
+        Inserts (or replaces) an order under its buyer_org_id, optionally
+        with the OrderResponse that was returned when it was submitted.
+        """
+        buyer = order.buyer_org_id or ""
+        key = self._key(order)
+        with self._lock:
+            orders = self._orders.setdefault(buyer, {})
+            if key not in orders:
+                insort(self._keys.setdefault(buyer, []), key)
+            orders[key] = order
+            if confirmation is not None:
+                self._confirmations[(order.order_id, buyer)] = confirmation
+
+    def confirmation(self, order_id: str, buyer_org_id: str):
+        """Returns the stored OrderResponse for an order, or None."""
+        with self._lock:
+            return self._confirmations.get((order_id, buyer_org_id or ""))
+
+    def page(self, buyer_org_id: str, since: date | None = None,
+             until: date | None = None, page_size: int | None = None,
+             page_token: str | None = None) -> tuple[list, str | None]:
+        """
+        Returns one page of orders for a buyer, newest first, plus the
+        token for the next page (None when this is the last page).
+        Both ends of the date range are inclusive.
+        """
+        if not page_size or page_size < 1:
+            page_size = DEFAULT_PAGE_SIZE
+        page_size = min(page_size, MAX_PAGE_SIZE)
+
+        with self._lock:
+            keys = self._keys.get(buyer_org_id, [])
+            orders = self._orders.get(buyer_org_id, {})
+
+            lo = bisect_left(keys, (since.toordinal(), "")) if since else 0
+            hi = (bisect_left(keys, (until.toordinal() + 1, ""))
+                  if until else len(keys))
+            if page_token:
+                hi = min(hi, bisect_left(keys, decode_page_token(page_token)))
+
+            start = max(lo, hi - page_size)
+            page = [orders[key] for key in reversed(keys[start:hi])]
+            next_token = encode_page_token(keys[start]) if start > lo else None
+
+        return page, next_token
@@ -1,22 +1,38 @@
 """
 SOAP Mock Server - B2B Procurement Service
 
-Implements the SubmitOrder operation defined in contracts/PurchaseOrder.wsdl
-using Spyne (Python SOAP framework). Returns static confirmation data for
-demonstration purposes.
+Implements the SubmitOrder and GetRecentOrders operations defined in
+contracts/PurchaseOrder.wsdl using Spyne (Python SOAP framework). Returns
+static confirmation data for demonstration purposes.
 
-Run:  python procurement/mock-server/server.py
-WSDL: http://localhost:8001/?wsdl
+Each accepted order is announced to the dashboard gateway's change hook
+(PROCUREMENT_CHANGE_HOOKS, comma-separated URLs, empty to disable; see
+observability/change_hooks.py) so its pending-order KPI follows new orders.
+
+Run:     python procurement/mock-server/server.py
+WSDL:    http://localhost:8001/?wsdl
+Metrics: http://localhost:8001/metrics
 """
 
 from spyne import (
-    Application, Service, rpc,
-    Unicode, Integer, Date, Array, ComplexModel,
+    Application, Service, rpc, Fault,
+    Unicode, Integer, Boolean, Date, Array, ComplexModel,
 )
 from spyne.protocol.soap import Soap11
 from spyne.server.wsgi import WsgiApplication
 from wsgiref.simple_server import make_server
 from datetime import date, timedelta
+import os
+import sys
+
+# Add the project root to path to import the shared observability package
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from observability import MetricsWSGIMiddleware
+from observability.change_hooks import ChangeHooks
+
+from order_store import OrderStore, InvalidPageToken
+from idempotency import IdempotentSubmitter, TTLCache
+import fast_serializer
 
 
 # ---------------------------------------------------------------------------
@@ -38,12 +54,16 @@ class PurchaseOrder(ComplexModel):
     """Full purchase order sent to the manufacturer."""
     __namespace__ = "http://retailsync.retail/procurement"
 
-    order_id        = Unicode()
-    buyer_org_id    = Unicode()
-    supplier_org_id = Unicode()
-    order_date      = Date()
-    currency        = Unicode()
-    items           = Array(OrderItem)
+    order_id          = Unicode()
+    buyer_org_id      = Unicode()
+    supplier_org_id   = Unicode()
+    order_date        = Date()
+    currency          = Unicode()
+    items             = Array(OrderItem)
+    # Summary fields, computed by the service when the order is stored.
+    total_price_cents = Integer()
+    item_count        = Integer()
+    status            = Unicode()
 
 
 class OrderResponse(ComplexModel):
@@ -58,13 +78,119 @@ class OrderResponse(ComplexModel):
 
 
 class GetRecentOrdersRequest(ComplexModel):
+    """Date-range and paging filter for a store's order history."""
     __namespace__ = "http://retailsync.retail/procurement"
     storeId            = Unicode()
+    since              = Date()
+    until              = Date()
+    pageSize           = Integer()
+    pageToken          = Unicode()
+    summaryOnly        = Boolean()
 
 
 class OrderList(ComplexModel):
+    """One page of orders; nextPageToken is absent on the last page."""
     __namespace__ = "http://retailsync.retail/procurement"
     orders             = Array(PurchaseOrder)
+    nextPageToken      = Unicode()
+
+
+# ---------------------------------------------------------------------------
+# Mock data
+# ---------------------------------------------------------------------------
+
+order_store = OrderStore()
+change_hooks = ChangeHooks.from_env("procurement", "PROCUREMENT_CHANGE_HOOKS")
+
+# Lifecycle used for the mock history, newest order first.
+SEED_STATUSES = ("PENDING", "CONFIRMED", "SHIPPED", "DELIVERED")
+
+
+def compute_totals(order: PurchaseOrder) -> tuple[int, int]:
+    """Returns (total_price_cents, item_count) for an order's line items."""
+    total = 0
+    item_count = 0
+    if order.items:
+        for item in order.items:
+            qty = item.quantity if item.quantity else 1
+            price = item.unit_price_cents if item.unit_price_cents else 0
+            total += qty * price
+            item_count += 1
+    return total, item_count
+
+
+def prepare_order(order: PurchaseOrder, status: str) -> tuple[int, int]:
+    """Precomputes the summary fields stored alongside the order."""
+    total, item_count = compute_totals(order)
+    order.order_date        = order.order_date or date.today()
+    order.total_price_cents = total
+    order.item_count        = item_count
+    order.status            = status
+    return total, item_count
+
+
+def seed_orders():
+    """Populates the order store with a few weeks of mock history."""
+    today = date.today()
+    for store_id in ("STORE-PARIS-01", "STORE-BERLIN-02"):
+        for n, days_ago in enumerate((2, 9, 16, 30), start=1):
+            order = PurchaseOrder()
+            order.order_id        = f"PO-2026-{store_id.split('-')[1]}-{n:03d}"
+            order.buyer_org_id    = store_id
+            order.supplier_org_id = "MFG-SHENZHEN-008"
+            order.order_date      = today - timedelta(days=days_ago)
+            order.currency        = "EUR"
+            order.items           = [
+                OrderItem(sku=f"SKU-TEST-{n}", product_name="Test Item",
+                          quantity=50 * n, unit_price_cents=1000,
+                          manufacturing_id=f"MFG-{n}"),
+            ]
+            prepare_order(order, SEED_STATUSES[n - 1])
+            order_store.add(order)
+
+
+def summarise(order: PurchaseOrder) -> PurchaseOrder:
+    """Returns a copy of the order header without its line items."""
+    summary = PurchaseOrder()
+    summary.order_id          = order.order_id
+    summary.buyer_org_id      = order.buyer_org_id
+    summary.supplier_org_id   = order.supplier_org_id
+    summary.order_date        = order.order_date
+    summary.currency          = order.currency
+    summary.total_price_cents = order.total_price_cents
+    summary.item_count        = order.item_count
+    summary.status            = order.status
+    return summary
+
+
+def process_order(order: PurchaseOrder) -> OrderResponse:
+    """Accepts a new order, stores it with its confirmation and returns it."""
+    total, item_count = prepare_order(order, "CONFIRMED")
+
+    response = OrderResponse()
+    response.confirmation_id    = f"CONF-{order.order_id or 'UNKNOWN'}-001"
+    response.status             = "ACCEPTED"
+    response.estimated_delivery = date.today() + timedelta(days=14)
+    response.total_price_cents  = total
+    response.message            = (
+        f"Order {order.order_id} accepted with {item_count} item(s). "
+        f"Estimated delivery in 14 days."
+    )
+    order_store.add(order, confirmation=response)
+    if order.buyer_org_id:
+        change_hooks.notify("orders", order.buyer_org_id)
+    return response
+
+
+# Retries of the same (order_id, buyer_org_id) replay the first response.
+submit_once = IdempotentSubmitter(
+    submit=process_order,
+    lookup=lambda key: order_store.confirmation(*key),
+    cache=TTLCache(max_entries=10_000, ttl_seconds=24 * 3600),
+)
+
+
+seed_orders()
 
 
 # ---------------------------------------------------------------------------
@@ -76,46 +202,34 @@ class ProcurementService(Service):
 
     @rpc(PurchaseOrder, _returns=OrderResponse, _operation_name="SubmitOrder")
     def SubmitOrder(ctx, order):
-        """Receives a PurchaseOrder and returns a mock OrderResponse."""
-        total = 0
-        item_count = 0
-        if order.items:
-            for item in order.items:
-                qty = item.quantity if item.quantity else 1
-                price = item.unit_price_cents if item.unit_price_cents else 0
-                total += qty * price
-                item_count += 1
-
-        response = OrderResponse()
-        response.confirmation_id    = f"CONF-{order.order_id or 'UNKNOWN'}-001"
-        response.status             = "ACCEPTED"
-        response.estimated_delivery = date.today() + timedelta(days=14)
-        response.total_price_cents  = total
-        response.message            = (
-            f"Order {order.order_id} accepted with {item_count} item(s). "
-            f"Estimated delivery in 14 days."
-        )
-        return response
+        """
+        Stores a PurchaseOrder and returns a mock OrderResponse. Retries
+        of an already accepted order return the original response.
+        """
+        if not order.order_id:
+            return process_order(order)
+        return submit_once((order.order_id, order.buyer_org_id or ""), order)
 
     @rpc(GetRecentOrdersRequest, _returns=OrderList, _operation_name="GetRecentOrders")
     def GetRecentOrders(ctx, request):
-        """Returns mock purchase orders for a given store ID."""
-        import datetime
-        store_id = request.storeId or "UNKNOWN"
-        
-        # Create some mock orders
-        o1 = PurchaseOrder()
-        o1.order_id = f"PO-2026-{store_id[:5]}-001"
-        o1.buyer_org_id = store_id
-        o1.supplier_org_id = "MFG-SHENZHEN-008"
-        o1.order_date = datetime.date.today() - datetime.timedelta(days=2)
-        o1.currency = "EUR"
-        
-        item1 = OrderItem(sku="SKU-TEST-1", productName="Test Item", quantity=50, unitPriceCents=1000, manufacturingId="MFG-1")
-        o1.items = [item1]
+        """Returns one page of a store's orders, newest first."""
+        try:
+            orders, next_token = order_store.page(
+                request.storeId or "UNKNOWN",
+                since=request.since,
+                until=request.until,
+                page_size=request.pageSize,
+                page_token=request.pageToken,
+            )
+        except InvalidPageToken as exc:
+            raise Fault(faultcode="Client.InvalidPageToken", faultstring=str(exc))
+
+        if request.summaryOnly:
+            orders = [summarise(o) for o in orders]
 
         resp = OrderList()
-        resp.orders = [o1]
+        resp.orders = orders
+        resp.nextPageToken = next_token
         return resp
 
 
@@ -131,7 +245,14 @@ application = Application(
     out_protocol=Soap11(),
 )
 
-wsgi_app = WsgiApplication(application)
+# Precompiled serializer for the hot responses; set PROCUREMENT_FAST_XML=0
+# to force Spyne's generic object-to-XML path.
+if os.environ.get("PROCUREMENT_FAST_XML", "1") != "0":
+    fast_serializer.install(application, ("SubmitOrder", "GetRecentOrders"))
+
+wsgi_app = MetricsWSGIMiddleware(
+    WsgiApplication(application), service="procurement",
+    operations=[name for service in application.services for name in service.public_methods])
 
 if __name__ == "__main__":
     HOST = "0.0.0.0"
@@ -142,8 +263,9 @@ if __name__ == "__main__":
     print("=" * 60)
     print(f"  SOAP endpoint : http://localhost:{PORT}/")
     print(f"  WSDL          : http://localhost:{PORT}/?wsdl")
+    print(f"  Metrics       : http://localhost:{PORT}/metrics")
     print(f"  Protocol      : SOAP 1.1 / XML")
-    print(f"  Operation     : SubmitOrder")
+    print(f"  Operations    : SubmitOrder, GetRecentOrders")
     print("=" * 60)
     print()
 
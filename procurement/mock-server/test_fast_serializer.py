@@ -0,0 +1,65 @@
+"""
+Byte-for-byte comparison of the fast serializer with Spyne's generic
+Soap11 path.
+
+    python -m pytest procurement/mock-server
+"""
+
+import pytest
+from spyne import MethodContext
+from spyne.protocol import ProtocolBase
+from spyne.server.null import NullServer
+
+import server
+from fast_serializer import FastResponseSerializer
+
+OPERATIONS = ("SubmitOrder", "GetRecentOrders")
+
+
+def generic_bytes(application, operation: str, result) -> bytes:
+    """The response as Spyne's own out_protocol renders it."""
+    ctx = MethodContext(NullServer(application), MethodContext.SERVER)
+    ctx.descriptor = next(
+        s.public_methods[operation] for s in application.services
+        if operation in s.public_methods
+    )
+    ctx.out_object = [result]
+    application.out_protocol.serialize(ctx, message=ProtocolBase.RESPONSE)
+    application.out_protocol.create_out_string(ctx)
+    return b"".join(ctx.out_string)
+
+
+def _cases():
+    submitted = server.PurchaseOrder(
+        order_id="PO-CHECK-1", buyer_org_id="STORE-PARIS-01",
+        supplier_org_id="MFG <&> \"Quotes\" \r\n Ünïcode",
+        currency="EUR", items=[
+            server.OrderItem(sku="SKU-1", quantity=2, unit_price_cents=150),
+            server.OrderItem(sku="SKU-2", product_name="", quantity=1),
+        ],
+    )
+    yield "submitted", "SubmitOrder", server.process_order(submitted)
+    yield "empty-response", "SubmitOrder", server.OrderResponse()
+    yield "zero-values", "SubmitOrder", server.OrderResponse(message="",
+                                                             total_price_cents=0)
+    yield "no-orders", "GetRecentOrders", server.OrderList()
+    yield "empty-orders", "GetRecentOrders", server.OrderList(orders=[])
+    yield "page-token", "GetRecentOrders", server.OrderList(orders=[submitted],
+                                                            nextPageToken="abc")
+    for store_id in ("STORE-PARIS-01", "STORE-BERLIN-02"):
+        orders, token = server.order_store.page(store_id, page_size=3)
+        yield f"{store_id}-summaries", "GetRecentOrders", server.OrderList(
+            orders=[server.summarise(o) for o in orders], nextPageToken=token)
+        yield f"{store_id}-orders", "GetRecentOrders", server.OrderList(orders=orders)
+
+
+@pytest.fixture(scope="module")
+def serializer():
+    return FastResponseSerializer(server.application, OPERATIONS)
+
+
+@pytest.mark.parametrize("operation, result",
+                         [pytest.param(op, result, id=name) for name, op, result in _cases()])
+def test_matches_generic_serializer(serializer, operation, result):
+    assert serializer.serialize(operation, result) == \
+        generic_bytes(server.application, operation, result)
@@ -0,0 +1,32 @@
+"""
+At-most-once SubmitOrder and its replay counter.
+
+    python -m pytest procurement/mock-server
+"""
+
+from idempotency import REPLAYS, IdempotentSubmitter, TTLCache
+
+
+def _replays(source: str) -> float:
+    return REPLAYS._values.get(REPLAYS._key({"source": source}), 0)
+
+
+def test_retries_replay_the_first_response():
+    processed, store = [], {}
+
+    def submit(key, order):
+        processed.append(order)
+        store[key] = f"confirmed {order}"
+        return store[key]
+
+    cache = TTLCache(max_entries=1)
+    submit_once = IdempotentSubmitter(submit, store.get, cache)
+    cached, stored = _replays("cache"), _replays("store")
+
+    assert submit_once(("PO-1", "ORG"), ("PO-1", "ORG"), "first") == "confirmed first"
+    assert submit_once(("PO-1", "ORG"), ("PO-1", "ORG"), "retry") == "confirmed first"
+    submit_once(("PO-2", "ORG"), ("PO-2", "ORG"), "other")         # evicts PO-1
+    assert submit_once(("PO-1", "ORG"), ("PO-1", "ORG"), "late") == "confirmed first"
+
+    assert processed == ["first", "other"]
+    assert (_replays("cache") - cached, _replays("store") - stored) == (1, 1)